@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# 按销量估计价格的分层规则（全项目唯一定义）
+# 品牌 -> {品类: [(最低销量, 估计价格), ...]}，品类 None 为该品牌默认规则，档位按最低销量从高到低排列
+PRICE_TIERS = {
+    "真维斯": {
+        None: [(200, 145), (100, 175), (0, 240)],  # 热卖款价格低，长尾款价格高
+    },
+    "优衣库": {
+        None: [(0, 145)],
+    },
+}
+
+
+def get_tiers(brand, category=None, tiers=None):
+    """
+    返回品牌（及品类）的价格档位，品类没有单独规则时使用品牌默认规则
+    :param tiers: 自定义规则（结构同 PRICE_TIERS），用于测算新的分层方案
+    """
+    tiers = tiers or PRICE_TIERS
+    if brand not in tiers:
+        raise KeyError(f"未定义价格分层的品牌: {brand}，可选: {list(tiers)}")
+    brand_tiers = tiers[brand]
+    return brand_tiers.get(category, brand_tiers[None])
+
+
+def _select_price(counts, rules):
+    """对整列销量做向量化分档"""
+    conditions = [counts >= threshold for threshold, _ in rules]
+    choices = [price for _, price in rules]
+    return np.select(conditions, choices, default=rules[-1][1])
+
+
+def estimate_price(sales_count, brand="真维斯", category=None, tiers=None):
+    """
+    按销量估计单价
+    :param sales_count: 销量（标量、数组或 Series）
+    :param category: 品类，可为标量或与 sales_count 等长的数组
+    :return: 与输入等长的估计价格数组
+    """
+    counts = np.asarray(sales_count, dtype=float)
+    if category is None or np.ndim(category) == 0:
+        return _select_price(counts, get_tiers(brand, category, tiers))
+
+    # 按品类分组，每组整体分档
+    categories = pd.Series(np.asarray(category), dtype=object)
+    prices = np.empty(len(counts))
+    for cat, idx in categories.groupby(categories, dropna=False).indices.items():
+        cat = None if pd.isna(cat) else cat
+        prices[idx] = _select_price(counts[idx], get_tiers(brand, cat, tiers))
+    return prices
+
+
+def compute_revenue(sales_count, brand="真维斯", category=None, tiers=None):
+    """估算销售额 = 销量 × 分层估计价格"""
+    counts = np.asarray(sales_count, dtype=float)
+    return counts * estimate_price(counts, brand, category, tiers)
+
+
+def item_sales_table(item_numbers, brand="真维斯", tiers=None):
+    """
+    由评论中的商品编号统计每个商品的评论数（近似销量）与估计价格
+    :return: DataFrame[_itemnumber_, comment_count, estimated_price_by_sales]
+    """
+    item_sales = pd.Series(item_numbers).value_counts().reset_index()
+    item_sales.columns = ['_itemnumber_', 'comment_count']
+    # 估计价格按整数元写出（与销售统计表原有格式一致）
+    item_sales['estimated_price_by_sales'] = np.round(
+        estimate_price(item_sales['comment_count'], brand, tiers=tiers)).astype('int64')
+    return item_sales
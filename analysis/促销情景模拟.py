@@ -0,0 +1,193 @@
+import os
+import glob
+import json
+import shutil
+import hashlib
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import CACHE_DIR, data_version, load_window, temp_path
+from analysis.价格分层 import PRICE_TIERS, estimate_price
+from analysis.零售日历 import calendar_lookup
+
+SCENARIO_DIR = os.path.join(CACHE_DIR, "scenario")
+
+# 可设置提升幅度的大促日（零售日历中的事件列）
+EVENT_DAYS = ("double11", "double12", "newyear")
+
+# 预测窗口：名称 -> (起始, 结束)，按上一年同期的日形态外推
+WINDOWS = {
+    "双十一月": ("2016-11-01", "2016-11-30"),
+    "双十二月": ("2016-12-01", "2016-12-31"),
+    "大促季": ("2016-11-01", "2017-01-31"),
+}
+
+
+def _scaled_tiers(factor):
+    return {brand: {cat: [(threshold, price * factor) for threshold, price in rules] for cat, rules in brand_tiers.items()}
+            for brand, brand_tiers in PRICE_TIERS.items()}
+
+
+# 价格方案：名称 -> 价格分层规则（结构同 价格分层.PRICE_TIERS）
+PRICE_SCHEMES = {
+    "默认分层": PRICE_TIERS,
+    "统一价145": {"真维斯": {None: [(0, 145)]}, "优衣库": PRICE_TIERS["优衣库"]},
+    "分层上调10%": _scaled_tiers(1.1),
+    "分层下调10%": _scaled_tiers(0.9),
+}
+
+# 单个情景的默认假设（与 predict_sales_11 的规则一致：同比增长、增长上限 1.5 倍、大促无额外提升）
+DEFAULT_SCENARIO = {
+    "double11_uplift": 0.0,
+    "double12_uplift": 0.0,
+    "newyear_uplift": 0.0,
+    "growth_cap": 1.5,
+    "price_scheme": "默认分层",
+    "window": "双十一月",
+}
+
+# 超过该数量的待计算情景分块交给进程池
+CHUNK_SIZE = 20000
+# 每个数据版本最多保留的情景网格结果文件数（按最近使用淘汰）
+MAX_CACHED_GRIDS = 200
+
+
+def normalize_scenario(scenario):
+    """补全默认假设；数值统一为保留 6 位小数的 float（-0.0 与 0.0、0 与 0.0 视为同一取值）"""
+    scenario = {**DEFAULT_SCENARIO, **scenario}
+    return {key: round(float(value), 6) + 0.0 if isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+            else value for key, value in scenario.items()}
+
+
+def scenario_key(scenario):
+    """情景哈希：假设取值完全相同的情景共用缓存结果"""
+    payload = json.dumps(normalize_scenario(scenario), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def scenario_grid(**options):
+    """
+    假设网格的笛卡尔积
+    例：scenario_grid(double11_uplift=[0, 0.3], growth_cap=[1.2, 1.5]) -> 4 个情景
+    """
+    names = list(options)
+    return [{**DEFAULT_SCENARIO, **dict(zip(names, values))} for values in itertools.product(*options.values())]
+
+
+# -------------------------------------------------- 历史基准 -------------------------------------------------- #
+def load_context():
+    """
+    情景计算所需的历史基准（小数组，可直接传给工作进程）：
+    同比增长率（2014、2015 年 11 月）、各窗口上一年同期的日销量与商品占比
+    """
+    reviews = load_window('评论_真维斯_清洗后', '2014-11-01', '2016-01-31 23:59:59', columns=['rateDate', '_itemnumber_'])
+    dates = reviews['rateDate']
+    count_2014 = int(((dates >= '2014-11-01') & (dates < '2014-12-01')).sum())
+    count_2015 = int(((dates >= '2015-11-01') & (dates < '2015-12-01')).sum())
+    context = {"growth_rate": (count_2015 - count_2014) / count_2014 if count_2014 else 0.0, "windows": {}}
+
+    for window, (start, end) in WINDOWS.items():
+        future = pd.date_range(start, end)
+        last_year = future - pd.DateOffset(years=1)
+        in_window = (dates >= last_year[0]) & (dates < last_year[-1] + pd.Timedelta(days=1))
+        daily = dates[in_window].dt.normalize().value_counts().reindex(last_year, fill_value=0)
+        items = reviews.loc[in_window, '_itemnumber_'].value_counts()
+        calendar = calendar_lookup(future, EVENT_DAYS)
+        context["windows"][window] = {
+            "dates": future,
+            "base": daily.values.astype(float),
+            "share": (items / items.sum()).values if len(items) else np.ones(1),
+            "events": {event: calendar[event].values.astype(float) for event in EVENT_DAYS},
+        }
+    return context
+
+
+# -------------------------------------------------- 情景计算 -------------------------------------------------- #
+def evaluate(context, scenarios):
+    """
+    向量化计算一批情景：同一窗口、同一价格方案的情景一起按矩阵计算
+    :return: DataFrame，每行一个情景的假设与结果指标
+    """
+    frame = pd.DataFrame(scenarios)
+    results = []
+    for (window, scheme), group in frame.groupby(["window", "price_scheme"], sort=False):
+        w = context["windows"][window]
+        factor = np.minimum(1 + context["growth_rate"], group["growth_cap"].values)
+        lift = 1 + sum(group[f"{event}_uplift"].values[:, None] * w["events"][event][None, :] for event in EVENT_DAYS)
+        curve = factor[:, None] * w["base"][None, :] * lift
+
+        total = curve.sum(axis=1)
+        event_mask = sum(w["events"].values()) > 0
+        item_volume = total[:, None] * w["share"][None, :]
+        prices = estimate_price(item_volume.ravel(), "真维斯", tiers=PRICE_SCHEMES[scheme]).reshape(item_volume.shape)
+
+        result = group.copy()
+        result["总销量"] = total
+        result["大促日销量"] = curve[:, event_mask].sum(axis=1)
+        result["峰值日销量"] = curve.max(axis=1)
+        result["峰值日期"] = w["dates"][curve.argmax(axis=1)].strftime("%Y-%m-%d")
+        result["总销售额"] = (item_volume * prices).sum(axis=1)
+        results.append(result)
+    return pd.concat(results).sort_index()
+
+
+def _evaluate_chunk(task):
+    context, scenarios = task
+    return evaluate(context, scenarios)
+
+
+def _prune(version_dir):
+    """删除旧数据版本的结果目录，本版本只保留最近使用的 MAX_CACHED_GRIDS 个网格文件"""
+    for old in glob.glob(os.path.join(SCENARIO_DIR, "*")):
+        if old == version_dir:
+            continue
+        if os.path.isdir(old):
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    files = sorted(glob.glob(os.path.join(version_dir, "*.parquet")), key=os.path.getmtime, reverse=True)
+    for old in files[MAX_CACHED_GRIDS:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def simulate(scenarios, workers=None):
+    """
+    计算情景结果：每个情景网格（情景哈希集合）一个结果文件，同一网格直接读取；
+    文件内容只由网格决定，并发会话各自原子写入同一结果，互不覆盖；待计算情景较多时分块并行
+    :return: DataFrame（按输入顺序），index 为情景哈希
+    """
+    scenarios = [normalize_scenario(s) for s in scenarios]
+    keys = [scenario_key(s) for s in scenarios]
+    version_dir = os.path.join(SCENARIO_DIR, data_version('评论_真维斯_清洗后'))
+    grid_key = hashlib.sha1("|".join(sorted(set(keys))).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(version_dir, f"grid_{grid_key}.parquet")
+    if os.path.exists(path):
+        os.utime(path)
+        return pd.read_parquet(path).loc[keys]
+
+    unique = list(dict(zip(keys, scenarios)).items())
+    context = load_context()
+    chunks = [unique[i:i + CHUNK_SIZE] for i in range(0, len(unique), CHUNK_SIZE)]
+    tasks = [(context, [s for _, s in chunk]) for chunk in chunks]
+    if len(tasks) == 1:
+        parts = [_evaluate_chunk(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_evaluate_chunk, tasks))
+    for part, chunk in zip(parts, chunks):
+        part.index = pd.Index([key for key, _ in chunk], name="scenario")
+    results = pd.concat(parts)
+
+    os.makedirs(version_dir, exist_ok=True)
+    tmp_path = temp_path(path)
+    results.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    _prune(version_dir)
+    return results.loc[keys]
@@ -0,0 +1,278 @@
+import os
+import glob
+import time
+import shutil
+import hashlib
+import functools
+import threading
+import contextlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 数据目录与派生文件缓存目录（可通过环境变量切换，便于多副本/压测时指向同一份数据）
+DATA_DIR = os.environ.get("TRUETREND_DATA_DIR", "data")
+CACHE_DIR = os.environ.get("TRUETREND_CACHE_DIR", os.path.join(DATA_DIR, "cache"))
+
+# 已清洗数据集：名称 -> 源 Excel 文件
+DATASETS = {
+    "评论_真维斯_清洗后": "评论_真维斯_清洗后.xlsx",
+    "reviews_uni_clean": "reviews_uni_clean.xlsx",
+    "真维斯_商品销售统计": "真维斯_商品销售统计.xlsx",
+}
+
+# 按 品牌/月份 分区发布的评论数据集：名称 -> (品牌, 日期列)
+PARTITIONED_DATASETS = {
+    "评论_真维斯_清洗后": ("真维斯", "rateDate"),
+    "reviews_uni_clean": ("优衣库", "ratedate_dt"),
+}
+# 分区内每个行组的行数（行组带 min/max 统计，日期条件可下推跳过行组）
+ROW_GROUP_SIZE = 2000
+
+
+def source_path(name):
+    """返回数据集对应的源 Excel 路径"""
+    if name not in DATASETS:
+        raise KeyError(f"未知数据集: {name}，可选: {list(DATASETS)}")
+    return os.path.join(DATA_DIR, DATASETS[name])
+
+
+def resolve_dataset(path):
+    """
+    根据文件路径识别数据集名称，兼容 Windows 风格的反斜杠路径
+    :return: 数据集名称，不属于共享数据集时返回 None
+    """
+    basename = str(path).replace("\\", "/").rsplit("/", 1)[-1]
+    for name, filename in DATASETS.items():
+        if basename == filename:
+            return name
+    return None
+
+
+def source_version(name):
+    """根据源文件大小与修改时间生成数据版本号"""
+    stat = os.stat(source_path(name))
+    key = f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def data_version(*names):
+    """多个数据集的联合版本号，默认包含全部数据集，可作为派生结果的缓存键"""
+    names = names or tuple(DATASETS)
+    key = "|".join(source_version(name) for name in names)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def temp_path(target):
+    """生成写入临时文件名（进程号 + 线程号），写完后用 os.replace 原子替换为 target"""
+    return f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+@contextlib.contextmanager
+def file_lock(target, timeout=60, stale=300):
+    """
+    缓存文件的 读取-修改-写回 锁（进程、线程间均互斥）：独占创建 target.lock，退出时删除
+    持有者异常退出遗留的锁超过 stale 秒视为失效
+    """
+    lock_path = f"{target}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"等待文件锁超时: {lock_path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def _to_arrow(df):
+    """DataFrame 转 Arrow Table，混合类型的 object 列退化为字符串"""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.select_dtypes(include="object").columns:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def publish_dataset(name):
+    """
+    将清洗后的 Excel 发布为未压缩的 Arrow IPC 文件（按数据版本命名）
+    同一版本只生成一次；先写临时文件再原子替换，多进程/多副本同时发布也不会读到半成品
+    :return: Arrow 文件路径
+    """
+    version = source_version(name)
+    target_dir = os.path.join(CACHE_DIR, "arrow")
+    target = os.path.join(target_dir, f"{name}.{version}.arrow")
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(target_dir, exist_ok=True)
+    table = _to_arrow(pd.read_excel(source_path(name)))
+    tmp_path = temp_path(target)
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, target)
+
+    # 清理旧版本文件（其他进程仍在映射时删除失败则忽略）
+    for old in glob.glob(os.path.join(target_dir, f"{name}.*.arrow")):
+        if old != target:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return target
+
+
+def publish_all():
+    """发布全部数据集，返回 名称 -> Arrow 文件路径"""
+    return {name: publish_dataset(name) for name in DATASETS}
+
+
+# 数据集名称 -> (Arrow 文件路径, 内存映射的 Table)，每个数据集只保留当前版本
+_mapped = {}
+_mapped_lock = threading.Lock()
+
+
+def _mapped_table(name, path):
+    """以只读内存映射方式打开 Arrow 文件：每个进程每个版本只映射一次，版本变化后替换并释放旧版本的映射"""
+    with _mapped_lock:
+        cached = _mapped.get(name)
+        if cached is None or cached[0] != path:
+            source = pa.memory_map(path, "r")
+            _mapped[name] = (path, pa.ipc.open_file(source).read_all())
+        return _mapped[name][1]
+
+
+def load_table(name, columns=None):
+    """
+    读取共享数据集的 Arrow Table（零拷贝，数据页由操作系统在所有进程间共享）
+    :param columns: 只需要的列，None 表示全部列
+    """
+    table = _mapped_table(name, publish_dataset(name))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def load_frame(name, columns=None):
+    """
+    读取共享数据集为 DataFrame
+    数值列直接引用内存映射缓冲区（只读、零拷贝），只按需转换所选的列；
+    工作进程（进程池、sklearn 并行等）传递数据集名称即可各自映射同一文件，无需序列化整表
+    """
+    return load_table(name, columns).to_pandas(split_blocks=True)
+
+
+# -------------------------------------------------- 分区数据集 -------------------------------------------------- #
+def publish_partitioned(name):
+    """
+    将评论数据集发布为按 品牌/月份 分区的 Parquet 数据集（hive 目录 brand=.../month=YYYY-MM/）
+    分区内按日期排序后按 ROW_GROUP_SIZE 切分行组；同一版本只生成一次，写临时目录后原子改名
+    :return: 数据集根目录
+    """
+    if name not in PARTITIONED_DATASETS:
+        raise KeyError(f"未分区的数据集: {name}，可选: {list(PARTITIONED_DATASETS)}")
+    brand, date_column = PARTITIONED_DATASETS[name]
+    target_dir = os.path.join(CACHE_DIR, "partitioned")
+    target = os.path.join(target_dir, f"{name}.{source_version(name)}")
+    if os.path.exists(target):
+        return target
+
+    table = load_table(name).sort_by(date_column)
+    table = table.append_column("brand", pa.array([brand] * table.num_rows, pa.string()))
+    table = table.append_column("month", pc.strftime(table[date_column], format="%Y-%m"))
+    tmp_path = temp_path(target)
+    ds.write_dataset(
+        table, tmp_path, format="parquet",
+        partitioning=ds.partitioning(pa.schema([("brand", pa.string()), ("month", pa.string())]), flavor="hive"),
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=ROW_GROUP_SIZE,
+    )
+    try:
+        os.replace(tmp_path, target)
+    except OSError:
+        # 其他进程已发布同一版本
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    for old in glob.glob(os.path.join(target_dir, f"{name}.*")):
+        if old != target and not old.endswith(".tmp"):
+            shutil.rmtree(old, ignore_errors=True)
+    return target
+
+
+@functools.lru_cache(maxsize=2 * len(PARTITIONED_DATASETS))
+def _partitioned_dataset(path):
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def window_filter(name, start=None, end=None):
+    """
+    日期窗口 [start, end] 的过滤表达式：月份分区条件用于裁剪目录，日期条件下推到行组统计
+    end 与 pandas 的字符串比较口径一致（'2016-01-31' 即当天零点）
+    """
+    date_column = PARTITIONED_DATASETS[name][1]
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [ds.field("month") >= start.strftime("%Y-%m"), ds.field(date_column) >= start]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [ds.field("month") <= end.strftime("%Y-%m"), ds.field(date_column) <= end]
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def partition_fingerprint(path):
+    """分区文件指纹：只读 Parquet 尾部元数据（大小、行数、列统计），不扫描数据，可作为分区派生结果的缓存键"""
+    metadata = pq.read_metadata(path)
+    stats = [str(metadata.row_group(i).column(j).statistics)
+             for i in range(metadata.num_row_groups) for j in range(metadata.num_columns)]
+    key = f"{os.path.getsize(path)}:{metadata.num_rows}:{'|'.join(stats)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def partition_month(path):
+    """分区文件所属月份（'YYYY-MM'；日期为空的行所在分区返回 None）"""
+    month = os.path.basename(os.path.dirname(path)).split("=", 1)[-1]
+    return None if month.startswith("__") else month
+
+
+def window_files(name, start=None, end=None):
+    """窗口内需要读取的分区文件列表（用于核对分区裁剪效果）"""
+    dataset = _partitioned_dataset(publish_partitioned(name))
+    return [fragment.path for fragment in dataset.get_fragments(filter=window_filter(name, start, end))]
+
+
+def load_window(name, start=None, end=None, columns=None):
+    """
+    按日期窗口读取评论数据集为 DataFrame，只打开窗口内月份分区的文件
+    :param start: 起始时间（含），None 表示不限
+    :param end: 结束时间（含），None 表示不限
+    :param columns: 只需要的列，None 表示全部列
+    """
+    dataset = _partitioned_dataset(publish_partitioned(name))
+    table = dataset.to_table(columns=None if columns is None else list(columns), filter=window_filter(name, start, end))
+    return table.to_pandas(split_blocks=True)
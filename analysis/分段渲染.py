@@ -0,0 +1,70 @@
+import threading
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# 每次页面运行的分段计算线程数（模型训练与 Arrow/NumPy 计算大部分时间释放 GIL）
+SECTION_WORKERS = 4
+
+
+def section_pool():
+    """
+    本次页面运行专用的线程池：一个会话的重计算不会占用其他会话的线程，
+    工作线程挂上本次运行的 ScriptRunContext，st.cache_data 等按会话工作
+    """
+    ctx = get_script_run_ctx()
+    return ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="truetrend-section",
+                              initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx))
+
+
+def widget_value(key, default):
+    """
+    控件在本次运行中的取值：分段计算在控件渲染之前提交，先从 session_state 读取，首次运行时为默认值
+    """
+    return st.session_state.get(key, default)
+
+
+class Prefetched:
+    """
+    分段预先并发计算的结果；分段单独重跑（st.fragment）且参数已改变时重新计算
+    """
+
+    def __init__(self, func, kwargs, value):
+        self.func = func
+        self.kwargs = kwargs
+        self.value = value
+
+    def get(self, func, **kwargs):
+        if func is self.func and kwargs == self.kwargs:
+            return self.value
+        return func(**kwargs)
+
+
+def _compute(func, kwargs):
+    # func 为 None 的分段没有需要预先计算的数据（如数据随控件即时计算的交互分段）
+    return Prefetched(func, kwargs, func(**kwargs) if func else None)
+
+
+def render_sections(sections):
+    """
+    渐进渲染页面分段：先按顺序为每个分段放置占位，各分段的数据计算并发提交到线程池，哪个先算完就先绘制哪个
+    :param sections: [(render, func, kwargs)]，后台计算 func(**kwargs)（func 可为 None），完成后在占位处调用 render(Prefetched)；
+                     render 用 st.fragment 装饰，交互时只重跑该分段，在分段内用 prefetched.get(func, **kwargs) 取数据；
+                     后台计算只取数据，不调用 st.* 绘制（缓存函数需关闭 show_spinner）；本次运行因重跑或会话离开而中止时取消尚未开始的计算
+    """
+    placeholders = [st.empty() for _ in sections]
+    for placeholder in placeholders:
+        placeholder.caption("加载中…")
+    pool = section_pool()
+    try:
+        futures = {pool.submit(_compute, func, kwargs): i for i, (_, func, kwargs) in enumerate(sections)}
+        for future in as_completed(futures):
+            i = futures[future]
+            # 单个分段计算或绘制失败只在该分段显示错误，其余分段照常绘制
+            with placeholders[i].container():
+                try:
+                    sections[i][0](future.result())
+                except Exception as e:
+                    st.exception(e)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import PARTITIONED_DATASETS, load_table, window_files
+
+# 总行数低于该值时在当前进程内逐分片计算（进程池启动开销大于收益）
+POOL_MIN_ROWS = 200_000
+# 按行切分时每个分片的行数
+SHARD_ROWS = 100_000
+
+# 分组键的派生变换（按名称引用，工作进程中按名称查找，避免传递不可序列化的函数）
+KEY_TRANSFORMS = {
+    "date": lambda s: pd.to_datetime(s).dt.date,
+    "day": lambda s: pd.to_datetime(s).dt.normalize(),
+    "month": lambda s: pd.to_datetime(s).dt.to_period("M"),
+}
+
+# 各聚合函数的部分结果合并方式（均满足结合律，分片可任意划分与合并顺序）
+MERGE_FUNCS = {"size": "sum", "count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+# -------------------------------------------------- 分片 -------------------------------------------------- #
+def make_shards(name, by="month", start=None, end=None, shard_rows=SHARD_ROWS):
+    """
+    切分数据集
+    :param by: 'month' 按月份分区（仅评论数据集，可限定日期窗口）；'rows' 按行区间切分内存映射表
+    :return: 分片描述列表 [('file', path) | ('rows', name, offset, length)]
+    """
+    if by == "month":
+        if name not in PARTITIONED_DATASETS:
+            raise KeyError(f"数据集 {name} 没有月份分区，请使用 by='rows'")
+        return [("file", path) for path in window_files(name, start, end)]
+    if by == "rows":
+        num_rows = load_table(name).num_rows
+        return [("rows", name, offset, min(shard_rows, num_rows - offset)) for offset in range(0, num_rows, shard_rows)]
+    raise ValueError(f"未知分片方式: {by}，可选: month / rows")
+
+
+def _shard_rows(shard):
+    if shard[0] == "file":
+        return pq.read_metadata(shard[1]).num_rows
+    return shard[3]
+
+
+def _read_shard(shard, columns):
+    if shard[0] == "file":
+        return pq.read_table(shard[1], columns=columns).to_pandas()
+    _, name, offset, length = shard
+    return load_table(name, columns).slice(offset, length).to_pandas()
+
+
+# -------------------------------------------------- 聚合 -------------------------------------------------- #
+class GroupAggregate:
+    """
+    可分片的分组聚合：map 对单个分片求部分聚合，reduce 按结合律合并部分结果
+    :param keys: 分组列
+    :param aggs: 输出列 -> (源列, 聚合函数)，函数取 size / count / sum / min / max；为空时只计行数
+    :param transforms: 分组列 -> KEY_TRANSFORMS 中的变换名
+    """
+
+    def __init__(self, keys, aggs=None, transforms=None):
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.aggs = aggs or {"count": (self.keys[0], "size")}
+        self.transforms = transforms or {}
+
+    def columns(self):
+        return list(dict.fromkeys(self.keys + [col for col, _ in self.aggs.values()]))
+
+    def map(self, df):
+        for col, transform in self.transforms.items():
+            df[col] = KEY_TRANSFORMS[transform](df[col])
+        grouped = df.groupby(self.keys, sort=False)
+        return pd.DataFrame({out: grouped[col].agg(func) for out, (col, func) in self.aggs.items()})
+
+    def reduce(self, partials):
+        partials = [p for p in partials if len(p)]
+        if not partials:
+            return pd.DataFrame(columns=list(self.aggs))
+        merged = pd.concat(partials).groupby(level=list(range(len(self.keys))))
+        return merged.agg({out: MERGE_FUNCS[func] for out, (_, func) in self.aggs.items()})
+
+
+def _map_shard(task):
+    """进程池任务：读取一个分片并求部分聚合"""
+    shard, aggregate = task
+    return aggregate.map(_read_shard(shard, aggregate.columns()))
+
+
+def map_reduce(name, aggregate, by="month", start=None, end=None, workers=None):
+    """
+    分片 map-reduce 聚合：各分片在进程池中求部分结果，再按结合律合并
+    数据量小于 POOL_MIN_ROWS 或 workers=1 时在当前进程内逐分片计算，结果一致
+    """
+    shards = make_shards(name, by, start, end)
+    tasks = [(shard, aggregate) for shard in shards]
+    if workers == 1 or len(shards) <= 1 or sum(map(_shard_rows, shards)) < POOL_MIN_ROWS:
+        partials = [_map_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            partials = list(pool.map(_map_shard, tasks))
+    return aggregate.reduce(partials)
+
+
+# -------------------------------------------------- 常用聚合 -------------------------------------------------- #
+def value_counts(name, column, transform=None, by="month", start=None, end=None, workers=None):
+    """
+    分片计算某列（可先做键变换）的取值计数，按取值排序，与 Series.value_counts().sort_index() 一致
+    """
+    aggregate = GroupAggregate(column, transforms={column: transform} if transform else None)
+    return map_reduce(name, aggregate, by, start, end, workers)["count"].sort_index()
+
+
+def monthly_counts(name, workers=None):
+    """评论数据集按日期列统计的月度评论数（PeriodIndex）"""
+    return value_counts(name, PARTITIONED_DATASETS[name][1], "month", workers=workers)
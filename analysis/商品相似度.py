@@ -0,0 +1,206 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from analysis.共享数据集 import CACHE_DIR, data_version, load_frame, temp_path
+from analysis.价格分层 import estimate_price
+
+SIMILARITY_DIR = os.path.join(CACHE_DIR, "similarity")
+
+# 各品牌评论数据：(数据集, 商品编号列, SKU 列, 日期列)
+ITEM_SOURCES = {
+    "真维斯": ("评论_真维斯_清洗后", "_itemnumber_", "auctionSku", "rateDate"),
+    "优衣库": ("reviews_uni_clean", "_itemnumber_", "attr_sku", "ratedate_dt"),
+}
+
+# SKU 文本中颜色、尺码的提取规则（两种格式：“颜色:宝蓝色 2680;尺码:L” 与 “颜色分类#3B09 黑色#3A尺码#3B165/92A/XL”）
+COLOR_PATTERN = r"颜色(?:分类)?(?:[:：]|#3B)\s*([^;#]+)"
+SIZE_PATTERN = r"尺码(?:[:：]|#3B)\s*([^;#|\s]+)"
+
+# 颜色名称 -> 色系（按关键字顺序匹配），两个品牌颜色命名不同，色系用于跨品牌比较
+COLOR_FAMILIES = [
+    ("藏青", "蓝"), ("黑", "黑"), ("白", "白"), ("米", "米"), ("卡其", "卡其"), ("灰", "灰"), ("蓝", "蓝"),
+    ("青", "蓝"), ("绿", "绿"), ("红", "红"), ("粉", "粉"), ("紫", "紫"), ("黄", "黄"), ("橙", "橙"),
+    ("棕", "棕"), ("咖", "棕"), ("驼", "棕"),
+]
+LETTER_SIZES = ["XXS", "XS", "S", "M", "L", "XL", "XXL", "XXXL"]
+
+# 价格带（元）：按价格分层估计的单价落入的区间
+PRICE_BANDS = [0, 150, 200, np.inf]
+PRICE_BAND_LABELS = ["150以下", "150-200", "200以上"]
+
+# 画像各部分的权重（各部分先单独归一化，再按权重拼接、整体归一化）
+BLOCK_WEIGHTS = {"color": 1.0, "family": 1.0, "size": 1.0, "price": 0.5, "month": 1.0}
+
+# 批量查询时每批的查询商品数：每批只生成 批次 × 竞品数 的相似度矩阵
+QUERY_BATCH = 1024
+
+
+# -------------------------------------------------- 画像 -------------------------------------------------- #
+def _color_family(colors):
+    family = pd.Series(None, index=colors.index, dtype=object)
+    for keyword, name in COLOR_FAMILIES:
+        family = family.fillna(colors.where(colors.str.contains(keyword, na=False, regex=False)).map(
+            lambda _, name=name: name, na_action="ignore"))
+    return family
+
+
+def _normalize_size(sizes):
+    """尺码统一：“165/92A/XL” 取最后一段；字母尺码保留，腰围等数字尺码记为 W+数字"""
+    last = sizes.str.split("/").str[-1].str.upper()
+    numeric = last.str.extract(r"^(\d+)", expand=False)
+    return last.where(last.isin(LETTER_SIZES), ("W" + numeric).where(numeric.notna()))
+
+
+def parse_reviews(brand):
+    """
+    逐条评论解析商品、颜色、色系、尺码与月份（向量化正则提取）
+    :return: DataFrame[item, color, family, size, month]
+    """
+    dataset, item_column, sku_column, date_column = ITEM_SOURCES[brand]
+    df = load_frame(dataset, columns=[item_column, sku_column, date_column]).dropna(subset=[item_column])
+    items = df[item_column]
+    if pd.api.types.is_float_dtype(items):
+        items = items.astype("int64")
+    sku = df[sku_column].astype(str)
+    colors = sku.str.extract(COLOR_PATTERN, expand=False).str.replace(r"[\d\s]+", "", regex=True)
+    colors = colors.where(colors.str.len() > 0)
+    return pd.DataFrame({
+        "item": f"{brand}:" + items.astype(str),
+        "color": colors,
+        "family": _color_family(colors),
+        "size": _normalize_size(sku.str.extract(SIZE_PATTERN, expand=False)),
+        "month": pd.to_datetime(df[date_column], errors="coerce").dt.month,
+    })
+
+
+def _price_band(counts, brand):
+    prices = estimate_price(counts, brand)
+    return pd.cut(prices, PRICE_BANDS, right=False, labels=PRICE_BAND_LABELS).astype(str)
+
+
+def item_profiles():
+    """
+    两个品牌全部商品的画像长表：每行一个 (商品, 特征, 权重)，权重为评论中出现的次数
+    特征：颜色、色系、尺码、价格带（按销量估价）、销售月份
+    """
+    parts = []
+    for brand in ITEM_SOURCES:
+        reviews = parse_reviews(brand)
+        for block in ("color", "family", "size", "month"):
+            counts = reviews.dropna(subset=[block]).groupby(["item", block]).size().rename("weight").reset_index()
+            counts["feature"] = f"{block}:" + counts[block].astype(str)
+            parts.append(counts[["item", "feature", "weight"]])
+        volume = reviews["item"].value_counts()
+        parts.append(pd.DataFrame({"item": volume.index, "feature": "price:" + _price_band(volume.values, brand),
+                                   "weight": 1}))
+    return pd.concat(parts, ignore_index=True)
+
+
+# -------------------------------------------------- 索引 -------------------------------------------------- #
+class SimilarityIndex:
+    """
+    商品相似度索引：每个商品一行稀疏画像向量（float32 CSR），行已 L2 归一化，
+    余弦相似度即稀疏点积；查询按批计算 查询 × 竞品 的点积后取 Top-K
+    """
+
+    def __init__(self, items, features, matrix):
+        self.items = pd.Index(items)
+        self.features = pd.Index(features)
+        self.matrix = matrix
+        self.brands = np.asarray(self.items.str.split(":").str[0], dtype=object)
+
+    @classmethod
+    def from_profiles(cls, profiles):
+        items, item_codes = np.unique(profiles["item"], return_inverse=True)
+        features, feature_codes = np.unique(profiles["feature"], return_inverse=True)
+        weight = profiles["weight"].values.astype(np.float32)
+        matrix = sparse.csr_matrix((weight, (item_codes, feature_codes)), shape=(len(items), len(features)))
+
+        # 各部分先行归一化再加权，避免评论多的部分（如月份）主导相似度
+        blocks = pd.Index(features).str.split(":").str[0]
+        scaled = []
+        for block, block_weight in BLOCK_WEIGHTS.items():
+            part = matrix[:, np.flatnonzero(blocks == block)]
+            scaled.append(_normalize_rows(part) * np.float32(np.sqrt(block_weight)))
+        order = np.concatenate([np.flatnonzero(blocks == block) for block in BLOCK_WEIGHTS])
+        matrix = _normalize_rows(sparse.hstack(scaled, format="csr")).astype(np.float32)
+        return cls(items, features[order], matrix)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, items=np.asarray(self.items, dtype=str), features=np.asarray(self.features, dtype=str),
+                                data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                                shape=np.array(self.matrix.shape))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            matrix = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            return cls(f["items"], f["features"], matrix)
+
+    def most_similar(self, items=None, brand=None, top_k=5, batch_size=QUERY_BATCH):
+        """
+        批量查询最相似的商品
+        :param items: 查询商品（形如 "真维斯:522599889126"），默认为全部商品
+        :param brand: 只在该品牌的商品中查找（竞品），默认为与查询商品不同品牌的全部商品
+        :return: DataFrame[商品, 排名, 相似商品, 相似度]
+        """
+        queries = self.items if items is None else pd.Index(items)
+        rows = self.items.get_indexer(queries)
+        if (rows < 0).any():
+            raise KeyError(f"索引中没有这些商品: {list(queries[rows < 0])[:5]}")
+        results = []
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = (self.matrix[batch] @ self.matrix.T).toarray()
+            # 候选限定为目标品牌（默认为查询商品的竞争品牌），排除自身
+            targets = (self.brands[None, :] == brand) if brand else \
+                (self.brands[None, :] != self.brands[batch][:, None])
+            targets = targets & (np.arange(len(self.items))[None, :] != batch[:, None])
+            scores = np.where(targets, scores, -np.inf)
+            k = min(top_k, scores.shape[1])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+            results.append(pd.DataFrame({
+                "商品": np.repeat(self.items[batch], k),
+                "排名": np.tile(np.arange(1, k + 1), len(batch)),
+                "相似商品": self.items[top.ravel()],
+                "相似度": np.take_along_axis(scores, top, axis=1).ravel(),
+            }))
+        if not results:
+            return pd.DataFrame(columns=["商品", "排名", "相似商品", "相似度"])
+        result = pd.concat(results, ignore_index=True)
+        # 候选不足 top_k 时去掉被屏蔽的位置
+        return result[np.isfinite(result["相似度"])].reset_index(drop=True)
+
+    def explain(self, item, other):
+        """两个商品的相似度按画像各部分拆分（各部分点积之和即总相似度）"""
+        a, b = self.matrix[self.items.get_loc(item)], self.matrix[self.items.get_loc(other)]
+        contribution = a.multiply(b).toarray().ravel()
+        blocks = self.features.str.split(":").str[0]
+        return pd.Series(contribution, index=blocks).groupby(level=0).sum().reindex(list(BLOCK_WEIGHTS))
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+
+
+@functools.lru_cache(maxsize=4)
+def _similarity_index(version):
+    path = os.path.join(SIMILARITY_DIR, f"index_{version}.npz")
+    if os.path.exists(path):
+        return SimilarityIndex.load(path)
+    index = SimilarityIndex.from_profiles(item_profiles())
+    index.save(path)
+    return index
+
+
+def similarity_index():
+    """商品相似度索引：按数据版本构建一次并保存为压缩稀疏矩阵"""
+    return _similarity_index(data_version(*(dataset for dataset, _, _, _ in ITEM_SOURCES.values())))
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+import pandas as pd
+from analysis.共享数据集 import CACHE_DIR, data_version, load_frame, load_table, temp_path
+
+CUSTOMER_DIR = os.path.join(CACHE_DIR, "customer")
+
+# 各品牌评论数据：(数据集, 日期列, 用户标识候选列)；候选列按优先级逐行取第一个非空值
+# 当前数据中加密用户 ID 全为空，实际退化为脱敏昵称（如 "t***1"），不同用户可能同名，复购率会偏高
+BRAND_SOURCES = {
+    "真维斯": ("评论_真维斯_清洗后", "rateDate",
+            ["userid_encryption", "useridencryption", "displayUserNumId", "displayUserNick"]),
+    "优衣库": ("reviews_uni_clean", "ratedate_dt",
+            ["userid_encryption", "useridencryption", "displayusernumid", "displayusernick"]),
+}
+
+
+def _user_keys(dataset, candidates):
+    """
+    逐行取第一个非空的用户标识列
+    :return: (用户标识 Series, 实际使用到的列名列表)
+    """
+    columns = [col for col in candidates if col in load_table(dataset).schema.names]
+    df = load_frame(dataset, columns=columns)
+    keys = pd.Series(None, index=df.index, dtype=object)
+    used = []
+    for col in columns:
+        values = df[col].dropna()
+        if values.empty:
+            continue
+        # 数值型 ID 去掉浮点尾巴，统一为字符串后再编码
+        if pd.api.types.is_float_dtype(values):
+            values = values.astype("int64")
+        # 前缀区分标识类型；两个品牌同类标识列名大小写、下划线不同，统一后才能跨品牌匹配
+        keys = keys.fillna(f"{col.lower().replace('_', '')}:" + values.astype(str))
+        used.append(col)
+    return keys, used
+
+
+def encode_customers():
+    """
+    将两个品牌的用户标识统一字典编码为整数（同一用户在两个品牌下编码相同），只编码一次并按数据版本缓存
+    :return: DataFrame[brand(0/1), user(int32), month(int32, 年*12+月)] 与 元信息 dict
+    """
+    names = [dataset for dataset, _, _ in BRAND_SOURCES.values()]
+    path = os.path.join(CUSTOMER_DIR, f"encoded_{data_version(*names)}.parquet")
+    if os.path.exists(path):
+        encoded = pd.read_parquet(path)
+        return encoded, {"n_users": int(encoded["user"].max()) + 1, "id_columns": encoded.attrs.get("id_columns", {})}
+
+    parts, id_columns = [], {}
+    for brand_code, (brand, (dataset, date_column, candidates)) in enumerate(BRAND_SOURCES.items()):
+        keys, id_columns[brand] = _user_keys(dataset, candidates)
+        dates = pd.to_datetime(load_frame(dataset, columns=[date_column])[date_column], errors="coerce")
+        valid = keys.notna() & dates.notna()
+        parts.append(pd.DataFrame({
+            "brand": np.int8(brand_code),
+            "key": keys[valid].values,
+            "month": (dates[valid].dt.year * 12 + dates[valid].dt.month - 1).astype("int32").values,
+        }))
+    encoded = pd.concat(parts, ignore_index=True)
+    codes, uniques = pd.factorize(encoded.pop("key"))
+    encoded["user"] = codes.astype("int32")
+    encoded.attrs["id_columns"] = id_columns
+
+    os.makedirs(CUSTOMER_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    encoded.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return encoded, {"n_users": len(uniques), "id_columns": id_columns}
+
+
+# -------------------------------------------------- 指标 -------------------------------------------------- #
+def _month_label(month):
+    return f"{month // 12}-{month % 12 + 1:02d}"
+
+
+def _user_months(part):
+    """
+    用户×月份 去重，按 (用户, 月份) 排序
+    :return: (用户编码数组, 相对月份数组, 起始月份, 月份跨度)
+    """
+    base = int(part["month"].min())
+    span = int(part["month"].max()) - base + 1
+    pairs = np.unique(part["user"].values.astype(np.int64) * span + (part["month"].values - base))
+    return pairs // span, pairs % span, base, span
+
+
+def repeat_stats(encoded, n_users):
+    """
+    各品牌复购指标（bincount 计数，无 Python 循环）
+    :return: DataFrame[品牌, 用户数, 复购用户数, 复购率, 跨月复购率]
+    """
+    rows = []
+    for brand_code, brand in enumerate(BRAND_SOURCES):
+        part = encoded[encoded["brand"] == brand_code]
+        counts = np.bincount(part["user"].values, minlength=n_users)
+        # 同一用户的不同购买月份数
+        months = np.bincount(_user_months(part)[0], minlength=n_users) if len(part) else counts
+        users = int(np.count_nonzero(counts))
+        rows.append({
+            "品牌": brand,
+            "用户数": users,
+            "复购用户数": int(np.count_nonzero(counts >= 2)),
+            "复购率": np.count_nonzero(counts >= 2) / users if users else 0.0,
+            "跨月复购率": np.count_nonzero(months >= 2) / users if users else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def brand_overlap(encoded, n_users):
+    """两个品牌的共同用户数与 Jaccard 重合度"""
+    present = [np.bincount(encoded.loc[encoded["brand"] == code, "user"].values, minlength=n_users) > 0
+               for code in range(len(BRAND_SOURCES))]
+    both = int(np.count_nonzero(present[0] & present[1]))
+    either = int(np.count_nonzero(present[0] | present[1]))
+    return {"共同用户数": both, "重合度": both / either if either else 0.0}
+
+
+def cohort_matrix(encoded, brand_code=0):
+    """
+    按首购月份划分的留存矩阵：行=首购月份，列=距首购的月数，值=当月仍有购买的用户占比
+    排序数组求每个用户的首购月份，bincount 一次性填充矩阵
+    """
+    part = encoded[encoded["brand"] == brand_code]
+    if part.empty:
+        return pd.DataFrame()
+    users, months, base, span = _user_months(part)
+
+    # 排序后每个用户的第一条即首购月份
+    starts = np.r_[True, users[1:] != users[:-1]]
+    first = months[starts][np.cumsum(starts) - 1]
+    age = months - first
+
+    counts = np.bincount(first * span + age, minlength=span * span).reshape(span, span)
+    cohort_sizes = counts[:, 0]
+    keep = cohort_sizes > 0
+    retention = counts[keep] / cohort_sizes[keep, None]
+    labels = [_month_label(base + m) for m in range(span)]
+    matrix = pd.DataFrame(retention, index=[labels[i] for i in np.flatnonzero(keep)], columns=range(span))
+    matrix.index.name = "首购月份"
+    matrix.columns.name = "距首购月数"
+    matrix.insert(0, "首购用户数", cohort_sizes[keep])
+    return matrix
+
+
+def customer_analytics():
+    """
+    复购与客群分析汇总
+    :return: dict(repeat, overlap, cohorts{品牌: 留存矩阵}, id_columns)
+    """
+    encoded, meta = encode_customers()
+    return {
+        "repeat": repeat_stats(encoded, meta["n_users"]),
+        "overlap": brand_overlap(encoded, meta["n_users"]),
+        "cohorts": {brand: cohort_matrix(encoded, code) for code, brand in enumerate(BRAND_SOURCES)},
+        "id_columns": meta["id_columns"],
+    }
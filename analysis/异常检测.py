@@ -0,0 +1,222 @@
+import os
+import json
+import math
+import functools
+import numpy as np
+import pandas as pd
+from analysis.共享数据集 import CACHE_DIR, data_version, file_lock, load_frame, temp_path
+
+ANOMALY_STATE_PATH = os.path.join(CACHE_DIR, "anomaly", "state.json")
+# 监控序列来自的数据集：数据版本变化（数据重新生成）时丢弃已持久化的状态
+ANOMALY_SOURCES = ('评论_真维斯_清洗后', 'reviews_uni_clean')
+
+# 大促日：单独维护基线，不计入日常基线
+PROMO_DAYS = {(11, 11), (12, 12), (6, 18), (1, 1), (3, 8)}
+
+
+def is_promo_day(date):
+    return (date.month, date.day) in PROMO_DAYS
+
+
+def _welford_update(stats, x):
+    """Welford 在线更新 [n, mean, m2]"""
+    stats[0] += 1
+    delta = x - stats[1]
+    stats[1] += delta / stats[0]
+    stats[2] += delta * (x - stats[1])
+
+
+def _welford_std(stats):
+    return math.sqrt(stats[2] / (stats[0] - 1)) if stats[0] >= 2 else 0.0
+
+
+class StreamingAnomalyDetector:
+    """
+    逐日在线异常检测：每条序列维护 EWMA 水平/方差、按星期的残差统计以及大促日统计，
+    每来一天只做 O(1) 更新；状态可序列化为 JSON 跨次运行持久化
+    """
+
+    def __init__(self, alpha=0.1, threshold=3.0, warmup=14, max_streak=3, max_history=500):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.max_streak = max_streak
+        self.max_history = max_history
+        self.states = {}
+        self.anomalies = {}
+
+    # -------------------------------------------------- 状态 -------------------------------------------------- #
+    @staticmethod
+    def _new_state():
+        return {
+            "last_date": None,
+            "n": 0,
+            "mean": 0.0,
+            "var": 0.0,
+            "streak": 0,
+            "weekday": [[0, 0.0, 0.0] for _ in range(7)],
+            "promo": [0, 0.0, 0.0],
+        }
+
+    def to_dict(self, version=None):
+        # 只持久化状态，参数始终以代码中的默认值为准
+        return {
+            "version": version,
+            "states": self.states,
+            "anomalies": self.anomalies,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        detector = cls()
+        detector.states = data["states"]
+        detector.anomalies = data["anomalies"]
+        return detector
+
+    def save(self, path=ANOMALY_STATE_PATH, version=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(version), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ANOMALY_STATE_PATH, version=None):
+        """读取持久化状态，不存在或数据版本不一致时返回新的检测器"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != version:
+            return cls()
+        return cls.from_dict(data)
+
+    # -------------------------------------------------- 检测 -------------------------------------------------- #
+    def _baseline(self, state, date):
+        """当天的期望值与标准差：大促日用大促统计，平日用 EWMA 水平 + 星期残差"""
+        promo = state["promo"]
+        if is_promo_day(date) and promo[0] >= 1:
+            return promo[1], _welford_std(promo) or math.sqrt(state["var"])
+        weekday = state["weekday"][date.weekday()]
+        expected = state["mean"] + (weekday[1] if weekday[0] > 0 else 0.0)
+        std = _welford_std(weekday) if weekday[0] >= 3 else math.sqrt(state["var"])
+        return expected, std
+
+    def update(self, key, date, count):
+        """
+        输入一天的计数，返回该天的检测结果并更新状态
+        :return: dict(date, count, expected, zscore, is_anomaly)
+        """
+        state = self.states.setdefault(key, self._new_state())
+        x = float(count)
+
+        if state["n"] == 0:
+            state["mean"] = x
+        expected, std = self._baseline(state, date)
+        std = max(std, 1.0)
+        zscore = (x - expected) / std
+        is_anomaly = state["n"] >= self.warmup and abs(zscore) > self.threshold
+
+        # 零星异常截断后再更新基线，避免单日尖峰污染后续判断；
+        # 连续超过 max_streak 天的异常视为水平变化，用原值更新让基线尽快跟上
+        state["streak"] = state["streak"] + 1 if is_anomaly else 0
+        if is_anomaly and state["streak"] <= self.max_streak:
+            x = min(max(x, expected - self.threshold * std), expected + self.threshold * std)
+        if is_promo_day(date):
+            _welford_update(state["promo"], x)
+        else:
+            diff = x - state["mean"]
+            _welford_update(state["weekday"][date.weekday()], diff)
+            increment = self.alpha * diff
+            state["mean"] += increment
+            state["var"] = (1 - self.alpha) * (state["var"] + diff * increment)
+        state["n"] += 1
+        state["last_date"] = date.strftime("%Y-%m-%d")
+
+        result = {"date": state["last_date"], "count": float(count), "expected": expected,
+                  "zscore": zscore, "is_anomaly": bool(is_anomaly)}
+        if is_anomaly:
+            history = self.anomalies.setdefault(key, [])
+            history.append(result)
+            del history[:-self.max_history]
+        return result
+
+    def update_series(self, key, daily_counts):
+        """只处理 last_date 之后的新日期，返回新检测结果列表"""
+        state = self.states.get(key)
+        if state and state["last_date"]:
+            daily_counts = daily_counts[daily_counts.index > pd.Timestamp(state["last_date"])]
+        dates = daily_counts.index.to_pydatetime()
+        return [self.update(key, date, count) for date, count in zip(dates, daily_counts.values.tolist())]
+
+    def anomaly_frame(self, key=None):
+        """已检测到的异常日 DataFrame"""
+        keys = [key] if key is not None else list(self.anomalies)
+        rows = [{"序列": k, **row} for k in keys for row in self.anomalies.get(k, [])]
+        df = pd.DataFrame(rows, columns=["序列", "date", "count", "expected", "zscore", "is_anomaly"])
+        df["date"] = pd.to_datetime(df["date"])
+        return df.drop(columns="is_anomaly")
+
+    def spike_flags(self, key, index):
+        """按日期返回 0/1 异常标记，供预测模型作为尖峰特征"""
+        dates = set(pd.to_datetime([row["date"] for row in self.anomalies.get(key, [])]))
+        return pd.Series([int(date in dates) for date in index], index=index)
+
+
+# -------------------------------------------------- 数据序列 -------------------------------------------------- #
+def _daily_counts(dates):
+    """日期列 → 补齐缺失日期的每日计数"""
+    dates = pd.to_datetime(dates).dropna().dt.normalize()
+    counts = dates.value_counts().sort_index()
+    return counts.asfreq('D', fill_value=0)
+
+
+@functools.lru_cache(maxsize=2)
+def _daily_count_series(version, top_items):
+    jw = load_frame('评论_真维斯_清洗后', columns=['_itemnumber_', 'rateDate'])
+    uq = load_frame('reviews_uni_clean', columns=['ratedate_dt'])
+    series = {'真维斯': _daily_counts(jw['rateDate']), '优衣库': _daily_counts(uq['ratedate_dt'])}
+
+    full_index = series['真维斯'].index
+    for item in jw['_itemnumber_'].value_counts().index[:top_items]:
+        counts = _daily_counts(jw.loc[jw['_itemnumber_'] == item, 'rateDate'])
+        series[f'真维斯:{item}'] = counts.reindex(full_index[full_index >= counts.index[0]], fill_value=0)
+    return series
+
+
+def daily_count_series(top_items=20):
+    """
+    需要监控的每日计数序列：两个品牌总量 + 真维斯评论最多的商品（按数据版本缓存，调用方不要修改）
+    :return: dict 序列名 -> 每日计数 Series
+    """
+    return _daily_count_series(data_version(*ANOMALY_SOURCES), top_items)
+
+
+def update_state(series, path=ANOMALY_STATE_PATH):
+    """
+    在文件锁内读取持久化状态、用新到的日期增量更新各序列，有新日期时才写回；
+    状态记录数据版本，数据重新生成后从头建立基线，旧的标记与基线不再沿用
+    :param series: dict 序列名 -> 每日计数 Series
+    :return: detector
+    """
+    version = data_version(*ANOMALY_SOURCES)
+    with file_lock(path):
+        detector = StreamingAnomalyDetector.load(path, version)
+        updated = [detector.update_series(key, daily) for key, daily in series.items()]
+        if any(updated):
+            detector.save(path, version)
+    return detector
+
+
+def spike_flags_for(key, daily_counts, path=ANOMALY_STATE_PATH):
+    """预测模型使用的尖峰标记：只把新到的日期喂给检测器，再按日期取标记"""
+    return update_state({key: daily_counts}, path).spike_flags(key, daily_counts.index)
+
+
+def refresh_anomalies(path=ANOMALY_STATE_PATH):
+    """
+    用新到的日期增量更新全部监控序列（序列按数据版本缓存，无新日期时不写状态文件）
+    :return: (detector, series)
+    """
+    series = daily_count_series()
+    return update_state(series, path), series
@@ -0,0 +1,98 @@
+import numpy as np
+
+# 叶子节点在 sklearn 树结构中的子节点标记
+TREE_LEAF = -1
+
+
+class FlatEnsemble:
+    """
+    展平的树集成模型：所有树的节点拼接成连续数组（特征、阈值、左右子节点、叶子值），
+    一批样本在全部树上逐层同时下行，单次调用开销远小于 sklearn 的 predict
+
+    与 sklearn 逐位一致：输入同样转为 float32 后与 float64 阈值比较（<= 走左子树），
+    各树结果按树的顺序依次累加（随机森林再除以树的棵数；梯度提升为 初始值 + 学习率 × 叶子值）
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, kind, scale=1.0, baseline=0.0,
+                 feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.kind = kind
+        self.scale = scale
+        self.baseline = baseline
+        self.feature_names = feature_names
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        由已训练的 RandomForestRegressor / GradientBoostingRegressor（单输出）构建
+        """
+        name = type(model).__name__
+        if name == "RandomForestRegressor":
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            kind, scale, baseline = "mean", 1.0, 0.0
+        elif name == "GradientBoostingRegressor":
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            kind, scale = "boost", float(model.learning_rate)
+            baseline = float(model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0])
+        else:
+            raise TypeError(f"不支持的模型类型: {name}，可选: RandomForestRegressor / GradientBoostingRegressor")
+
+        sizes = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        left, right = [], []
+        for tree, offset in zip(trees, offsets):
+            leaf = tree.children_left == TREE_LEAF
+            nodes = np.arange(tree.node_count) + offset
+            # 叶子节点指向自身，逐层下行到达叶子后保持不动
+            left.append(np.where(leaf, nodes, tree.children_left + offset))
+            right.append(np.where(leaf, nodes, tree.children_right + offset))
+
+        return cls(
+            feature=np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int64),
+            threshold=np.concatenate([tree.threshold for tree in trees]),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+            roots=offsets,
+            depth=max(tree.max_depth for tree in trees),
+            kind=kind,
+            scale=scale,
+            baseline=baseline,
+            feature_names=list(getattr(model, "feature_names_in_", [])) or None,
+        )
+
+    def _as_array(self, X):
+        if hasattr(X, "columns"):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            X = X.to_numpy()
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def leaves(self, X):
+        """每棵树上每个样本到达的叶子节点（全局编号），形状 (树数, 样本数)"""
+        X = self._as_array(X)
+        rows = np.arange(len(X))
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        values = self.value[self.leaves(X)]
+        if self.kind == "mean":
+            # 按树的顺序累加（cumsum 为顺序求和），与 sklearn 单线程累加一致
+            return np.cumsum(values, axis=0)[-1] / len(self.roots)
+        steps = np.vstack([np.full((1, values.shape[1]), self.baseline), self.scale * values])
+        return np.cumsum(steps, axis=0)[-1]
+
+
+def compile_ensemble(model):
+    """将 sklearn 树集成模型转换为展平的数组推理模型"""
+    return FlatEnsemble.from_sklearn(model)
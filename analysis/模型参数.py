@@ -0,0 +1,66 @@
+import os
+import json
+import copy
+from analysis.共享数据集 import CACHE_DIR, data_version, temp_path
+from analysis.特征库 import feature_schema
+
+# 各预测模型的默认配置（未调参时使用）
+DEFAULT_PARAMS = {
+    "short_term": {
+        "model": {"n_estimators": 300, "max_depth": 8, "min_samples_leaf": 3},
+        "features": {"n_lags": 7, "rolling_window": 7},
+    },
+    "long_term": {
+        "model": {"n_estimators": 50, "max_depth": 5, "learning_rate": 0.3},
+        "features": {"lags": [1, 3, 7], "volatility_window": 3},
+    },
+}
+
+TUNING_DIR = os.path.join(CACHE_DIR, "tuning")
+# 调参使用的数据集
+TUNING_DATASET = "评论_真维斯_清洗后"
+
+
+def tuning_result_path(kind):
+    """调参结果文件路径"""
+    return os.path.join(TUNING_DIR, f"{kind}.json")
+
+
+def load_tuning_result(kind):
+    """读取已保存的调参结果，不存在时返回 None"""
+    path = tuning_result_path(kind)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_tuning_result(kind, result):
+    """保存调参结果（先写临时文件再替换，避免页面读到半成品）"""
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    path = tuning_result_path(kind)
+    tmp_path = temp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def tuning_key(kind):
+    """调参结果的有效性标识：数据版本 + 特征列结构"""
+    return {"data_version": data_version(TUNING_DATASET), "feature_schema": feature_schema(kind)}
+
+
+def load_best_params(kind):
+    """
+    返回模型的最佳配置 {"model": {...}, "features": {...}}
+    有与当前数据版本、特征列结构一致的调参结果时使用调参得到的最佳配置，否则使用默认配置
+    """
+    if kind not in DEFAULT_PARAMS:
+        raise KeyError(f"未知模型类型: {kind}，可选: {list(DEFAULT_PARAMS)}")
+    params = copy.deepcopy(DEFAULT_PARAMS[kind])
+    result = load_tuning_result(kind)
+    current = tuning_key(kind)
+    if result and "best_params" in result and all(result.get(k) == v for k, v in current.items()):
+        params["model"].update(result["best_params"].get("model", {}))
+        params["features"].update(result["best_params"].get("features", {}))
+    return params
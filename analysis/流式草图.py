@@ -0,0 +1,269 @@
+import os
+import glob
+import math
+import pickle
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from analysis.共享数据集 import CACHE_DIR, PARTITIONED_DATASETS, partition_fingerprint, window_files, temp_path
+
+SKETCH_DIR = os.path.join(CACHE_DIR, "sketch")
+
+
+def hash64(values):
+    """值 → 64 位哈希（向量化、跨进程稳定），统一按字符串哈希"""
+    values = pd.Series(values, dtype=object).astype(str)
+    return pd.util.hash_pandas_object(values, index=False).values.astype(np.uint64)
+
+
+def _bit_length(x):
+    """uint64 数组逐元素的二进制位数（0 的位数为 0）"""
+    x = x.astype(np.uint64)
+    high = (x >> np.uint64(32)).astype(np.float64)
+    low = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+# -------------------------------------------------- 高频项 -------------------------------------------------- #
+class SpaceSaving:
+    """
+    Space-Saving 高频项草图：最多保留 capacity 个计数器，内存有界
+    每项估计值满足 真实值 ∈ [count - error, count]，且 error ≤ total / capacity；可与同容量草图合并
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def update(self, item, count=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # 替换计数最小的计数器，新项继承其计数作为误差上界
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            self.errors.pop(victim)
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+
+    def update_counts(self, counts):
+        """批量更新：counts 为 项 -> 次数（Counter / dict / Series），按次数从高到低写入以减少替换"""
+        for item, count in sorted(dict(counts).items(), key=lambda kv: -kv[1]):
+            self.update(item, int(count))
+        return self
+
+    def _floor(self):
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """合并两个草图（可交换、可结合），返回新草图"""
+        floor_a, floor_b = self._floor(), other._floor()
+        merged = SpaceSaving(self.capacity)
+        merged.total = self.total + other.total
+        items = set(self.counts) | set(other.counts)
+        counts = {item: self.counts.get(item, floor_a) + other.counts.get(item, floor_b) for item in items}
+        errors = {item: self.errors.get(item, floor_a) + other.errors.get(item, floor_b) for item in items}
+        for item in sorted(counts, key=lambda k: -counts[k])[:self.capacity]:
+            merged.counts[item] = counts[item]
+            merged.errors[item] = errors[item]
+        return merged
+
+    def error_bound(self):
+        """任意项计数的最大高估量"""
+        return self.total / self.capacity
+
+    def top(self, n=10):
+        """
+        估计的前 n 个高频项
+        :return: DataFrame(item, count, error, guaranteed)，guaranteed 表示该项确定属于真实前 n
+        """
+        ranked = sorted(self.counts, key=lambda k: -self.counts[k])
+        rows = [{"item": item, "count": self.counts[item], "error": self.errors[item]} for item in ranked[:n]]
+        df = pd.DataFrame(rows, columns=["item", "count", "error"])
+        next_count = self.counts[ranked[n]] if len(ranked) > n else self._floor()
+        df["guaranteed"] = (df["count"] - df["error"]) >= next_count
+        return df
+
+
+class CountMinSketch:
+    """
+    Count-Min 频次草图：depth × width 计数表，任意项的估计值只高估，
+    以 1 - delta 的概率满足 高估量 ≤ epsilon × total；同参数草图逐元素相加即可合并
+    """
+
+    def __init__(self, width=2719, depth=5):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon=0.001, delta=0.01):
+        return cls(width=int(math.ceil(math.e / epsilon)), depth=int(math.ceil(math.log(1 / delta))))
+
+    def _columns(self, values):
+        """双重哈希生成每行的列号"""
+        h = hash64(values)
+        h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, values, counts=None):
+        """批量加入项（counts 为对应次数，默认每项 1 次）"""
+        counts = np.ones(len(values), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        columns = self._columns(values)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+        self.total += int(counts.sum())
+        return self
+
+    def estimate(self, values):
+        columns = self._columns(values)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other):
+        if self.table.shape != other.table.shape:
+            raise ValueError("Count-Min 草图参数不一致，无法合并")
+        merged = CountMinSketch(self.width, self.depth)
+        merged.table = self.table + other.table
+        merged.total = self.total + other.total
+        return merged
+
+    def error_bound(self):
+        """以 1 - e^-depth 的概率成立的最大高估量"""
+        return math.e / self.width * self.total
+
+
+# -------------------------------------------------- 基数估计 -------------------------------------------------- #
+class HyperLogLog:
+    """
+    HyperLogLog 去重计数：2^p 个寄存器（p=12 时 4KB），相对标准误差约 1.04 / sqrt(2^p)；
+    寄存器逐元素取最大值即可合并
+    """
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype=np.uint8)
+
+    def add(self, values):
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        h = hash64(values)
+        index = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if self.p != other.p:
+            raise ValueError("HyperLogLog 精度不一致，无法合并")
+        merged = HyperLogLog(self.p)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # 小基数线性计数修正
+        return estimate
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+# -------------------------------------------------- 评论草图 -------------------------------------------------- #
+# 各评论数据集建草图所用的列：商品、用户、SKU 文本
+SKETCH_COLUMNS = {
+    "评论_真维斯_清洗后": {"item": "_itemnumber_", "user": "displayUserNick", "sku": "auctionSku"},
+    "reviews_uni_clean": {"item": "_itemnumber_", "user": "displayusernick", "sku": "attr_sku"},
+}
+ITEM_CAPACITY = 200
+SKU_CAPACITY = 100
+# 草图缓存格式版本：草图种类或参数变化时递增，旧格式的缓存文件随之清理
+SKETCH_FORMAT = 2
+
+
+def _item_keys(values):
+    """商品编号统一为整数字符串（优衣库编号读入为浮点）"""
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_float_dtype(values):
+        values = values.astype("int64")
+    return values.astype(str)
+
+
+def _sku_counts(name, sku):
+    """按对比分析页的规则从 SKU 文本提取颜色、尺码计数"""
+    from analysis.真维斯优衣库对比分析 import BrandSalesAnalyzer
+    if name == "评论_真维斯_清洗后":
+        return BrandSalesAnalyzer._extract_color_size(sku)
+    return BrandSalesAnalyzer.extract_color_size(sku)
+
+
+def build_sketches(name, df):
+    """由一个数据分片构建全部草图"""
+    columns = SKETCH_COLUMNS[name]
+    items = _item_keys(df[columns["item"]])
+    colors, sizes = _sku_counts(name, df[columns["sku"]])
+    return {
+        "item": SpaceSaving(ITEM_CAPACITY).update_counts(items.value_counts()),
+        "item_freq": CountMinSketch().add(items.values),
+        "items": HyperLogLog().add(items),
+        "users": HyperLogLog().add(df[columns["user"]]),
+        "color": SpaceSaving(SKU_CAPACITY).update_counts(colors),
+        "size": SpaceSaving(SKU_CAPACITY).update_counts(sizes),
+    }
+
+
+def merge_sketches(a, b):
+    return {key: a[key].merge(b[key]) for key in a}
+
+
+def partition_sketches(name, path):
+    """
+    单个月份分区的草图：按分区指纹缓存，分区内容不变时直接读取缓存，不重新扫描评论；
+    写入新缓存时删除该月份旧指纹、旧格式的缓存文件
+    """
+    month = os.path.basename(os.path.dirname(path))
+    cache_path = os.path.join(SKETCH_DIR, name, f"{month}.{partition_fingerprint(path)}.v{SKETCH_FORMAT}.pkl")
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    sketches = build_sketches(name, pq.read_table(path, columns=list(SKETCH_COLUMNS[name].values())).to_pandas())
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = temp_path(cache_path)
+    with open(tmp_path, "wb") as f:
+        pickle.dump(sketches, f)
+    os.replace(tmp_path, cache_path)
+    for old in glob.glob(os.path.join(SKETCH_DIR, name, f"{month}.*.pkl")):
+        if old != cache_path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return sketches
+
+
+def dataset_sketches(name, start=None, end=None):
+    """
+    评论数据集（可限定日期窗口所含月份）的合并草图
+    :return: dict item / color / size -> SpaceSaving，item_freq -> CountMinSketch，items / users -> HyperLogLog
+    """
+    if name not in PARTITIONED_DATASETS:
+        raise KeyError(f"未分区的数据集: {name}，可选: {list(PARTITIONED_DATASETS)}")
+    merged = None
+    for path in window_files(name, start, end):
+        sketches = partition_sketches(name, path)
+        merged = sketches if merged is None else merge_sketches(merged, sketches)
+    return merged
@@ -0,0 +1,169 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from analysis.共享数据集 import CACHE_DIR, load_frame, temp_path
+from analysis.零售日历 import calendar_lookup
+
+FEATURE_DIR = os.path.join(CACHE_DIR, "features")
+
+# 物化的滞后阶数与滚动窗口，覆盖各预测模型及调参搜索空间用到的全部特征
+MAX_LAG = 14
+WINDOWS = (3, 7, 14)
+# 增量计算新一天特征所需保留的历史尾部长度
+TAIL = max(MAX_LAG, max(WINDOWS))
+
+# 各模型使用的零售日历列（查表得到，不物化到特征表）
+SHORT_TERM_CALENDAR = ['dayofweek', 'weekend', 'month', 'double11', 'double12', 'newyear',
+                       'presale', 'aftersale', 'days_to_event', 'spring_festival_pre']
+LONG_TERM_CALENDAR = ['event_day', 'presale', 'aftersale', 'days_to_event']
+
+# 各模型训练矩阵的列结构（{w}、{k} 为特征配置中的窗口与滞后阶数）
+FEATURE_LAYOUTS = {
+    "short_term": SHORT_TERM_CALENDAR + ['{w}day_avg', '{w}day_std', 'lag_{k}'],
+    "long_term": ['day_volatility', 'lag{k}', 'spike_indicator'] + LONG_TERM_CALENDAR,
+}
+
+# 各品牌评论日期列
+DATE_COLUMNS = {
+    "真维斯": ("评论_真维斯_清洗后", "rateDate"),
+    "优衣库": ("reviews_uni_clean", "ratedate_dt"),
+}
+
+
+def brand_daily_series(brand="真维斯"):
+    """品牌每日评论数（近似销量），补齐缺失日期"""
+    dataset, column = DATE_COLUMNS[brand]
+    dates = pd.to_datetime(load_frame(dataset, columns=[column])[column]).dropna()
+    daily = dates.dt.normalize().value_counts().sort_index()
+    return daily.asfreq('D', fill_value=0).astype(float)
+
+
+def feature_schema(kind):
+    """训练矩阵列结构的标识，列结构变化后按旧结构得到的调参结果失效"""
+    return hashlib.sha1(repr(FEATURE_LAYOUTS[kind]).encode("utf-8")).hexdigest()[:12]
+
+
+def calendar_features(index, columns=SHORT_TERM_CALENDAR):
+    """日历特征：星期、周末、月份、大促日及预售/售后期、距事件天数，从预计算的零售日历一次查表"""
+    return calendar_lookup(index, columns)
+
+
+def _window_features(values, index):
+    """
+    对 values（历史尾部 + 新日期）计算滞后与滚动特征，只返回最后 len(index) 行
+    """
+    n_new = len(index)
+    s = pd.Series(values, dtype=float)
+    features = {'value': s.values[-n_new:]}
+    for i in range(1, MAX_LAG + 1):
+        features[f'lag_{i}'] = s.shift(i).values[-n_new:]
+    for w in WINDOWS:
+        rolling = s.rolling(w)
+        features[f'mean_{w}'] = rolling.mean().values[-n_new:]
+        features[f'std_{w}'] = rolling.std().values[-n_new:]
+    return pd.DataFrame(features, index=index)
+
+
+class FeatureStore:
+    """
+    时间序列特征库：按序列物化每日特征（滞后、滚动均值/标准差；日历特征训练时查表），
+    新日期到来时只基于最近 TAIL 天的历史增量计算新行，刷新成本 O(新增天数)
+    """
+
+    def __init__(self, directory=FEATURE_DIR):
+        self.directory = directory
+        self._frames = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key.replace(':', '_')}.parquet")
+
+    def load(self, key):
+        """读取已物化的特征表，不存在时返回 None"""
+        if key not in self._frames:
+            path = self._path(key)
+            self._frames[key] = pd.read_parquet(path) if os.path.exists(path) else None
+        return self._frames[key]
+
+    def _save(self, key, frame):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = temp_path(path)
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._frames[key] = frame
+
+    def update(self, key, daily_counts):
+        """
+        用每日计数序列增量更新特征表
+        已物化部分的尾部与新序列一致时只追加新日期；历史被修订或日期不连续时整体重建
+        """
+        daily_counts = daily_counts.astype(float)
+        frame = self.load(key)
+        if frame is not None and len(frame):
+            tail = frame['value'].iloc[-TAIL:]
+            overlap = daily_counts.reindex(tail.index)
+            new = daily_counts[daily_counts.index > frame.index[-1]]
+            contiguous = new.empty or new.index[0] == frame.index[-1] + pd.Timedelta(days=1)
+            if np.array_equal(overlap.values, tail.values) and contiguous:
+                if new.empty:
+                    return frame
+                rows = _window_features(np.concatenate([tail.values, new.values]), new.index)
+                frame = pd.concat([frame, rows])
+                self._save(key, frame)
+                return frame
+
+        frame = _window_features(daily_counts.values, daily_counts.index)
+        self._save(key, frame)
+        return frame
+
+    def refresh(self, brand="真维斯"):
+        """读取品牌最新每日序列并增量更新"""
+        return self.update(brand, brand_daily_series(brand))
+
+
+# -------------------------------------------------- 训练矩阵 -------------------------------------------------- #
+def short_term_matrix(frame, start_date, end_date, n_lags=7, rolling_window=7):
+    """短期树模型的训练矩阵：日历列 + 滚动均值/标准差 + 滞后（列结构见 FEATURE_LAYOUTS）"""
+    rows = frame.loc[start_date:end_date]
+    X = calendar_features(rows.index)
+    X[f'{rolling_window}day_avg'] = rows[f'mean_{rolling_window}']
+    X[f'{rolling_window}day_std'] = rows[f'std_{rolling_window}']
+    for i in range(1, n_lags + 1):
+        X[f'lag_{i}'] = rows[f'lag_{i}']
+    X = X.dropna()
+    return X, rows.loc[X.index, 'value'].rename('comments')
+
+
+def long_term_matrix(frame, lags=(1, 3, 7), volatility_window=3, spikes=None):
+    """长期梯度提升模型的特征矩阵：波动、滞后、尖峰标记 + 日历列（列结构见 FEATURE_LAYOUTS）"""
+    X = pd.DataFrame({'day_volatility': frame[f'std_{volatility_window}'].fillna(0) * 2}, index=frame.index)
+    for lag in lags:
+        X[f'lag{lag}'] = frame[f'lag_{lag}'].fillna(0)
+    if spikes is None:
+        value = frame['value']
+        spikes = (value.diff().abs() > value.mean()).astype(int)
+    X['spike_indicator'] = spikes.reindex(frame.index, fill_value=0).shift(1).fillna(0)
+    X = pd.concat([X, calendar_features(frame.index, LONG_TERM_CALENDAR)], axis=1)
+    return X, frame['value'].rename('comments')
+
+
+# -------------------------------------------------- 未来特征 -------------------------------------------------- #
+def short_term_step(date, recent, n_lags=7, rolling_window=7, calendar=None):
+    """
+    逐日滚动预测时某一天的特征（recent 为截至前一天的 历史 + 已预测 值）
+    统计口径与训练特征一致（滚动标准差 ddof=1）
+    :param calendar: 该日的日历特征 dict；整段预测时先对全部日期一次查表再逐日传入
+    """
+    row = dict(calendar) if calendar is not None else calendar_features([date]).iloc[0].to_dict()
+    window = np.asarray(recent[-rolling_window:], dtype=float)
+    row[f'{rolling_window}day_avg'] = window.mean()
+    row[f'{rolling_window}day_std'] = window.std(ddof=1)
+    for i in range(1, n_lags + 1):
+        row[f'lag_{i}'] = recent[-i] if i <= len(recent) else 0
+    return row
+
+
+def lag_step(recent, lags):
+    """逐日滚动预测时的滞后特征 {'lag{k}': recent[-k]}"""
+    return {f'lag{lag}': recent[-lag] for lag in lags}
@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
+from analysis.共享数据集 import load_window
+from analysis.零售日历 import calendar_lookup
 
 def predict_sales_11():
     """
     预测2016年11月每日销售数量
     """
-    # 读取Excel文件
-    df = pd.read_excel('data/评论_真维斯_清洗后.xlsx')
+    # 只读取2014年11月和2015年11月两个月份分区（只取日期列）
+    df = pd.concat([load_window('评论_真维斯_清洗后', f'{year}-11-01', f'{year}-11-30 23:59:59', columns=['rateDate'])
+                    for year in (2014, 2015)], ignore_index=True)
     
     # 检查rateDate是否已经是datetime格式
     if not pd.api.types.is_datetime64_any_dtype(df['rateDate']):
@@ -62,10 +65,16 @@ def predict_sales_11():
     days = range(1, 31)
     daily_pred = pd.Series(daily_2016, index=days).reindex(days, fill_value=0)
     
-    # 结果整理
+    # 结果整理：大促阶段（预售 / 大促当天 / 售后）与周末标记从零售日历一次查表
+    calendar = calendar_lookup(pd.date_range('2016-11-01', periods=len(days)),
+                               ['double11', 'double11_pre', 'double11_post', 'weekend'])
+    phase = np.select([calendar['double11'] == 1, calendar['double11_pre'] == 1, calendar['double11_post'] == 1],
+                      ['大促当天', '预售期', '售后期'], default='日常')
     result = pd.DataFrame({
         '日期': [f"2016-11-{day:02d}" for day in days],
-        '预测销量': daily_pred.values
+        '预测销量': daily_pred.values,
+        '大促阶段': phase,
+        '周末': calendar['weekend'].values.astype(bool)
     })
     
     return days, daily_pred, result
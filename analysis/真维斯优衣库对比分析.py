@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
 from collections import Counter
 import re
+from analysis.共享数据集 import load_frame, resolve_dataset
+from analysis.价格分层 import estimate_price, compute_revenue
 
 
 class BrandSalesAnalyzer:
@@ -9,9 +12,11 @@ class BrandSalesAnalyzer:
     # -------------------------------------------------- 初始化 -------------------------------------------------- #
     def __init__(self, jeanswest_reviews_path, uniqlo_reviews_path, jeanswest_sales_path):
         # 载入数据
-        self.jeanswest_reviews = pd.read_excel(jeanswest_reviews_path)
-        self.uniqlo_reviews = pd.read_excel(uniqlo_reviews_path)
-        self.jeanswest_sales = pd.read_excel(jeanswest_sales_path)
+        self.jeanswest_reviews = self._read_table(jeanswest_reviews_path)
+        self.uniqlo_reviews = self._read_table(uniqlo_reviews_path)
+        self.jeanswest_sales = self._read_table(jeanswest_sales_path)
+        # 评论数据对应的共享数据集名称（近似统计模式按名称读取草图）
+        self.dataset_names = (resolve_dataset(jeanswest_reviews_path), resolve_dataset(uniqlo_reviews_path))
 
         # 统一列名：去除空格/引号并转小写
         self._clean_cols(self.jeanswest_reviews)
@@ -23,7 +28,8 @@ class BrandSalesAnalyzer:
         self._ensure_itemnumber_column(self.jeanswest_sales, source_col="_itemnumber_")
 
 
-    def extract_color_size(self, series):
+    @staticmethod
+    def extract_color_size(series):
         """
         兼容两种格式：
         · 颜色:酒红; 尺码:M
@@ -60,6 +66,23 @@ class BrandSalesAnalyzer:
 
 
     # --------------------------------------------- 内部工具 -------------------------------------------------- #
+    @staticmethod
+    def _read_table(path):
+        """已发布的共享数据集走内存映射读取，其余文件按 Excel 读取"""
+        name = resolve_dataset(path)
+        if name is not None:
+            return load_frame(name)
+        return pd.read_excel(path)
+
+
+    def _sketches(self):
+        """两个品牌评论的合并草图（真维斯, 优衣库），按月份分区缓存，不重新扫描评论"""
+        if None in self.dataset_names:
+            raise ValueError("近似统计只支持共享数据集中的评论文件")
+        from analysis.流式草图 import dataset_sketches
+        return [dataset_sketches(name) for name in self.dataset_names]
+
+
     @staticmethod
     def _clean_cols(df):
         """将列名统一小写，并去掉首尾空格及引号"""
@@ -102,17 +125,24 @@ class BrandSalesAnalyzer:
 
 
     # -------------------------------------------------- 汇总 -------------------------------------------------- #
-    def compare_total_sales(self, price_assumption=145):
-        """返回两个品牌的销售量与销售额汇总 DataFrame"""
+    def compare_total_sales(self, price_assumption=None, tiers=None):
+        """
+        返回两个品牌的销售量与销售额汇总 DataFrame
+        :param price_assumption: 优衣库统一单价；为 None 时按价格分层规则估计
+        :param tiers: 自定义价格分层方案，结构同 价格分层.PRICE_TIERS
+        """
         self._ensure_itemnumber_column(self.uniqlo_reviews)  # 再次确保
         uq_summary = self.uniqlo_reviews["itemnumber"].value_counts().reset_index()
         uq_summary.columns = ["itemnumber", "comment_count"]
-        uq_summary["estimated_price_by_sales"] = uq_summary["comment_count"] * price_assumption
+        if price_assumption is None:
+            uq_summary["estimated_price_by_sales"] = estimate_price(uq_summary["comment_count"], "优衣库", tiers=tiers)
+        else:
+            uq_summary["estimated_price_by_sales"] = price_assumption
 
         jw_total_sales = self.jeanswest_sales["comment_count"].sum()
-        jw_total_revenue = (self.jeanswest_sales["comment_count"] * self.jeanswest_sales["estimated_price_by_sales"]).sum()
+        jw_total_revenue = compute_revenue(self.jeanswest_sales["comment_count"], "真维斯", tiers=tiers).sum()
         uq_total_sales = uq_summary["comment_count"].sum()
-        uq_total_revenue = uq_summary["estimated_price_by_sales"].sum()
+        uq_total_revenue = (uq_summary["comment_count"] * uq_summary["estimated_price_by_sales"]).sum()
 
         return pd.DataFrame({
             "品牌": ["真维斯", "优衣库"],
@@ -122,9 +152,14 @@ class BrandSalesAnalyzer:
 
 
     def get_monthly_trends_data(self):
-        self.preprocess()
-        jw_monthly = self.jeanswest_reviews["ratedate"].dt.to_period("M").value_counts().sort_index()
-        uq_monthly = self.uniqlo_reviews["ratedate_dt"].dt.to_period("M").value_counts().sort_index()
+        if None not in self.dataset_names:
+            # 共享数据集按月份分片 map-reduce 计数
+            from analysis.分片聚合 import monthly_counts
+            jw_monthly, uq_monthly = (monthly_counts(name) for name in self.dataset_names)
+        else:
+            self.preprocess()
+            jw_monthly = self.jeanswest_reviews["ratedate"].dt.to_period("M").value_counts().sort_index()
+            uq_monthly = self.uniqlo_reviews["ratedate_dt"].dt.to_period("M").value_counts().sort_index()
         all_months = sorted(set(jw_monthly.index).union(uq_monthly.index))
         jw_monthly = jw_monthly.reindex(all_months, fill_value=0)
         uq_monthly = uq_monthly.reindex(all_months, fill_value=0)
@@ -132,7 +167,16 @@ class BrandSalesAnalyzer:
         return jw_monthly.index.to_timestamp(), jw_monthly.values, uq_monthly.values
 
 
-    def get_top_items_data(self, top_n=10):
+    def get_top_items_data(self, top_n=10, approx=False):
+        if approx:
+            # Space-Saving 选出候选高频商品；两种草图的计数都只高估，取 Count-Min 估计与其中较小者
+            result = []
+            for sketches in self._sketches():
+                top = sketches["item"].top(top_n)
+                counts = np.minimum(top["count"].values, sketches["item_freq"].estimate(top["item"].values))
+                result += [top["item"], pd.Series(counts, index=top.index)]
+            return tuple(result)
+
         self._ensure_itemnumber_column(self.uniqlo_reviews)
         uq_summary = self.uniqlo_reviews["itemnumber"].value_counts().reset_index()
         uq_summary.columns = ["itemnumber", "comment_count"]
@@ -154,7 +198,50 @@ class BrandSalesAnalyzer:
         return levels, jw.values, uq.values
 
 
-    def get_sku_distributions_data(self):
+    def get_distinct_counts(self, approx=False):
+        """
+        两个品牌的不同商品数与不同用户数
+        :param approx: True 时用 HyperLogLog 估计，并给出相对标准误差
+        """
+        if approx:
+            sketches = self._sketches()
+            items = [round(s["items"].count()) for s in sketches]
+            users = [round(s["users"].count()) for s in sketches]
+            error = sketches[0]["items"].relative_error()
+        else:
+            items = [df["itemnumber" if "itemnumber" in df.columns else "_itemnumber_"].nunique()
+                     for df in (self.jeanswest_reviews, self.uniqlo_reviews)]
+            users = [df["displayusernick"].nunique() for df in (self.jeanswest_reviews, self.uniqlo_reviews)]
+            error = 0.0
+        return pd.DataFrame({"品牌": ["真维斯", "优衣库"], "商品数": items, "用户数": users, "相对误差": error})
+
+
+    def get_comparison_intervals(self, tiers=None):
+        """
+        各对比指标的自助法置信区间（按计数内容缓存）
+        :return: dict monthly / satisfaction / total_sales -> DataFrame
+        """
+        from analysis.自助法置信区间 import monthly_intervals, satisfaction_intervals, total_sales_intervals
+        months, jw_monthly, uq_monthly = self.get_monthly_trends_data()
+        levels, jw_levels, uq_levels = self.get_satisfaction_distribution_data()
+        self._ensure_itemnumber_column(self.uniqlo_reviews)
+        return {
+            "monthly": monthly_intervals(months, jw_monthly, uq_monthly),
+            "satisfaction": satisfaction_intervals(levels, jw_levels, uq_levels),
+            "total_sales": total_sales_intervals(self.jeanswest_sales["comment_count"].values,
+                                                 self.uniqlo_reviews["itemnumber"].value_counts().values, tiers),
+        }
+
+
+    def get_sku_distributions_data(self, approx=False):
+        if approx:
+            jw_sketches, uq_sketches = self._sketches()
+            return tuple(
+                dict(zip(top["item"], top["count"]))
+                for top in (jw_sketches["color"].top(10), uq_sketches["color"].top(10),
+                            jw_sketches["size"].top(10), uq_sketches["size"].top(10))
+            )
+
         colors_j, sizes_j = self._extract_color_size(self.jeanswest_reviews.get("auctionsku", pd.Series(dtype=str)))
         colors_u, sizes_u = self.extract_color_size(self.uniqlo_reviews.get("attr_sku", pd.Series(dtype=str)))
 
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import CACHE_DIR, load_frame, data_version, temp_path
+from analysis.统计预测基线 import forecast_many
+from analysis.真维斯颜色方面统计 import extract_unified_color
+
+ITEM_FORECAST_DIR = os.path.join(CACHE_DIR, "item_forecast")
+
+
+def build_item_color_matrix(end_date='2016-01-31'):
+    """
+    一次性构建 (商品, 颜色) × 日期 的每日评论数矩阵
+    :return: (keys, dates, matrix)，keys 为 (商品编号, 颜色) MultiIndex，matrix 形状为 (len(keys), len(dates))
+    """
+    # 缺失商品编号的评论无法归属到序列（groupby 编码为 -1，bincount 不接受负数），先去掉
+    df = load_frame('评论_真维斯_清洗后', columns=['_itemnumber_', 'rateDate', 'auctionSku']).dropna(subset=['_itemnumber_'])
+    days = pd.to_datetime(df['rateDate']).dt.normalize()
+    mask = (days <= pd.Timestamp(end_date)).values
+    df, days = df[mask], days[mask]
+
+    # 颜色只对去重后的 SKU 文本解析一次
+    sku_codes, sku_uniques = pd.factorize(df['auctionSku'])
+    sku_colors = np.array([extract_unified_color(sku) for sku in sku_uniques] + ['未知颜色'], dtype=object)
+    colors = sku_colors[sku_codes]  # 缺失 SKU 的编码为 -1，对应末尾的 '未知颜色'
+
+    keys_df = pd.DataFrame({'商品编号': df['_itemnumber_'].values, '颜色': colors})
+    key_codes = keys_df.groupby(['商品编号', '颜色'], sort=True).ngroup().values
+    keys = pd.MultiIndex.from_frame(keys_df.drop_duplicates().sort_values(['商品编号', '颜色']))
+
+    dates = pd.date_range(days.min(), end_date)
+    day_codes = (days.values - dates[0].to_datetime64()) // np.timedelta64(1, 'D')
+    matrix = np.bincount(
+        key_codes * len(dates) + day_codes, minlength=len(keys) * len(dates)
+    ).reshape(len(keys), len(dates)).astype(float)
+    return keys, dates, matrix
+
+
+def _forecast_batch(task):
+    """进程池任务：对一批序列做向量化预测"""
+    Y, horizon, method = task
+    return forecast_many(Y, horizon, method)
+
+
+def forecast_matrix(Y, horizon, method, batch_size=2000, workers=None):
+    """按批次并行预测多条序列，批量不足一批时在当前进程内完成"""
+    if len(Y) <= batch_size:
+        return _forecast_batch((Y, horizon, method))
+    tasks = [(Y[i:i + batch_size], horizon, method) for i in range(0, len(Y), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return np.vstack(list(pool.map(_forecast_batch, tasks)))
+
+
+def reconcile(child_fc, parent_fc, parent_index, child_hist):
+    """
+    自上而下按比例调和：使同一父节点下子节点的预测之和等于父节点预测
+    子节点预测之和为 0 时按历史销量占比分配（历史也为 0 时均分）
+    :param child_fc: (子节点数, h) 子节点预测
+    :param parent_fc: (父节点数, h) 父节点预测
+    :param parent_index: (子节点数,) 每个子节点所属父节点的位置
+    :param child_hist: (子节点数,) 子节点历史总销量
+    """
+    n_parent = len(parent_fc)
+    child_sum = np.zeros_like(parent_fc)
+    np.add.at(child_sum, parent_index, child_fc)
+
+    hist_total = np.bincount(parent_index, weights=child_hist, minlength=n_parent)
+    n_children = np.bincount(parent_index, minlength=n_parent)
+    hist_share = np.where(
+        hist_total[parent_index] > 0,
+        child_hist / np.where(hist_total > 0, hist_total, 1)[parent_index],
+        1 / n_children[parent_index]
+    )
+
+    denom = child_sum[parent_index]
+    share = np.where(denom > 0, child_fc / np.where(denom > 0, denom, 1), hist_share[:, np.newaxis])
+    return share * parent_fc[parent_index]
+
+
+def forecast_items(method='croston', horizon=30, end_date='2016-01-31', workers=None):
+    """
+    品牌 → 商品 → 商品×颜色 三层预测，并调和使各层预测逐级相加一致
+    结果按数据版本缓存到磁盘，多会话/多进程共享
+    :return: dict，包含 dates、total、item、item_color（预测）及 item_history、item_color_history（历史）
+    """
+    version = data_version('评论_真维斯_清洗后')
+    cache_path = os.path.join(ITEM_FORECAST_DIR, f"{version}_{method}_{horizon}_{end_date}.pkl")
+    if os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+
+    keys, dates, ic_matrix = build_item_color_matrix(end_date)
+    item_codes, items = pd.factorize(keys.get_level_values('商品编号'), sort=True)
+    item_matrix = np.zeros((len(items), len(dates)))
+    np.add.at(item_matrix, item_codes, ic_matrix)
+    total = item_matrix.sum(axis=0)
+
+    # 各层独立预测
+    total_fc = forecast_many(total, horizon, method)
+    item_fc = forecast_matrix(item_matrix, horizon, method, workers=workers)
+    ic_fc = forecast_matrix(ic_matrix, horizon, method, workers=workers)
+
+    # 自上而下调和：商品之和 = 品牌总量，颜色之和 = 商品
+    item_fc = reconcile(item_fc, total_fc, np.zeros(len(items), dtype=int), item_matrix.sum(axis=1))
+    ic_fc = reconcile(ic_fc, item_fc, item_codes, ic_matrix.sum(axis=1))
+
+    future_dates = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon)
+    item_index = pd.Index(items, name='商品编号')
+    result = {
+        'dates': future_dates,
+        'total': pd.Series(total_fc[0], index=future_dates),
+        'item': pd.DataFrame(item_fc, index=item_index, columns=future_dates),
+        'item_color': pd.DataFrame(ic_fc, index=keys, columns=future_dates),
+        'item_history': pd.DataFrame(item_matrix, index=item_index, columns=dates),
+        'item_color_history': pd.DataFrame(ic_matrix, index=keys, columns=dates),
+    }
+
+    os.makedirs(ITEM_FORECAST_DIR, exist_ok=True)
+    tmp_path = temp_path(cache_path)
+    pd.to_pickle(result, tmp_path)
+    os.replace(tmp_path, cache_path)
+    return result
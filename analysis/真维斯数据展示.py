@@ -1,22 +1,24 @@
 import pandas as pd
 import streamlit as st
+from analysis.共享数据集 import load_frame
+from analysis.价格分层 import compute_revenue
+from analysis.聚合连接 import aggregate_join
 
-@st.cache_data  
+@st.cache_resource(show_spinner=False)
 def load_and_process_data():
-    """加载并处理数据，返回销售量和销售额数据"""
+    """加载并处理数据，返回销售量和销售额数据（st.cache_resource 缓存，各会话共享同一对象，调用方不要原地修改）"""
     # 读取数据
-    df_sales = pd.read_excel("data/真维斯_商品销售统计.xlsx")
-    df_reviews = pd.read_excel("data/评论_真维斯_清洗后.xlsx")
+    df_sales = load_frame("真维斯_商品销售统计")
+    df_reviews = load_frame("评论_真维斯_清洗后", columns=["_itemnumber_"])
     
     # 计算销售总额
-    df_sales['total_sales'] = df_sales['estimated_price_by_sales'] * df_sales['comment_count']
+    df_sales['total_sales'] = compute_revenue(df_sales['comment_count'], '真维斯')
     
-    # 合并数据并按商品编号排序
-    df_merged = pd.merge(
+    # 评论先聚合到商品编号，再与商品销售表（每商品一行）连接，只保留有评论的商品
+    df_merged = aggregate_join(
+        df_reviews,
         df_sales[["_itemnumber_", "comment_count", "total_sales"]],
-        df_reviews[["_itemnumber_"]].drop_duplicates(),
-        on="_itemnumber_",
-        how="inner"
+        on="_itemnumber_"
     ).sort_values('_itemnumber_')
     
     # 计算分组数据
@@ -1,17 +1,16 @@
 import pandas as pd
 import streamlit as st
-@st.cache_data
-def sales_time_analysis():
-    df = pd.read_excel("data/评论_真维斯_清洗后.xlsx")
-    df['rateDate'] = pd.to_datetime(df['rateDate'])  # 确保日期格式正确
+from analysis.共享数据集 import load_window
+from analysis.分片聚合 import value_counts
 
-    # 基础统计
-    daily_counts = df['rateDate'].dt.date.value_counts().sort_index()
-    monthly_counts = df['rateDate'].dt.to_period('M').value_counts().sort_index()
+@st.cache_resource(show_spinner=False)
+def sales_time_analysis():
+    # 基础统计：按月份分片 map-reduce 计数
+    daily_counts = value_counts("评论_真维斯_清洗后", "rateDate", "date")
+    monthly_counts = value_counts("评论_真维斯_清洗后", "rateDate", "month")
     
-    # 高峰期间分析 (2015-11 至 2016-01)
-    peak_df = df[(df['rateDate'] >= '2015-11-01') & 
-                (df['rateDate'] <= '2016-01-31')]
+    # 高峰期间分析 (2015-11 至 2016-01)：只读取窗口内的月份分区
+    peak_df = load_window("评论_真维斯_清洗后", '2015-11-01', '2016-01-31', columns=["rateDate"])
     peak_daily = peak_df.resample('D', on='rateDate').size()
     peak_daily = peak_daily.reindex(
         pd.date_range(start='2015-11-01', end='2016-01-31'),
@@ -1,111 +1,82 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+import pandas as pd
+from analysis.共享数据集 import load_window
+from analysis.模型参数 import load_best_params
+from analysis.统计预测基线 import forecast_series
+from analysis.特征库 import FeatureStore, calendar_features, short_term_matrix, short_term_step
+from analysis.树模型推理 import compile_ensemble
+from analysis.直方图梯度提升 import HIST_ENGINE, QuantileBoosting
  
-def create_features(df, is_future=False):
-    """
-    创建时间序列特征
-    :param df: 输入DataFrame
-    :param is_future: 是否为未来预测数据
-    :return: 包含特征的DataFrame
-    """
-    df = df.copy()
-
-    # 基础时间特征
-    df['dayofweek'] = df.index.dayofweek
-    df['weekend'] = (df.index.dayofweek >= 5).astype(int)
-    df['month'] = df.index.month
-
-    # 特殊日期标记
-    df['double11'] = ((df.index.month == 11) & (df.index.day == 11)).astype(int)
-    df['double12'] = ((df.index.month == 12) & (df.index.day == 12)).astype(int)
-    df['newyear'] = ((df.index.month == 1) & (df.index.day == 1)).astype(int)
-
-    # 如果不是未来数据，添加统计特征
-    if not is_future:
-        if 'comments' in df.columns:
-            # 滚动统计特征
-            df['7day_avg'] = df['comments'].rolling(7).mean()
-            df['7day_std'] = df['comments'].rolling(7).std()
-
-            # 滞后特征
-            for i in range(1, 8):
-                df[f'lag_{i}'] = df['comments'].shift(i)
-
-    return df
-
-def predict_sales(start_date, end_date, future_start_date, future_end_date):
-    # 数据准备
-    df = pd.read_excel('data/评论_真维斯_清洗后.xlsx')
-    df['rateDate'] = pd.to_datetime(df['rateDate'])
-    peak_df = df[(df['rateDate'] >= start_date) & (df['rateDate'] <= end_date)]
+def load_daily_comments(start_date, end_date):
+    """统计指定时间段内每日评论数（近似销量），缺失日期补 0"""
+    peak_df = load_window('评论_真维斯_清洗后', start_date, end_date, columns=['rateDate'])
     daily_comments = peak_df.resample('D', on='rateDate').size()
-    daily_comments = daily_comments.reindex(pd.date_range(start=start_date, end=end_date), fill_value=0)
-
-    df_rf = pd.DataFrame({'comments': daily_comments})
-    df_rf = create_features(df_rf).dropna()
+    return daily_comments.reindex(pd.date_range(start=start_date, end=end_date), fill_value=0)
 
-    X = df_rf.drop('comments', axis=1)
-    y = df_rf['comments']
-
-    # 优化随机森林模型
-    model = RandomForestRegressor(
-        n_estimators=300,
-        max_depth=8,
-        min_samples_leaf=3,
-        random_state=42,
-        n_jobs=-1
-    )
-
-    model.fit(X, y)
-
-    # 预测未来
+def predict_sales(start_date, end_date, future_start_date, future_end_date, params=None, engine='random_forest'):
+    """
+    树模型逐日滚动预测
+    :param params: 模型与特征配置 {"model": {...}, "features": {...}}，默认使用调参得到的最佳配置
+    :param engine: 'random_forest' 或 'hist_gradient_boosting'（直方图梯度提升，附分位数预测区间）
+    :return: (daily_comments, pred_index, predictions, bounds)，bounds 为 (下限列表, 上限列表)，随机森林为 None
+    """
+    params = params or load_best_params('short_term')
+    n_lags = params['features']['n_lags']
+    rolling_window = params['features']['rolling_window']
+
+    # 数据准备：训练特征由特征库增量维护，不再每次全量重算
+    daily_comments = load_daily_comments(start_date, end_date)
+    frame = FeatureStore().refresh('真维斯')
+    X, y = short_term_matrix(frame, start_date, end_date, n_lags=n_lags, rolling_window=rolling_window)
+
+    if engine == HIST_ENGINE:
+        # 直方图梯度提升：点预测与上下分位数模型一起训练，随机森林的树参数不适用，使用其默认参数
+        predictor = QuantileBoosting().fit(X, y)
+    else:
+        # 优化随机森林模型（sklearn 较重，首次训练时才导入）
+        from sklearn.ensemble import RandomForestRegressor
+        model = RandomForestRegressor(
+            **params['model'],
+            random_state=42,
+            n_jobs=-1
+        )
+
+        model.fit(X, y)
+        # 单行预测使用展平的数组推理模型，结果与 model.predict 逐位一致
+        predictor = compile_ensemble(model)
+
+    # 预测未来：逐日滚动，由 历史 + 已预测值 生成下一天的特征
     future_dates = pd.date_range(start=future_start_date, end=future_end_date)
-    future_df = pd.DataFrame(index=future_dates)
-    future_df = create_features(future_df, is_future=True)
-
-    # 初始化滞后特征
-    last_window = df_rf['comments'].values[-7:]
+    recent = frame['value'].loc[:end_date].tolist()
 
-    predictions = []
-    for date in future_dates:
-        temp_df = pd.DataFrame(index=[date])
-        temp_df = create_features(temp_df, is_future=True)
+    # 预测期的日历特征一次查表
+    future_calendar = calendar_features(future_dates).to_dict('records')
 
-        # 添加滞后特征
-        for i in range(1, 8):
-            if i <= len(last_window):
-                temp_df[f'lag_{i}'] = last_window[-i]
-            else:
-                temp_df[f'lag_{i}'] = 0
+    predictions, lower, upper = [], [], []
+    for date, calendar in zip(future_dates, future_calendar):
+        step = short_term_step(date, recent, n_lags=n_lags, rolling_window=rolling_window, calendar=calendar)
+        current_features = np.nan_to_num(np.array([[step[col] for col in X.columns]], dtype=float))
 
-        # 添加滚动统计特征
-        if len(predictions) >= 7:
-            temp_df['7day_avg'] = np.mean(predictions[-7:])
-            temp_df['7day_std'] = np.std(predictions[-7:])
+        # 预测当日值（区间只记录，滚动特征仍由点预测生成）
+        if engine == HIST_ENGINE:
+            point, low, high = predictor.predict_interval(current_features)
+            lower.append(max(0, low[0]))
+            upper.append(max(0, high[0]))
         else:
-            # 使用历史数据的统计特征
-            temp_df['7day_avg'] = df_rf['7day_avg'].iloc[-1]
-            temp_df['7day_std'] = df_rf['7day_std'].iloc[-1]
-
-        # 确保所有需要的特征都存在
-        for col in X.columns:
-            if col not in temp_df:
-                temp_df[col] = 0
-
-        # 预测当日值
-        current_features = temp_df[X.columns].fillna(0)
-        pred = max(0, model.predict(current_features)[0])
+            point = predictor.predict(current_features)
+        pred = max(0, point[0])
         predictions.append(pred)
-
-        # 更新最后窗口
-        last_window = np.append(last_window[1:], pred)
+        recent.append(pred)
 
     pred_index = pd.date_range(start=future_start_date, periods=len(predictions))
-    return daily_comments, pred_index, predictions
+    bounds = (lower, upper) if engine == HIST_ENGINE else None
+    return daily_comments, pred_index, predictions, bounds
 
 # 预测分析函数
-def predict_and_analyze():
+def predict_and_analyze(method='random_forest'):
+    """
+    :param method: 'random_forest'、'hist_gradient_boosting' 或 统计预测基线.BASELINE_METHODS 中的基线模型
+    """
     start_date = '2015-11-01'
     end_date = '2016-01-31'
     future_start_date = '2016-02-01'
@@ -114,12 +85,21 @@ def predict_and_analyze():
     # 生成未来日期序列
     future_dates = pd.date_range(start=future_start_date, end=future_end_date)
 
-    daily_comments, pred_index, predictions = predict_sales(start_date, end_date, future_start_date, future_end_date)
+    bounds = None
+    if method in ('random_forest', HIST_ENGINE):
+        daily_comments, pred_index, predictions, bounds = predict_sales(
+            start_date, end_date, future_start_date, future_end_date, engine=method)
+    else:
+        daily_comments = load_daily_comments(start_date, end_date)
+        pred_index, predictions = forecast_series(daily_comments, future_dates, method)
 
     result_df = pd.DataFrame({
     '日期': future_dates,
     '预测销量': predictions,
     '7天平滑值': pd.Series(predictions).rolling(7, min_periods=1).mean()
     })
+    # 分位数模型给出的预测区间
+    if bounds is not None:
+        result_df['预测下限'], result_df['预测上限'] = bounds
 
     return daily_comments, pred_index, predictions, result_df
@@ -1,73 +1,114 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
+from analysis.模型参数 import load_best_params
+from analysis.统计预测基线 import forecast_series
+from analysis.异常检测 import spike_flags_for
+from analysis.特征库 import FeatureStore, LONG_TERM_CALENDAR, brand_daily_series, calendar_features, long_term_matrix, lag_step
+from analysis.树模型推理 import compile_ensemble
+from analysis.直方图梯度提升 import HIST_ENGINE, QuantileBoosting
 
-# 1. 加载数据并提取波动特征
+# 1. 加载数据
 def load_data():
-    df = pd.read_excel('data/评论_真维斯_清洗后.xlsx')
-    df['rateDate'] = pd.to_datetime(df['rateDate'])
-    daily_comments = df.groupby(df['rateDate'].dt.date).size()
-    daily_comments.index = pd.to_datetime(daily_comments.index)
-    daily_comments = daily_comments.asfreq('D').fillna(0)
-    return daily_comments
+    return brand_daily_series('真维斯')
 
-# 2. 构建增强波动性的特征
-def create_volatile_features(data):
-    return pd.DataFrame({
-        'day_volatility': data.rolling(3).std().fillna(0) * 2,  
-        'lag1': data.shift(1).fillna(0),
-        'lag3': data.shift(3).fillna(0),
-        'lag7': data.shift(7).fillna(0),
-        'spike_indicator': (data.diff().abs() > data.mean()).astype(int).shift(1).fillna(0)
-    })
-
-# 3. 训练拟合的模型
-def train_model(data_clean):
+# 2. 训练拟合的模型
+def train_model(data_clean, model_params=None, engine='gradient_boosting'):
+    """
+    :param engine: 'gradient_boosting'（精确分裂）或 'hist_gradient_boosting'（直方图分裂，点预测 + 分位数模型）
+    """
     train_data = data_clean.loc['2015-11-01':'2016-01-31']
     X_train, y_train = train_data.iloc[:, :-1], train_data.iloc[:, -1]
+    if engine == HIST_ENGINE:
+        return QuantileBoosting(model_params).fit(X_train, y_train)
+
+    model_params = model_params or load_best_params('long_term')['model']
+    # sklearn 较重，首次训练时才导入
+    from sklearn.ensemble import GradientBoostingRegressor
     model = GradientBoostingRegressor(
-        n_estimators=50,
-        max_depth=5,
-        learning_rate=0.3,
+        **model_params,
         random_state=42
     )
     model.fit(X_train, y_train)
     return model
-# 4. 生成预测
-def generate_long_term_predictions(model, daily_comments):
+# 3. 生成预测
+def generate_long_term_predictions(model, daily_comments, lags=(1, 3, 7)):
     future_dates = pd.date_range('2016-02-01', periods=90)
-    X_future = pd.DataFrame(index=future_dates)
     predictions = []
-    history = daily_comments['2015-12-01':'2016-01-31'].tolist()
+    recent = daily_comments['2015-12-01':'2016-01-31'].tolist()
+    # 单行预测使用展平的数组推理模型，结果与 model.predict 逐位一致
+    predictor = compile_ensemble(model)
+    volatility = daily_comments.std() * 1.0
+    # 预测期的日历特征一次查表
+    future_calendar = calendar_features(future_dates, LONG_TERM_CALENDAR).to_dict('records')
 
     for i in range(90):
-        volatility = daily_comments.std() * 1.0
         random_shock = np.random.normal(0, volatility)
-    
-        X_future.loc[future_dates[i], 'day_volatility'] = volatility
-        X_future.loc[future_dates[i], 'lag1'] = predictions[i-1] if i>0 else history[-1]
-        X_future.loc[future_dates[i], 'lag3'] = predictions[i-3] if i>=3 else history[-(3-i)]
-        X_future.loc[future_dates[i], 'lag7'] = predictions[i-7] if i>=7 else history[-(7-i)]
-        X_future.loc[future_dates[i], 'spike_indicator'] = 1 if np.random.rand() > 0.7 else 0
-    
-        pred = model.predict(X_future.iloc[[i]])[0] + random_shock
+
+        # 尖峰标记与训练一致（检测器前一天的标记）；预测期尚无检测结果，不预设尖峰日
+        row = {'day_volatility': volatility, **lag_step(recent, lags), 'spike_indicator': 0, **future_calendar[i]}
+
+        pred = predictor.predict(np.array([[row[col] for col in model.feature_names_in_]], dtype=float))[0] + random_shock
         predictions.append(max(0, pred))  # 保持非负
+        recent.append(predictions[-1])
 
     return future_dates, predictions
 
+def generate_quantile_predictions(model, daily_comments, lags=(1, 3, 7)):
+    """
+    分位数模型逐日滚动预测：不注入随机冲击，区间由分位数模型给出
+    :return: (future_dates, predictions, lower, upper)
+    """
+    future_dates = pd.date_range('2016-02-01', periods=90)
+    predictions, lower, upper = [], [], []
+    recent = daily_comments['2015-12-01':'2016-01-31'].tolist()
+    volatility = daily_comments.std() * 1.0
+    future_calendar = calendar_features(future_dates, LONG_TERM_CALENDAR).to_dict('records')
+
+    for i in range(90):
+        # 不预设尖峰日，尖峰带来的不确定性体现在上分位数中
+        row = {'day_volatility': volatility, **lag_step(recent, lags), 'spike_indicator': 0, **future_calendar[i]}
+        point, low, high = model.predict_interval(np.array([[row[col] for col in model.feature_names_in_]], dtype=float))
+        predictions.append(max(0, point[0]))
+        lower.append(max(0, low[0]))
+        upper.append(max(0, high[0]))
+        recent.append(predictions[-1])
+
+    return future_dates, predictions, lower, upper
+
 # 封装长期预测分析
-def long_term_predict_and_analyze():
+def long_term_predict_and_analyze(params=None, method='gradient_boosting'):
+    """
+    :param method: 'gradient_boosting'、'hist_gradient_boosting' 或 统计预测基线.BASELINE_METHODS 中的基线模型
+    """
     daily_comments = load_data()
-    X = create_volatile_features(daily_comments)
-    y = daily_comments
-    data_clean = pd.concat([X, y], axis=1).dropna()
-    model = train_model(data_clean)
-    future_dates, predictions = generate_long_term_predictions(model, daily_comments)
+    bounds = None
+    if method in ('gradient_boosting', HIST_ENGINE):
+        params = params or load_best_params('long_term')
+        features = params['features']
+        spikes = spike_flags_for('真维斯', daily_comments)
+        frame = FeatureStore().update('真维斯', daily_comments)
+        X, y = long_term_matrix(frame, lags=features['lags'], volatility_window=features['volatility_window'],
+                                spikes=spikes)
+        data_clean = pd.concat([X, y], axis=1).dropna()
+        if method == HIST_ENGINE:
+            # 精确分裂模型的调参结果（树数、深度）不适用于直方图模型，使用其默认参数
+            model = train_model(data_clean, engine=HIST_ENGINE)
+            future_dates, predictions, *bounds = generate_quantile_predictions(model, daily_comments,
+                                                                               lags=features['lags'])
+        else:
+            model = train_model(data_clean, params['model'])
+            future_dates, predictions = generate_long_term_predictions(model, daily_comments, lags=features['lags'])
+    else:
+        future_dates = pd.date_range('2016-02-01', periods=90)
+        future_dates, predictions = forecast_series(daily_comments[:'2016-01-31'], future_dates, method)
     
     # 保存预测结果
     forecast_df = pd.DataFrame({
         '日期': future_dates,
         '预测销量': predictions
     })
+    # 分位数模型给出的预测区间
+    if bounds is not None:
+        forecast_df['预测下限'], forecast_df['预测上限'] = bounds
     
     return daily_comments, future_dates, predictions, forecast_df
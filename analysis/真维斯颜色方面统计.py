@@ -1,73 +1,74 @@
 import pandas as pd
 import re
 import streamlit as st
+from analysis.共享数据集 import load_frame
+from analysis.价格分层 import compute_revenue
+from analysis.聚合连接 import aggregate_to_key, safe_merge
 
-@st.cache_data
+
+def extract_unified_color(sku):
+    """
+    统一颜色提取函数，处理以下中文格式：
+    1. "颜色:芥黄 2460;尺码:M" → 提取"芥黄"
+    2. "颜色:2660 湖蓝色;尺码:L" → 提取"湖蓝色" 
+    3. "颜色分类:黑色;尺码:M" → 提取"黑色"
+    """
+    if pd.isna(sku):
+        return '未知颜色'
+        
+    sku = str(sku).strip()
+    
+    # 中文颜色前缀列表（按优先级排序）
+    color_prefixes = ['颜色:', '颜色分类:']
+    
+    # 提取颜色字段部分
+    color_part = None
+    for prefix in color_prefixes:
+        if prefix in sku:
+            color_part = sku.split(prefix)[1].split(';')[0].strip()
+            break
+            
+    if not color_part:
+        return '未知颜色'
+    
+    # 清洗数字和多余空格
+    color = re.sub(r'\d+', '', color_part).strip()  # 移除所有数字
+    color = re.sub(r'\s+', ' ', color).strip()      # 合并多余空格
+    
+    return color if color else '未知颜色'
+
+
+@st.cache_resource(show_spinner=False)
 def load_color_data():
     """加载并处理颜色相关数据"""
     # 读取数据
-    df_sales = pd.read_excel("data/真维斯_商品销售统计.xlsx")
-    df_reviews = pd.read_excel("data/评论_真维斯_清洗后.xlsx")
+    df_sales = load_frame("真维斯_商品销售统计")
+    df_reviews = load_frame("评论_真维斯_清洗后", columns=["_itemnumber_", "auctionSku"])
     
-    def extract_unified_color(sku):
-        """
-        统一颜色提取函数，处理以下中文格式：
-        1. "颜色:芥黄 2460;尺码:M" → 提取"芥黄"
-        2. "颜色:2660 湖蓝色;尺码:L" → 提取"湖蓝色" 
-        3. "颜色分类:黑色;尺码:M" → 提取"黑色"
-        """
-        if pd.isna(sku):
-            return '未知颜色'
-            
-        sku = str(sku).strip()
-        
-        # 中文颜色前缀列表（按优先级排序）
-        color_prefixes = ['颜色:', '颜色分类:']
-        
-        # 提取颜色字段部分
-        color_part = None
-        for prefix in color_prefixes:
-            if prefix in sku:
-                color_part = sku.split(prefix)[1].split(';')[0].strip()
-                break
-                
-        if not color_part:
-            return '未知颜色'
-        
-        # 清洗数字和多余空格
-        color = re.sub(r'\d+', '', color_part).strip()  # 移除所有数字
-        color = re.sub(r'\s+', ' ', color).strip()      # 合并多余空格
-        
-        return color if color else '未知颜色'
+    # 评论先聚合到 商品×SKU，颜色只对不同的 SKU 文本提取一次，再聚合到 商品×颜色
+    item_sku = aggregate_to_key(df_reviews, ["_itemnumber_", "auctionSku"])
+    item_sku["颜色"] = item_sku["auctionSku"].apply(extract_unified_color)
+    item_color = aggregate_to_key(item_sku, ["_itemnumber_", "颜色"], weight="review_count")
+
+    # 商品×颜色 与 商品销售表（每商品一行）多对一连接，连接规模只取决于不同键的数量
+    df_merged = safe_merge(item_color, df_sales, on="_itemnumber_", how="inner", expect="many_to_one")
+
+    # 商品销量、销售额按各颜色的评论占比分摊，避免每条评论重复计入商品总销量
+    share = df_merged["review_count"] / df_merged.groupby("_itemnumber_")["review_count"].transform("sum")
+    df_merged["颜色销量"] = df_merged["comment_count"] * share
+    df_merged["颜色销售额"] = compute_revenue(df_merged["comment_count"], '真维斯') * share
 
-    
-    # 处理数据
-    df_reviews["颜色"] = df_reviews["auctionSku"].apply(extract_unified_color)
-    
     # 销量Top10颜色
-    df_merged = pd.merge(
-        df_sales,
-        df_reviews[["_itemnumber_", "颜色"]],
-        on="_itemnumber_",
-        how="inner"
-    )
-    color_stats = df_merged[df_reviews["颜色"] != '未知颜色'] \
-        .groupby("颜色")["comment_count"].sum().nlargest(10)
-    
+    color_stats = df_merged[df_merged["颜色"] != '未知颜色'] \
+        .groupby("颜色")["颜色销量"].sum().rename("comment_count").nlargest(10)
+
     # 颜色销售额分析
-    df_sales_clean = df_sales.drop_duplicates('_itemnumber_', keep='last')
-    df_reviews_clean = df_reviews.drop_duplicates('_itemnumber_', keep='last')
-    merged_df = pd.merge(df_sales_clean, df_reviews_clean, on='_itemnumber_', how='left')
-    merged_df['商品颜色'] = merged_df['auctionSku'].apply(extract_unified_color)
-    
-    color_sales = merged_df.groupby('商品颜色').agg({
-        'comment_count': 'sum',
-        'estimated_price_by_sales': 'mean',
-        '_itemnumber_': 'nunique'
-    }).reset_index()
-    
-    color_sales.columns = ['商品颜色', '总销量', '平均价格', '商品数量']
-    color_sales['总销售额'] = color_sales['总销量'] * color_sales['平均价格']
+    color_sales = df_merged.groupby('颜色').agg(
+        总销量=('颜色销量', 'sum'),
+        总销售额=('颜色销售额', 'sum'),
+        商品数量=('_itemnumber_', 'nunique')
+    ).reset_index().rename(columns={'颜色': '商品颜色'})
+    color_sales['平均价格'] = color_sales['总销售额'] / color_sales['总销量']
     
     valid_colors = color_sales[color_sales['商品颜色'] != '未知颜色'].sort_values('总销售额', ascending=False).head(10)
     if valid_colors.empty:
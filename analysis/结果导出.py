@@ -0,0 +1,161 @@
+import os
+import glob
+import hashlib
+import pathlib
+import pandas as pd
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import streamlit as st
+from analysis.共享数据集 import (CACHE_DIR, _partitioned_dataset, _to_arrow, data_version, publish_partitioned,
+                            temp_path, window_filter)
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "export")
+
+# 导出格式 -> MIME 类型
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# 每批写出的行数：任何时候内存中只保留一批数据
+CHUNK_ROWS = 50_000
+# 导出缓存目录的总大小上限（字节），超出时按最近使用时间淘汰旧文件
+EXPORT_MAX_BYTES = 2 * 1024 ** 3
+
+
+# -------------------------------------------------- 数据来源 -------------------------------------------------- #
+def frame_batches(df, chunk_rows=CHUNK_ROWS):
+    """DataFrame 按行切片逐批转为 Arrow RecordBatch"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield from _to_arrow(df.iloc[start:start + chunk_rows]).to_batches()
+
+
+def dataset_batches(name, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    评论明细按日期窗口逐批扫描（只打开窗口内月份分区），不把整段明细读入内存
+    :param columns: 导出的列，默认为原始数据的全部列（不含分区列 brand / month）
+    """
+    dataset = _partitioned_dataset(publish_partitioned(name))
+    columns = columns or [col for col in dataset.schema.names if col not in ("brand", "month")]
+    yield from dataset.to_batches(columns=list(columns), filter=window_filter(name, start, end), batch_size=chunk_rows)
+
+
+# -------------------------------------------------- 写出 -------------------------------------------------- #
+def _write_csv(batches, path):
+    # 带 BOM 的 UTF-8，Excel 直接打开中文不乱码
+    with open(path, "wb") as f:
+        f.write("﻿".encode("utf-8"))
+        writer = None
+        for batch in batches:
+            if writer is None:
+                writer = pacsv.CSVWriter(f, batch.schema)
+            writer.write_batch(batch)
+        if writer is not None:
+            writer.close()
+
+
+def _write_parquet(batches, path):
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = pq.ParquetWriter(path, batch.schema)
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+def _write_xlsx(batches, path):
+    # 只写模式逐行写入，工作表内容直接落到临时文件，不在内存中保留整张表
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("data")
+    header = False
+    for batch in batches:
+        if not header:
+            sheet.append(batch.schema.names)
+            header = True
+        frame = batch.to_pandas()
+        for column in frame.columns:
+            # openpyxl 不支持带时区的时间与 pandas 缺失值类型
+            if isinstance(frame[column].dtype, pd.DatetimeTZDtype):
+                frame[column] = frame[column].dt.tz_localize(None)
+        for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+def _evict(keep):
+    """导出目录超过 EXPORT_MAX_BYTES 时，从最久未使用的文件开始删除（不删除 keep）"""
+    files = sorted((path for path in glob.glob(os.path.join(EXPORT_DIR, "*")) if not path.endswith(".tmp")),
+                   key=os.path.getmtime, reverse=True)
+    total = 0
+    for path in files:
+        total += os.path.getsize(path)
+        if total > EXPORT_MAX_BYTES and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def export_file(name, fmt, batches, key):
+    """
+    将逐批数据写成导出文件并缓存：相同 name、格式与 key 的导出直接返回已有文件
+    :param batches: 无参数函数，返回 RecordBatch 迭代器（缓存命中时不调用）
+    :param key: 区分导出内容的字符串（筛选条件、数据版本或内容哈希），或返回该字符串的无参数函数（点击下载时才计算）
+    :return: 文件路径
+    """
+    if fmt not in WRITERS:
+        raise KeyError(f"未知导出格式: {fmt}，可选: {list(WRITERS)}")
+    key = key() if callable(key) else key
+    digest = hashlib.sha1(f"{name}|{key}".encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(EXPORT_DIR, f"{name}_{digest}.{fmt}")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    WRITERS[fmt](batches(), tmp_path)
+    os.replace(tmp_path, path)
+    _evict(keep=path)
+    return path
+
+
+def frame_key(df):
+    """表格内容哈希，作为页面结果表导出的缓存键"""
+    hashed = pd.util.hash_pandas_object(df.reset_index(drop=True), index=False).values
+    return f"{list(df.columns)}|{hashlib.sha1(hashed.tobytes()).hexdigest()}"
+
+
+# -------------------------------------------------- 页面控件 -------------------------------------------------- #
+def export_button(label, name, batches, key, widget_key):
+    """
+    导出控件：选择格式后点击“生成文件”，文件此时才逐批生成（或从缓存读取），随后出现下载按钮；
+    页面运行时不生成文件（st.download_button 的 data 只接受已有内容，不接受延迟计算的函数）
+    :param batches: 无参数函数，返回 RecordBatch 迭代器
+    :param key: 同 export_file，可为无参数函数
+    """
+    with st.popover(f"导出{label}"):
+        fmt = st.radio("格式", list(EXPORT_FORMATS), horizontal=True, key=f"{widget_key}_format")
+        if st.button("生成文件", key=f"{widget_key}_prepare"):
+            # 下载按钮只在本次运行中出现，之后表格变化不会下载到旧文件；点击下载不触发重跑
+            st.download_button(
+                "下载", data=pathlib.Path(export_file(name, fmt, batches, key)).read_bytes(),
+                file_name=f"{label}.{fmt}", mime=EXPORT_FORMATS[fmt], on_click="ignore", key=f"{widget_key}_download"
+            )
+
+
+def export_frame(label, df, widget_key):
+    """导出页面上的结果表（内容哈希在点击生成时才计算，页面运行时不哈希整表）"""
+    export_button(label, widget_key, lambda: frame_batches(df), lambda: frame_key(df), widget_key)
+
+
+def export_reviews(label, name, start=None, end=None, widget_key=None):
+    """导出日期窗口内的评论明细（按数据版本与窗口缓存）"""
+    widget_key = widget_key or f"reviews_{name}_{start}_{end}"
+    export_button(label, f"reviews_{data_version(name)}", lambda: dataset_batches(name, start, end),
+                  f"{start}|{end}", widget_key)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# 所有基线模型均以 (序列数, 天数) 的二维数组为输入，一次性对多条序列做预测，
+# 返回 (序列数, 预测天数) 的数组；只依赖 NumPy，拟合成本远低于集成树模型。
+
+
+def _as_2d(Y):
+    """单条序列转为 (1, T) 数组"""
+    Y = np.asarray(Y, dtype=float)
+    return Y[np.newaxis, :] if Y.ndim == 1 else Y
+
+
+def seasonal_naive(Y, horizon, season=7):
+    """季节性朴素：重复最近一个周期的值"""
+    Y = _as_2d(Y)
+    last_season = Y[:, -season:]
+    reps = int(np.ceil(horizon / season))
+    return np.tile(last_season, reps)[:, :horizon]
+
+
+def moving_average(Y, horizon, window=7):
+    """移动平均：以最近 window 天均值作为未来各天的预测"""
+    Y = _as_2d(Y)
+    level = Y[:, -window:].mean(axis=1, keepdims=True)
+    return np.repeat(level, horizon, axis=1)
+
+
+def holt(Y, horizon, alpha=0.3, beta=0.05):
+    """Holt 线性趋势指数平滑"""
+    Y = _as_2d(Y)
+    level = Y[:, 0].copy()
+    trend = Y[:, 1] - Y[:, 0] if Y.shape[1] > 1 else np.zeros(len(Y))
+    for t in range(1, Y.shape[1]):
+        prev_level = level
+        level = alpha * Y[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return level[:, np.newaxis] + trend[:, np.newaxis] * steps
+
+
+def holt_winters(Y, horizon, alpha=0.3, beta=0.05, gamma=0.2, season=7):
+    """
+    加法 Holt-Winters（默认周季节性）
+    历史不足两个周期时退化为 Holt 线性趋势
+    """
+    Y = _as_2d(Y)
+    if Y.shape[1] < 2 * season:
+        return holt(Y, horizon, alpha, beta)
+
+    # 用前两个周期初始化水平、趋势与季节项
+    first, second = Y[:, :season], Y[:, season:2 * season]
+    level = first.mean(axis=1)
+    trend = (second.mean(axis=1) - level) / season
+    seasonal = first - level[:, np.newaxis]
+
+    for t in range(season, Y.shape[1]):
+        s = seasonal[:, t % season]
+        prev_level = level
+        level = alpha * (Y[:, t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+        seasonal[:, t % season] = gamma * (Y[:, t] - level) + (1 - gamma) * s
+
+    T = Y.shape[1]
+    steps = np.arange(1, horizon + 1)
+    season_idx = (T + steps - 1) % season
+    return level[:, np.newaxis] + trend[:, np.newaxis] * steps + seasonal[:, season_idx]
+
+
+def croston(Y, horizon, alpha=0.1):
+    """
+    Croston 间歇需求模型，适用于大量为 0 的稀疏日销量
+    分别平滑非零需求量与需求间隔，预测值为二者之比
+    """
+    Y = _as_2d(Y)
+    n = len(Y)
+    size = np.zeros(n)       # 平滑后的非零需求量
+    interval = np.ones(n)    # 平滑后的需求间隔
+    since_last = np.ones(n)  # 距上次非零需求的天数
+    seen = np.zeros(n, dtype=bool)
+
+    for t in range(Y.shape[1]):
+        demand = Y[:, t] > 0
+        first = demand & ~seen
+        update = demand & seen
+        size = np.where(first, Y[:, t], size)
+        interval = np.where(first, since_last, interval)
+        size = np.where(update, size + alpha * (Y[:, t] - size), size)
+        interval = np.where(update, interval + alpha * (since_last - interval), interval)
+        seen |= demand
+        since_last = np.where(demand, 1, since_last + 1)
+
+    forecast = np.where(seen, size / interval, 0.0)
+    return np.repeat(forecast[:, np.newaxis], horizon, axis=1)
+
+
+# 可选的基线模型：名称 -> (中文名, 函数)
+BASELINE_METHODS = {
+    "seasonal_naive": ("季节性朴素", seasonal_naive),
+    "moving_average": ("移动平均", moving_average),
+    "holt": ("Holt 线性趋势", holt),
+    "holt_winters": ("Holt-Winters（周季节性）", holt_winters),
+    "croston": ("Croston 间歇需求", croston),
+}
+
+
+def forecast_many(Y, horizon, method, **kwargs):
+    """
+    对多条序列批量预测
+    :param Y: (序列数, 天数) 的历史数组
+    :return: (序列数, horizon) 的非负预测数组
+    """
+    if method not in BASELINE_METHODS:
+        raise KeyError(f"未知基线模型: {method}，可选: {list(BASELINE_METHODS)}")
+    return np.clip(BASELINE_METHODS[method][1](Y, horizon, **kwargs), 0, None)
+
+
+def forecast_series(daily_comments, future_dates, method, **kwargs):
+    """
+    对单条每日序列预测，返回值与 predict_sales / generate_long_term_predictions 一致
+    :return: (future_dates, predictions 列表)
+    """
+    future_dates = pd.DatetimeIndex(future_dates)
+    forecast = forecast_many(daily_comments.values, len(future_dates), method, **kwargs)
+    return future_dates, forecast[0].tolist()
@@ -0,0 +1,64 @@
+import warnings
+import pandas as pd
+
+# 连接基数：左表/右表的连接键是否允许重复
+CARDINALITIES = {
+    "one_to_one": (False, False),
+    "one_to_many": (False, True),
+    "many_to_one": (True, False),
+    "many_to_many": (True, True),
+}
+
+
+def aggregate_to_key(df, keys, weight=None, name="review_count", dropna=False):
+    """
+    将明细行聚合到连接键，每个键一行
+    :param weight: 已有计数列（对已聚合的表再聚合时累加该列），为 None 时按行计数
+    :return: DataFrame[keys..., name]
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    grouped = df.groupby(keys, sort=False, dropna=dropna)
+    counts = grouped[weight].sum() if weight else grouped.size()
+    return counts.rename(name).reset_index()
+
+
+def check_cardinality(left, right, on, expect="many_to_one"):
+    """
+    检查连接键基数是否符合预期，不符合时发出警告（严格模式直接用 pd.merge 的 validate 参数）
+    :return: 是否符合预期
+    """
+    if expect not in CARDINALITIES:
+        raise KeyError(f"未知连接基数: {expect}，可选: {list(CARDINALITIES)}")
+    left_many, right_many = CARDINALITIES[expect]
+    problems = []
+    if not left_many and left.duplicated(on).any():
+        problems.append(f"左表连接键 {on} 存在重复")
+    if not right_many and right.duplicated(on).any():
+        problems.append(f"右表连接键 {on} 存在重复")
+    if not problems:
+        return True
+    warnings.warn(f"连接基数不符合预期 {expect}：" + "；".join(problems) + "，请先用 aggregate_to_key 聚合到连接键",
+                  RuntimeWarning, stacklevel=3)
+    return False
+
+
+def safe_merge(left, right, on, how="inner", expect="many_to_one", on_violation="raise"):
+    """
+    带基数检查的连接：默认要求右表每个键一行（多对一），避免多对多连接导致行数膨胀
+    :param on_violation: 'raise' 由 pd.merge(validate=expect) 抛出 MergeError；'warn' 发出警告后照常连接
+    """
+    if expect not in CARDINALITIES:
+        raise KeyError(f"未知连接基数: {expect}，可选: {list(CARDINALITIES)}")
+    if on_violation == "warn":
+        check_cardinality(left, right, on, expect)
+        return pd.merge(left, right, on=on, how=how)
+    return pd.merge(left, right, on=on, how=how, validate=expect)
+
+
+def aggregate_join(details, table, on, keys=None, how="inner", name="review_count"):
+    """
+    先聚合后连接：明细（如评论）先聚合到 keys（默认为连接键 on，也可为 商品×颜色 等更细的键），
+    再与每键一行的维表多对一连接；连接规模由不同键的数量决定，与明细行数无关
+    """
+    aggregated = aggregate_to_key(details, keys or on, name=name)
+    return safe_merge(aggregated, table, on=on, how=how, expect="many_to_one")
@@ -0,0 +1,166 @@
+import os
+import hashlib
+import functools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import CACHE_DIR, temp_path
+from analysis.价格分层 import PRICE_TIERS, compute_revenue
+
+BOOTSTRAP_DIR = os.path.join(CACHE_DIR, "bootstrap")
+
+# 重抽样次数、置信水平
+N_BOOT = 2000
+CONFIDENCE = 0.95
+# 随机种子：同一输入得到完全相同的区间
+SEED = 0
+# 每批重抽样次数：每批只生成 批次 × 类别数 的计数矩阵，内存与评论行数无关
+CHUNK_SIZE = 250
+# 重抽样总规模（次数 × 类别数）超过该值时分批交给进程池
+POOL_MIN_CELLS = 5_000_000
+
+
+# -------------------------------------------------- 重抽样引擎 -------------------------------------------------- #
+def resample_counts(rng, counts, size, method="poisson"):
+    """
+    在聚合计数上直接重抽样，等价于对明细行有放回抽样，不需要展开明细
+    :param method: 'multinomial' 总行数固定（适合占比）；'poisson' 每行权重 ~ Poisson(1)，总量随之波动（适合总量）
+    :return: size × 类别数 的重抽样计数矩阵
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if method == "multinomial":
+        total = counts.sum()
+        return rng.multinomial(total, counts / total if total else np.full(len(counts), 1 / max(len(counts), 1)),
+                               size=size)
+    if method == "poisson":
+        return rng.poisson(counts, size=(size, len(counts)))
+    raise KeyError(f"未知重抽样方式: {method}，可选: ['multinomial', 'poisson']")
+
+
+def _bootstrap_chunk(task):
+    """一批重抽样：各组独立抽样后计算统计量，只返回 批次 × 指标数 的结果"""
+    groups, statistic, size, method, seed = task
+    rng = np.random.default_rng(seed)
+    draws = [resample_counts(rng, counts, size, method) for counts in groups]
+    return statistic(*draws)
+
+
+def bootstrap(groups, statistic, n_boot=N_BOOT, method="poisson", confidence=CONFIDENCE, seed=SEED, workers=None,
+              chunk_size=CHUNK_SIZE):
+    """
+    分批向量化自助法
+    :param groups: 各组（如两个品牌）的聚合计数数组，组间独立重抽样
+    :param statistic: 模块级函数，输入各组的 批次 × 类别数 计数矩阵，输出 批次 × 指标数 矩阵（需可序列化给工作进程）
+    :return: (点估计, 下限, 上限)，均为长度等于指标数的数组
+    """
+    groups = [np.asarray(counts, dtype=np.int64) for counts in groups]
+    sizes = [min(chunk_size, n_boot - start) for start in range(0, n_boot, chunk_size)]
+    # 每批独立的随机数流，结果与是否并行、批次执行顺序无关
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(groups, statistic, size, method, s) for size, s in zip(sizes, seeds)]
+
+    cells = n_boot * sum(len(counts) for counts in groups)
+    if cells > POOL_MIN_CELLS and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            samples = np.vstack(list(pool.map(_bootstrap_chunk, tasks)))
+    else:
+        samples = np.vstack([_bootstrap_chunk(task) for task in tasks])
+
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(samples, [alpha, 1 - alpha], axis=0)
+    estimate = statistic(*[counts[None, :] for counts in groups])[0]
+    return estimate, lower, upper
+
+
+def _cached(name, groups, compute, labels=(), extra=""):
+    """
+    按输入内容缓存区间结果：计数、类别标签、重抽样设置（次数、置信水平、种子）与 extra（如价格分层）都相同时直接读取
+    """
+    digest = hashlib.sha1()
+    for counts in groups:
+        digest.update(np.asarray(counts, dtype=np.int64).tobytes())
+        digest.update(b"|")
+    digest.update(f"{[str(label) for label in labels]}|{N_BOOT}|{CONFIDENCE}|{SEED}|{extra}".encode("utf-8"))
+    path = os.path.join(BOOTSTRAP_DIR, f"{name}_{digest.hexdigest()[:16]}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    result = compute()
+    os.makedirs(BOOTSTRAP_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    result.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return result
+
+
+def _interval_frame(labels, estimate, lower, upper):
+    return pd.DataFrame({"指标": labels, "估计值": estimate, "下限": lower, "上限": upper})
+
+
+# -------------------------------------------------- 对比指标 -------------------------------------------------- #
+def _count_difference(jw, uq):
+    """各类别计数：真维斯、优衣库、两者之差"""
+    return np.hstack([jw, uq, jw - uq])
+
+
+def _share_difference(jw, uq):
+    """各类别占比：真维斯、优衣库、两者之差"""
+    jw_share = jw / np.maximum(jw.sum(axis=1, keepdims=True), 1)
+    uq_share = uq / np.maximum(uq.sum(axis=1, keepdims=True), 1)
+    return np.hstack([jw_share, uq_share, jw_share - uq_share])
+
+
+def _sales_totals(jw, uq, tiers=None):
+    """销量与分层估价销售额合计（按商品重抽样后重新分档定价）"""
+    jw_revenue = compute_revenue(jw, "真维斯", tiers=tiers).sum(axis=1)
+    uq_revenue = compute_revenue(uq, "优衣库", tiers=tiers).sum(axis=1)
+    jw_sales, uq_sales = jw.sum(axis=1), uq.sum(axis=1)
+    return np.column_stack([jw_sales, uq_sales, jw_sales - uq_sales, jw_revenue, uq_revenue, jw_revenue - uq_revenue])
+
+
+def _split_brands(labels, estimate, lower, upper, value_name):
+    """将 [真维斯..., 优衣库..., 差值...] 排列的结果整理为每个类别一行"""
+    k = len(labels)
+    frame = pd.DataFrame({value_name: labels})
+    for i, prefix in enumerate(["真维斯", "优衣库", "差值"]):
+        part = slice(i * k, (i + 1) * k)
+        frame[prefix] = estimate[part]
+        frame[f"{prefix}_下限"] = lower[part]
+        frame[f"{prefix}_上限"] = upper[part]
+    # 差值区间不含 0 视为差异显著
+    frame["差异显著"] = (frame["差值_下限"] > 0) | (frame["差值_上限"] < 0)
+    return frame
+
+
+def monthly_intervals(months, jw_counts, uq_counts):
+    """
+    月度评论量的置信区间（Poisson 自助法）
+    :return: DataFrame[月份, 真维斯, 真维斯_下限, 真维斯_上限, 优衣库..., 差值..., 差异显著]
+    """
+    groups = [jw_counts, uq_counts]
+    return _cached("monthly", groups, lambda: _split_brands(
+        list(months), *bootstrap(groups, _count_difference, method="poisson"), value_name="月份"), labels=months)
+
+
+def satisfaction_intervals(levels, jw_levels, uq_levels):
+    """
+    满意度等级占比的置信区间（多项分布自助法，评论总数固定）
+    :return: DataFrame[满意度等级, 真维斯, ..._下限, ..._上限, 优衣库..., 差值..., 差异显著]
+    """
+    groups = [jw_levels, uq_levels]
+    return _cached("satisfaction", groups, lambda: _split_brands(
+        list(levels), *bootstrap(groups, _share_difference, method="multinomial"), value_name="满意度等级"),
+        labels=levels)
+
+
+def total_sales_intervals(jw_item_counts, uq_item_counts, tiers=None):
+    """
+    销量、销售额合计的置信区间：各商品评论数 Poisson 重抽样后按价格分层重新估价
+    :return: DataFrame[指标, 估计值, 下限, 上限]
+    """
+    groups = [jw_item_counts, uq_item_counts]
+    labels = ["真维斯 销售量", "优衣库 销售量", "销售量差值", "真维斯 销售额", "优衣库 销售额", "销售额差值"]
+    statistic = functools.partial(_sales_totals, tiers=tiers) if tiers else _sales_totals
+    # 默认分层也计入缓存键：调整 PRICE_TIERS 后不再返回旧价格下的区间
+    return _cached("total_sales", groups, lambda: _interval_frame(labels, *bootstrap(groups, statistic, method="poisson")),
+                   labels=labels, extra=repr(PRICE_TIERS if tiers is None else tiers))
@@ -0,0 +1,133 @@
+import os
+import glob
+import hashlib
+import functools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import DATA_DIR, CACHE_DIR, load_frame, source_version, temp_path
+from analysis.真维斯其他方面统计 import analyze_sentiment
+
+SENTIMENT_DIR = os.path.join(CACHE_DIR, "sentiment")
+
+# 人工标注样本（可选）：CSV，列为 rateContent, 情感分类（好评/中性/差评）
+LABELED_PATH = os.path.join(DATA_DIR, "情感标注.csv")
+# 人工标注样本相对关键词弱标签的权重
+LABELED_WEIGHT = 5.0
+
+
+def make_vectorizer():
+    """字符 n-gram 哈希向量化：无状态，各工作进程各自创建即可，无需传递词表"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(analyzer='char', ngram_range=(1, 3), n_features=2 ** 20, alternate_sign=False)
+
+
+def content_hash(text):
+    """评论内容哈希，用作打分缓存键"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _model_version():
+    """模型版本：由训练数据版本与人工标注文件决定"""
+    key = source_version('评论_真维斯_清洗后')
+    if os.path.exists(LABELED_PATH):
+        stat = os.stat(LABELED_PATH)
+        key += f":{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+
+def load_training_samples():
+    """训练样本：全部评论的关键词规则弱标签 + 人工标注样本（更高权重）"""
+    texts = load_frame('评论_真维斯_清洗后', columns=['rateContent'])['rateContent'].fillna('').astype(str)
+    texts = texts[texts.str.strip() != '']
+    labels = texts.map(analyze_sentiment)
+    weights = np.ones(len(texts))
+
+    if os.path.exists(LABELED_PATH):
+        labeled = pd.read_csv(LABELED_PATH).dropna(subset=['rateContent', '情感分类'])
+        texts = pd.concat([texts, labeled['rateContent'].astype(str)], ignore_index=True)
+        labels = pd.concat([labels, labeled['情感分类']], ignore_index=True)
+        weights = np.concatenate([weights, np.full(len(labeled), LABELED_WEIGHT)])
+    return texts, labels, weights
+
+
+def train_classifier():
+    """
+    训练线性情感分类器并保存，返回模型文件路径
+    同一数据版本只训练一次
+    """
+    import joblib
+    from sklearn.linear_model import SGDClassifier
+
+    path = os.path.join(SENTIMENT_DIR, f"model_{_model_version()}.joblib")
+    if os.path.exists(path):
+        return path
+
+    texts, labels, weights = load_training_samples()
+    model = SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=50, tol=1e-4, random_state=42)
+    model.fit(make_vectorizer().transform(texts), labels, sample_weight=weights)
+
+    os.makedirs(SENTIMENT_DIR, exist_ok=True)
+    tmp_path = temp_path(path)
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def _load_model(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _score_batch(task):
+    """进程池任务：对一批评论做稀疏向量化并打分"""
+    path, texts = task
+    return _load_model(path).predict(make_vectorizer().transform(texts)).tolist()
+
+
+def _score_cache_path(model_path):
+    return model_path.replace('.joblib', '_scores.parquet')
+
+
+def classify_reviews(texts, batch_size=50000, workers=None):
+    """
+    用情感分类器批量打分
+    打分结果按评论内容哈希缓存，刷新时只对新出现的评论打分；多批次时在进程池中并行
+    :return: 与 texts 等长的标签数组（'好评' / '中性' / '差评'）
+    """
+    texts = pd.Series(texts).fillna('').astype(str).reset_index(drop=True)
+    hashes = texts.map(content_hash)
+
+    path = train_classifier()
+    cache_path = _score_cache_path(path)
+    if os.path.exists(cache_path):
+        cache = pd.read_parquet(cache_path)['label']
+    else:
+        cache = pd.Series(dtype=object, name='label')
+
+    new = ~hashes.isin(cache.index) & (texts.str.strip() != '')
+    new_texts = texts[new].groupby(hashes[new]).first()
+    if len(new_texts):
+        chunks = [new_texts.values[i:i + batch_size].tolist() for i in range(0, len(new_texts), batch_size)]
+        if len(chunks) == 1:
+            labels = _score_batch((path, chunks[0]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                labels = [label for batch in pool.map(_score_batch, [(path, chunk) for chunk in chunks]) for label in batch]
+        cache = pd.concat([cache, pd.Series(labels, index=new_texts.index, name='label')])
+        cache.index.name = 'hash'
+
+        tmp_path = temp_path(cache_path)
+        cache.to_frame().to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
+        # 清理旧模型的打分缓存
+        for old in glob.glob(os.path.join(SENTIMENT_DIR, '*_scores.parquet')):
+            if old != cache_path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    # 空评论与关键词规则保持一致，记为中性
+    return np.where(texts.str.strip() == '', '中性', hashes.map(cache).values)
@@ -0,0 +1,184 @@
+import os
+import re
+import functools
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
+from analysis.共享数据集 import (CACHE_DIR, data_version, partition_fingerprint, partition_month, temp_path,
+                            window_files)
+
+TEXT_TREND_DIR = os.path.join(CACHE_DIR, "text_trend")
+
+# 品牌 -> (评论数据集, 评论内容列, 商品编号列)
+TEXT_SOURCES = {
+    "真维斯": ("评论_真维斯_清洗后", "rateContent", "_itemnumber_"),
+    "优衣库": ("reviews_uni_clean", "ratecontent", "_itemnumber_"),
+}
+
+# 字符 n-gram 长度（中文评论不分词，直接取连续汉字片段）
+NGRAM_RANGE = (2, 3)
+# 进入词表的最低总出现评论数
+MIN_TERM_COUNT = 3
+
+_HAN_RUN = re.compile(r"[一-鿿]+")
+
+
+def review_terms(text):
+    """一条评论包含的字符 n-gram 集合（只取连续汉字片段，按评论去重，统计的是“提到该词的评论数”）"""
+    if not isinstance(text, str):
+        return set()
+    terms = set()
+    for run in _HAN_RUN.findall(text):
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+            terms.update(run[i:i + n] for i in range(len(run) - n + 1))
+    return terms
+
+
+def _count_partition(task):
+    """
+    进程池任务：统计一个月份分区内 商品×词 的评论数
+    :return: DataFrame[item, term, n]
+    """
+    path, text_column, item_column = task
+    df = pq.read_table(path, columns=[text_column, item_column]).to_pandas()
+    items = df[item_column]
+    if pd.api.types.is_float_dtype(items):
+        items = items.fillna(-1).astype("int64")
+    pairs = [(item, term) for item, text in zip(items.values, df[text_column].values) for term in review_terms(text)]
+    counts = pd.DataFrame(pairs, columns=["item", "term"]).value_counts().rename("n").reset_index()
+    counts["item"] = counts["item"].astype("int64")
+    return counts
+
+
+def _partition_cache_path(brand, path):
+    month = partition_month(path) or "unknown"
+    return os.path.join(TEXT_TREND_DIR, brand, f"{month}.{partition_fingerprint(path)}.parquet")
+
+
+def refresh_partition_counts(brand, workers=None):
+    """
+    增量更新各月份分区的 商品×词 计数：只统计缓存中没有的分区（新月份或内容变化的月份），多个分区时并行
+    :return: 月份 -> 计数 DataFrame 的缓存文件路径
+    """
+    dataset, text_column, item_column = TEXT_SOURCES[brand]
+    paths = {path: _partition_cache_path(brand, path) for path in window_files(dataset) if partition_month(path)}
+    missing = [path for path, cache_path in paths.items() if not os.path.exists(cache_path)]
+    if missing:
+        tasks = [(path, text_column, item_column) for path in missing]
+        if len(tasks) == 1:
+            results = [_count_partition(tasks[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_count_partition, tasks))
+        for path, counts in zip(missing, results):
+            cache_path = paths[path]
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = temp_path(cache_path)
+            counts.to_parquet(tmp_path)
+            os.replace(tmp_path, cache_path)
+    return {partition_month(path): cache_path for path, cache_path in sorted(paths.items(), key=lambda kv: kv[0])}
+
+
+def _previous_month(month):
+    """'YYYY-MM' 的上一个自然月"""
+    return (pd.Period(month, freq="M") - 1).strftime("%Y-%m")
+
+
+class TermMonthMatrix:
+    """
+    词 × 月份 稀疏计数矩阵（值为提到该词的评论数），附每月评论总数，用于查询上升最快的词
+    """
+
+    def __init__(self, terms, months, counts, reviews):
+        self.terms = terms
+        self.months = months
+        self.counts = counts
+        self.reviews = reviews
+        self._index = {term: i for i, term in enumerate(terms)}
+
+    @classmethod
+    def from_long(cls, frames, reviews, min_count=MIN_TERM_COUNT):
+        """由各月的 [term, n] 长表构建（frames: 月份 -> DataFrame）"""
+        months = sorted(frames)
+        long = pd.concat([frames[m].assign(month=i) for i, m in enumerate(months)], ignore_index=True)
+        totals = long.groupby("term")["n"].sum()
+        terms = totals.index[totals >= min_count]
+        long = long[long["term"].isin(terms)]
+        term_codes = pd.Categorical(long["term"], categories=terms).codes
+        counts = sparse.csr_matrix((long["n"].values, (term_codes, long["month"].values)),
+                                   shape=(len(terms), len(months)))
+        return cls(list(terms), months, counts, np.array([reviews[m] for m in months], dtype=float))
+
+    def series(self, terms):
+        """指定词的月度提及率（提到该词的评论占当月评论的比例）"""
+        rows = [self._index[t] for t in terms if t in self._index]
+        share = self.counts[rows].toarray() / np.maximum(self.reviews, 1)
+        return pd.DataFrame(share.T, index=self.months, columns=[t for t in terms if t in self._index])
+
+    def comparable_months(self):
+        """上一个自然月也有数据、可以计算环比的月份"""
+        months = set(self.months)
+        return [m for m in self.months if _previous_month(m) in months]
+
+    def top_rising(self, month=None, top_n=20, min_count=5):
+        """
+        相对上一个自然月提及率上升最多的词；上月没有数据（月份缺失）时返回空表
+        :param month: 'YYYY-MM'，默认最新月份
+        :return: DataFrame[词, 本月评论数, 上月评论数, 本月提及率, 上月提及率, 提及率变化]
+        """
+        month = month or self.months[-1]
+        previous_month = _previous_month(month)
+        if month not in self.months or previous_month not in self.months or not self.terms:
+            return pd.DataFrame(columns=["词", "本月评论数", "上月评论数", "本月提及率", "上月提及率", "提及率变化"])
+        col, prev_col = self.months.index(month), self.months.index(previous_month)
+        current = self.counts[:, col].toarray().ravel()
+        previous = self.counts[:, prev_col].toarray().ravel()
+        cur_share = current / max(self.reviews[col], 1)
+        prev_share = previous / max(self.reviews[prev_col], 1)
+        rise = np.where(current >= min_count, cur_share - prev_share, -np.inf)
+        order = np.argsort(-rise, kind="stable")[:top_n]
+        order = order[np.isfinite(rise[order]) & (rise[order] > 0)]
+        return pd.DataFrame({
+            "词": [self.terms[i] for i in order],
+            "本月评论数": current[order].astype(int),
+            "上月评论数": previous[order].astype(int),
+            "本月提及率": cur_share[order],
+            "上月提及率": prev_share[order],
+            "提及率变化": rise[order],
+        })
+
+
+@functools.lru_cache(maxsize=16)
+def _term_matrix(brand, version, item):
+    dataset = TEXT_SOURCES[brand][0]
+    frames, reviews = {}, {}
+    for month, cache_path in refresh_partition_counts(brand).items():
+        counts = pd.read_parquet(cache_path)
+        if item is not None:
+            counts = counts[counts["item"] == item]
+        frames[month] = counts.groupby("term", as_index=False)["n"].sum()
+    # 每月评论数（商品级查询为该商品当月的评论数）
+    for path in window_files(dataset):
+        month = partition_month(path)
+        if month is None:
+            continue
+        if item is None:
+            reviews[month] = pq.read_metadata(path).num_rows
+        else:
+            items = pq.read_table(path, columns=[TEXT_SOURCES[brand][2]]).column(0).to_pandas()
+            reviews[month] = int((items == item).sum())
+    return TermMonthMatrix.from_long(frames, reviews)
+
+
+def term_matrix(brand, item=None):
+    """
+    品牌（或单个商品）的词 × 月份矩阵：按数据版本缓存在进程内，分区计数增量维护，渲染时不重新扫描评论文本
+    """
+    return _term_matrix(brand, data_version(TEXT_SOURCES[brand][0]), None if item is None else int(item))
+
+
+def top_rising_terms(brand, month=None, item=None, top_n=20, min_count=5):
+    """品牌（或单个商品）在指定月份相对上月上升最快的词"""
+    return term_matrix(brand, item).top_rising(month, top_n, min_count)
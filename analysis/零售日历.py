@@ -0,0 +1,110 @@
+import functools
+import numpy as np
+import pandas as pd
+
+# 日历覆盖范围：一次性预计算该范围内每一天的全部日历特征
+CALENDAR_START = "2010-01-01"
+CALENDAR_END = "2030-12-31"
+# 距事件天数的上限（范围外或超过一年按该值截断）
+MAX_DISTANCE = 400
+
+# 农历节日的公历日期（按年）
+SPRING_FESTIVAL = [
+    "2010-02-14", "2011-02-03", "2012-01-23", "2013-02-10", "2014-01-31", "2015-02-19", "2016-02-08",
+    "2017-01-28", "2018-02-16", "2019-02-05", "2020-01-25", "2021-02-12", "2022-02-01", "2023-01-22",
+    "2024-02-10", "2025-01-29", "2026-02-17", "2027-02-06", "2028-01-26", "2029-02-13", "2030-02-03",
+]
+MID_AUTUMN = [
+    "2010-09-22", "2011-09-12", "2012-09-30", "2013-09-19", "2014-09-08", "2015-09-27", "2016-09-15",
+    "2017-10-04", "2018-09-24", "2019-09-13", "2020-10-01", "2021-09-21", "2022-09-10", "2023-09-29",
+    "2024-09-17", "2025-10-06", "2026-09-25", "2027-09-15", "2028-10-03", "2029-09-22", "2030-09-12",
+]
+
+# 零售事件：名称 -> (显示名, 日期（固定 (月, 日) 或农历节日公历日期列表）, 预售期天数, 售后期天数)
+EVENTS = {
+    "newyear": ("元旦", (1, 1), 0, 0),
+    "womens_day": ("三八节", (3, 8), 7, 1),
+    "618": ("618", (6, 18), 17, 2),
+    "double11": ("双十一", (11, 11), 10, 3),
+    "double12": ("双十二", (12, 12), 5, 2),
+    "spring_festival": ("春节", SPRING_FESTIVAL, 14, 7),
+    "mid_autumn": ("中秋", MID_AUTUMN, 7, 0),
+}
+LUNAR_EVENTS = ("spring_festival", "mid_autumn")
+
+
+def _occurrences(dates):
+    """事件在日历范围内（前后各多一年，保证边界处的距离正确）的发生日期"""
+    if isinstance(dates, tuple):
+        years = range(pd.Timestamp(CALENDAR_START).year - 1, pd.Timestamp(CALENDAR_END).year + 2)
+        return pd.DatetimeIndex([pd.Timestamp(year, *dates) for year in years])
+    return pd.DatetimeIndex(dates)
+
+
+def _distances(days, occurrences):
+    """每天距下一次 / 上一次事件的天数（当天为 0），向量化二分查找"""
+    occ = np.concatenate([[-10 ** 6], np.sort(occurrences), [10 ** 6]])
+    following = occ[np.searchsorted(occ, days, side="left")]
+    previous = occ[np.searchsorted(occ, days, side="right") - 1]
+    return np.minimum(following - days, MAX_DISTANCE), np.minimum(days - previous, MAX_DISTANCE)
+
+
+@functools.lru_cache(maxsize=1)
+def retail_calendar():
+    """
+    预计算的零售日历：每天一行的整数数组，按 (日期 - CALENDAR_START) 的天数直接下标访问
+    列：星期/周末/月/日、各事件的当天标记、预售期、售后期、距下一次/上一次事件天数，以及全部事件的汇总列
+    :return: (列名列表, int16 数组)
+    """
+    index = pd.date_range(CALENDAR_START, CALENDAR_END)
+    start = index[0]
+    days = (index - start).days.values
+    columns = {
+        "dayofweek": index.dayofweek,
+        "weekend": (index.dayofweek >= 5).astype(int),
+        "month": index.month,
+        "day": index.day,
+    }
+    to_any = np.full(len(index), MAX_DISTANCE)
+    from_any = np.full(len(index), MAX_DISTANCE)
+    presale, aftersale, event_day, lunar = (np.zeros(len(index), dtype=int) for _ in range(4))
+    for event, (_, dates, pre, post) in EVENTS.items():
+        to_event, from_event = _distances(days, (_occurrences(dates) - start).days.values)
+        is_event = (to_event == 0).astype(int)
+        is_pre = ((to_event >= 1) & (to_event <= pre)).astype(int)
+        is_post = ((from_event >= 1) & (from_event <= post)).astype(int)
+        columns.update({event: is_event, f"{event}_pre": is_pre, f"{event}_post": is_post,
+                        f"days_to_{event}": to_event, f"days_from_{event}": from_event})
+        event_day |= is_event
+        presale |= is_pre
+        aftersale |= is_post
+        if event in LUNAR_EVENTS:
+            lunar |= is_event
+        to_any = np.minimum(to_any, to_event)
+        from_any = np.minimum(from_any, from_event)
+    columns.update({"event_day": event_day, "presale": presale, "aftersale": aftersale, "lunar_holiday": lunar,
+                    "days_to_event": to_any, "days_from_event": from_any})
+    names = list(columns)
+    return names, np.column_stack([np.asarray(columns[name]) for name in names]).astype(np.int16)
+
+
+@functools.lru_cache(maxsize=1)
+def _column_positions():
+    return {name: i for i, name in enumerate(retail_calendar()[0])}
+
+
+def calendar_lookup(index, columns=None):
+    """
+    任意日期的日历特征：一次下标查表，不逐日比较月/日
+    :param columns: 需要的列，默认全部列
+    :return: DataFrame，索引为 index
+    """
+    index = pd.DatetimeIndex(index)
+    names, table = retail_calendar()
+    positions = (index.normalize() - pd.Timestamp(CALENDAR_START)).days.values
+    if len(positions) and (positions.min() < 0 or positions.max() >= len(table)):
+        raise ValueError(f"日期超出零售日历范围 {CALENDAR_START} ~ {CALENDAR_END}")
+    columns = list(columns) if columns is not None else names
+    lookup = _column_positions()
+    return pd.DataFrame(table[positions][:, [lookup[name] for name in columns]].astype(int), index=index,
+                        columns=columns)
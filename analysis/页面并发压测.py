@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 压测的页面脚本（相对项目根目录）
+PAGES = [
+    "首页.py",
+    "pages/1_📊_基本概况.py",
+    "pages/2_📈_预测分析.py",
+    "pages/3_🤼‍♂️_对比分析.py",
+]
+
+# 合成数据集对应的源文件（与 analysis/共享数据集.py 的 DATASETS 一致）
+REVIEW_FILES = {
+    "评论_真维斯_清洗后.xlsx": "rateDate",
+    "reviews_uni_clean.xlsx": "ratedate_dt",
+}
+ITEM_SALES_FILE = "真维斯_商品销售统计.xlsx"
+
+
+# -------------------------------------------------- 合成数据 -------------------------------------------------- #
+def make_synthetic_dataset(target_dir, source_dir="data", scale=1.0, seed=42):
+    """
+    生成合成数据集：对真实评论有放回地抽样 scale 倍行数，日期在当天内随机打散，
+    商品销售统计由合成评论重新计算；字段结构与真实数据一致，页面可直接运行
+    注意：本函数不能导入 analysis.共享数据集，数据目录在其导入时确定
+    """
+    from analysis.价格分层 import item_sales_table
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(target_dir, exist_ok=True)
+    for filename, date_column in REVIEW_FILES.items():
+        df = pd.read_excel(os.path.join(source_dir, filename))
+        rows = rng.integers(0, len(df), int(len(df) * scale))
+        sample = df.iloc[rows].reset_index(drop=True)
+        dates = pd.to_datetime(sample[date_column], errors="coerce")
+        sample[date_column] = dates.dt.normalize() + pd.to_timedelta(rng.integers(0, 86400, len(sample)), unit="s")
+        sample.to_excel(os.path.join(target_dir, filename), index=False)
+        if filename == "评论_真维斯_清洗后.xlsx":
+            item_sales_table(sample["_itemnumber_"], brand="真维斯").to_excel(
+                os.path.join(target_dir, ITEM_SALES_FILE), index=False)
+    return target_dir
+
+
+# -------------------------------------------------- 资源采样 -------------------------------------------------- #
+def current_rss():
+    """当前进程常驻内存（字节）；其他类 Unix 平台退化为峰值常驻内存，Windows 上不采样（返回 None）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if sys.platform == "win32":
+            return None
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class ResourceSampler:
+    """后台线程按固定间隔采样常驻内存，记录压测阶段内的峰值（无法采样时峰值为 None）"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def __enter__(self):
+        self.start_rss = current_rss()
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        self.cpu = time.process_time() - self.start_cpu
+        self.wall = time.perf_counter() - self.start_wall
+
+
+# -------------------------------------------------- 压测 -------------------------------------------------- #
+def render_page(path, timeout=600):
+    """
+    无界面运行一次页面脚本（模拟一个会话打开页面）
+    :return: (耗时秒, 异常信息列表)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    at = AppTest.from_file(path, default_timeout=timeout).run()
+    return time.perf_counter() - started, [str(e.value) for e in at.exception]
+
+
+def load_test_page(page, sessions=8, rounds=3, warmup=1, timeout=600):
+    """
+    对单个页面压测：sessions 个并发会话各渲染 rounds 次
+    同一进程内用线程模拟会话，与 Streamlit 服务共享 st.cache_resource / 进程资源的方式一致
+    :return: 指标 dict
+    """
+    path = os.path.join(ROOT, page)
+    for _ in range(warmup):
+        render_page(path, timeout)
+
+    with ResourceSampler() as sampler:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda _: render_page(path, timeout), range(sessions * rounds)))
+
+    latencies = np.array([seconds for seconds, _ in results])
+    errors = [message for _, messages in results for message in messages]
+    renders = len(results)
+    return {
+        "页面": page,
+        "并发会话": sessions,
+        "渲染次数": renders,
+        "失败次数": sum(1 for _, messages in results if messages),
+        "p50(s)": float(np.percentile(latencies, 50)),
+        "p95(s)": float(np.percentile(latencies, 95)),
+        "p99(s)": float(np.percentile(latencies, 99)),
+        "吞吐(次/s)": renders / sampler.wall,
+        "CPU(s/次)": sampler.cpu / renders,
+        "CPU利用率": sampler.cpu / sampler.wall / (os.cpu_count() or 1),
+        "峰值内存(MB)": sampler.peak / 2 ** 20 if sampler.peak is not None else float("nan"),
+        "内存增量(MB)": (sampler.peak - sampler.start_rss) / 2 ** 20 if sampler.peak is not None else float("nan"),
+        "异常示例": errors[:3],
+    }
+
+
+def run_load_test(pages=PAGES, sessions=8, rounds=3, warmup=1, timeout=600):
+    """依次压测各页面，返回指标 DataFrame"""
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    rows = []
+    for page in pages:
+        rows.append(load_test_page(page, sessions, rounds, warmup, timeout))
+        print(f"[{page}] p50={rows[-1]['p50(s)']:.2f}s p95={rows[-1]['p95(s)']:.2f}s "
+              f"p99={rows[-1]['p99(s)']:.2f}s 吞吐={rows[-1]['吞吐(次/s)']:.2f}次/s", flush=True)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrueTrend 页面并发压测（合成数据集，无界面渲染页面脚本）")
+    parser.add_argument("--page", action="append", choices=PAGES, help="只压测指定页面，可重复；默认全部页面")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8], help="并发会话数，可给多个做阶梯压测")
+    parser.add_argument("--rounds", type=int, default=3, help="每个会话渲染次数")
+    parser.add_argument("--warmup", type=int, default=1, help="正式计时前的预热渲染次数（填充缓存）")
+    parser.add_argument("--scale", type=float, default=1.0, help="合成数据相对真实数据的行数倍数")
+    parser.add_argument("--data-dir", help="合成数据目录；已存在时直接复用，默认新建临时目录")
+    parser.add_argument("--source-dir", default=os.path.join(ROOT, "data"), help="生成合成数据所用的真实数据目录")
+    parser.add_argument("--timeout", type=float, default=600, help="单次渲染超时（秒）")
+    parser.add_argument("--output", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="truetrend_loadtest_")
+    if not os.path.exists(os.path.join(data_dir, ITEM_SALES_FILE)):
+        print(f"生成合成数据集（{args.scale} 倍）: {data_dir}", flush=True)
+        make_synthetic_dataset(data_dir, args.source_dir, args.scale)
+    # 必须在导入页面与分析模块之前设置，共享数据集在导入时读取数据目录
+    os.environ["TRUETREND_DATA_DIR"] = os.path.abspath(data_dir)
+
+    reports = []
+    for sessions in args.sessions:
+        print(f"==== 并发会话 {sessions} ====", flush=True)
+        reports.append(run_load_test(args.page or PAGES, sessions, args.rounds, args.warmup, args.timeout))
+    report = pd.concat(reports, ignore_index=True)
+
+    with pd.option_context("display.max_columns", None, "display.width", 200, "display.precision", 2):
+        print(report.drop(columns="异常示例"))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(orient="records"), f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    # 用法：python -m analysis.页面并发压测 --sessions 1 4 8 --rounds 3
+    main()
@@ -0,0 +1,155 @@
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from analysis.模型参数 import DEFAULT_PARAMS, save_tuning_result, tuning_key
+from analysis.异常检测 import spike_flags_for
+from analysis.特征库 import FeatureStore, short_term_matrix, long_term_matrix
+
+# 搜索空间：模型超参数 × 特征选项
+SEARCH_SPACES = {
+    "short_term": {
+        "model": {
+            "n_estimators": [50, 100, 200, 300],
+            "max_depth": [4, 8, None],
+            "min_samples_leaf": [1, 3, 5],
+        },
+        "features": {
+            "n_lags": [3, 7, 14],
+            "rolling_window": [7, 14],
+        },
+    },
+    "long_term": {
+        "model": {
+            "n_estimators": [50, 100, 200],
+            "max_depth": [2, 3, 5],
+            "learning_rate": [0.05, 0.1, 0.3],
+        },
+        "features": {
+            "lags": [[1, 3, 7], [1, 2, 3, 7, 14]],
+            "volatility_window": [3, 7],
+        },
+    },
+}
+
+
+def _grid(space):
+    """将 {参数: [候选值]} 展开为配置列表"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def iter_configs(kind):
+    """枚举某类模型的全部候选配置"""
+    space = SEARCH_SPACES[kind]
+    return [{"model": m, "features": f} for f in _grid(space["features"]) for m in _grid(space["model"])]
+
+
+def build_training_data(kind, features, frame, spikes=None):
+    """从特征库的物化特征表按特征配置取训练矩阵，与预测模块使用同一份特征"""
+    if kind == "short_term":
+        return short_term_matrix(frame, '2015-11-01', '2016-01-31', **features)
+    X, y = long_term_matrix(frame, lags=features['lags'], volatility_window=features['volatility_window'],
+                            spikes=spikes)
+    data_clean = pd.concat([X, y], axis=1).dropna()
+    train_data = data_clean.loc['2015-11-01':'2016-01-31']
+    return train_data.iloc[:, :-1], train_data.iloc[:, -1]
+
+
+def make_model(kind, model_params):
+    """创建模型；在进程池中单线程训练，避免进程数 × 线程数超额占用 CPU"""
+    if kind == "short_term":
+        return RandomForestRegressor(**model_params, random_state=42, n_jobs=1)
+    return GradientBoostingRegressor(**model_params, random_state=42)
+
+
+def model_cost(model_params):
+    """模型的相对训练/预测成本，用于在精度相近时优先选择更小的模型"""
+    depth = model_params.get("max_depth") or 32
+    return model_params["n_estimators"] * depth
+
+
+def _evaluate_fold(task):
+    """进程池任务：在第 fold 折上训练并返回验证集 MAE"""
+    kind, config, frame, spikes, common_index, fold, n_splits = task
+    X, y = build_training_data(kind, config["features"], frame, spikes)
+    # 所有配置在同一批日期上评估，保证可比
+    X, y = X.loc[common_index], y.loc[common_index]
+    train_idx, test_idx = list(TimeSeriesSplit(n_splits=n_splits).split(X))[fold]
+    model = make_model(kind, config["model"])
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    pred = model.predict(X.iloc[test_idx])
+    return float(np.mean(np.abs(pred - y.iloc[test_idx].values)))
+
+
+def search(kind, n_splits=4, eta=2, tolerance=0.01, workers=None):
+    """
+    时间序列交叉验证 + 逐折淘汰（successive halving）的并行超参数搜索
+    每完成一折只保留平均误差最好的 1/eta 配置进入下一折，提前淘汰无望的配置
+    :param tolerance: 误差在最优值 (1 + tolerance) 以内时选择成本最低的配置
+    :return: 调参结果 dict（同时写入缓存目录）
+    """
+    started = time.time()
+    frame = FeatureStore().refresh('真维斯')
+    spikes = spike_flags_for('真维斯', frame['value']) if kind == "long_term" else None
+    configs = iter_configs(kind)
+
+    # 各特征配置去掉缺失后可用日期的交集
+    common_index = None
+    for features in _grid(SEARCH_SPACES[kind]["features"]):
+        index = build_training_data(kind, features, frame, spikes)[0].index
+        common_index = index if common_index is None else common_index.intersection(index)
+
+    scores = {i: [] for i in range(len(configs))}
+    alive = list(range(len(configs)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for fold in range(n_splits):
+            tasks = [(kind, configs[i], frame, spikes, common_index, fold, n_splits) for i in alive]
+            for i, mae in zip(alive, pool.map(_evaluate_fold, tasks)):
+                scores[i].append(mae)
+            alive.sort(key=lambda i: np.mean(scores[i]))
+            if fold < n_splits - 1:
+                alive = alive[:max(1, int(np.ceil(len(alive) / eta)))]
+            print(f"[{kind}] 第 {fold + 1}/{n_splits} 折完成，保留 {len(alive)} 个配置")
+
+    best_mae = float(np.mean(scores[alive[0]]))
+    candidates = [i for i in alive if np.mean(scores[i]) <= best_mae * (1 + tolerance)]
+    best = min(candidates, key=lambda i: model_cost(configs[i]["model"]))
+
+    leaderboard = sorted(scores, key=lambda i: (-len(scores[i]), np.mean(scores[i])))
+    result = {
+        "kind": kind,
+        **tuning_key(kind),
+        "searched_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "elapsed_seconds": round(time.time() - started, 1),
+        "n_configs": len(configs),
+        "n_splits": n_splits,
+        "best_params": configs[best],
+        "best_mae": float(np.mean(scores[best])),
+        "default_params": DEFAULT_PARAMS[kind],
+        "leaderboard": [
+            {"params": configs[i], "mae": float(np.mean(scores[i])), "folds": len(scores[i])}
+            for i in leaderboard[:20]
+        ],
+    }
+    save_tuning_result(kind, result)
+    return result
+
+
+if __name__ == "__main__":
+    # 用法：python -m analysis.预测模型调参 [--kind short_term] [--kind long_term] --workers 4
+    parser = argparse.ArgumentParser(description="预测模型时间序列交叉验证调参")
+    parser.add_argument("--kind", dest="kinds", action="append", choices=list(SEARCH_SPACES), help="要调参的模型，可重复，默认全部")
+    parser.add_argument("--splits", type=int, default=4, help="时间序列交叉验证折数")
+    parser.add_argument("--eta", type=int, default=2, help="每折淘汰比例")
+    parser.add_argument("--workers", type=int, default=None, help="进程池大小，默认 CPU 核数")
+    args = parser.parse_args()
+
+    for kind in args.kinds or list(SEARCH_SPACES):
+        result = search(kind, n_splits=args.splits, eta=args.eta, workers=args.workers)
+        print(f"[{kind}] 最佳配置: {result['best_params']}，MAE={result['best_mae']:.2f}，"
+              f"耗时 {result['elapsed_seconds']}s")
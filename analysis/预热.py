@@ -0,0 +1,71 @@
+import time
+import importlib
+import threading
+from analysis.共享数据集 import DATASETS, publish_all, load_table
+
+# 预导入的模块：图表库、模型库以及各页面用到的分析模块
+WARM_UP_MODULES = [
+    "altair",
+    "scipy.sparse",
+    "sklearn.ensemble",
+    "analysis.真维斯数据展示",
+    "analysis.真维斯颜色方面统计",
+    "analysis.真维斯销售与时间统计",
+    "analysis.真维斯其他方面统计",
+    "analysis.真维斯销售量短期预测",
+    "analysis.真维斯销售量长期预测",
+    "analysis.真维斯16年双十一预测",
+    "analysis.真维斯单品预测",
+    "analysis.真维斯优衣库对比分析",
+    "analysis.异常检测",
+    "analysis.评论词趋势",
+    "analysis.促销情景模拟",
+    "analysis.复购分析",
+    "analysis.商品相似度",
+    "analysis.结果导出",
+]
+
+
+def warm_up():
+    """
+    预导入重型模块并预加载共享数据集（发布 Arrow 文件并建立内存映射）
+    :return: 各步骤耗时（秒）
+    """
+    timings = {}
+    for name in WARM_UP_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    publish_all()
+    for name in DATASETS:
+        load_table(name)
+    timings["datasets"] = time.perf_counter() - started
+    return timings
+
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+
+def start_warm_up():
+    """
+    每个服务进程只执行一次：在后台线程中预热，不阻塞当前页面渲染
+    本模块被导入时自动调用；首页与各页面都把本模块放在第一个导入，先于页面自身的重型导入触发
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, name="truetrend-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+if __name__ == "__main__":
+    # 部署时执行：python -m analysis.预热，提前在缓存目录生成共享数据文件（Arrow / 分区），
+    # 服务进程启动后直接映射已有文件；模块导入与内存映射只对本进程有效，服务进程仍在导入本模块时自行预热
+    for step, seconds in warm_up().items():
+        print(f"{step}: {seconds:.2f}s")
+else:
+    start_warm_up()
@@ -1,7 +1,14 @@
+import os
 import pandas as pd
+# 价格分层规则与看板共用 analysis/价格分层.py，需在项目根目录以模块方式运行：
+#   python -m data_clean.真维斯数据清洗
+from analysis.价格分层 import item_sales_table
+
+# 原始数据与清洗结果都在项目根目录的 data 目录下（与看板读取的位置一致）
+DATA_DIR = 'data'
 
 # 读取文件
-excel_file = pd.ExcelFile('评论_真维斯.xls')
+excel_file = pd.ExcelFile(os.path.join(DATA_DIR, '评论_真维斯.xls'))
 
 # 获取所有表名
 sheet_names = excel_file.sheet_names
@@ -58,26 +65,13 @@ df['rateDate'] = pd.to_datetime(df['rateDate'])
 
 # -----------------------------------------------------
 # ✅ 统计每个商品编号的评论数量（近似销售量）
+# ✅ 方法 3：按销量估计价格（分层规则见 analysis/价格分层.py）
 # -----------------------------------------------------
-item_sales = df['_itemnumber_'].value_counts().reset_index()
-item_sales.columns = ['_itemnumber_', 'comment_count']
-
-# -----------------------------------------------------
-# ✅ 方法 3：按销量估计价格
-# -----------------------------------------------------
-def estimate_by_sales(sales_count):
-    if sales_count >= 200:
-        return 145  # 热卖款
-    elif sales_count >= 100:
-        return 175
-    else:
-        return 240
-
-item_sales['estimated_price_by_sales'] = item_sales['comment_count'].apply(estimate_by_sales)
+item_sales = item_sales_table(df['_itemnumber_'], brand='真维斯')
 
 # 将清洗后的数据保存为 xlsx 文件
-xlsx_path = '评论_真维斯_清洗后.xlsx'
+xlsx_path = os.path.join(DATA_DIR, '评论_真维斯_清洗后.xlsx')
 df.to_excel(xlsx_path, index=False)
 # 2. 保存商品销售统计表，含估计价格
-item_sales.to_excel('真维斯_商品销售统计.xlsx', index=False)
+item_sales.to_excel(os.path.join(DATA_DIR, '真维斯_商品销售统计.xlsx'), index=False)
 print("✅ 已成功生成并保存包含估计价格的销售统计文件！")
@@ -1,9 +1,15 @@
 import streamlit as st
+import analysis.预热  # noqa: F401  导入即在后台预热（每个进程一次），放在页面自身的重型导入之前
 import altair as alt
+import pandas as pd
 from analysis.真维斯数据展示 import load_and_process_data
 from analysis.真维斯颜色方面统计 import load_color_data
 from analysis.真维斯销售与时间统计 import sales_time_analysis
 from analysis.真维斯其他方面统计 import get_sentiment_distribution
+from analysis.异常检测 import refresh_anomalies
+from analysis.评论词趋势 import term_matrix, top_rising_terms
+from analysis.分段渲染 import render_sections, widget_value
+from analysis.结果导出 import export_frame, export_reviews
 
 st.set_page_config(page_title="基本概况", page_icon="📊")
 
@@ -15,158 +21,257 @@ st.write(
     通过这些图表，你可以直观地了解品牌的销售趋势和消费者偏好。"""
 )
 
+# 侧边栏占位（各分段单独重跑时在原位置更新）
+summary_slot = st.sidebar.empty()
+anomaly_slot = st.sidebar.empty()
+
 # ===================== 基本销售统计可视化模块 ====================
-# 加载数据
-all_by_quantity, all_by_revenue = load_and_process_data()
-
-# 显示销售量图表
-st.markdown("### 商品销售量统计")
-all_by_quantity = all_by_quantity.reset_index()
-all_by_quantity.columns = ['商品编号', '销售量']
-st.altair_chart(
-    alt.Chart(all_by_quantity).mark_bar().encode(
-        x=alt.X('商品编号:N', sort='-y'),
-        y=alt.Y('销售量:Q', title='销售量'),
-        color=alt.value('#4B96E9')  
-    ).interactive()
-)
+@st.fragment
+def basic_section(prefetched):
+    # 加载数据
+    all_by_quantity, all_by_revenue = prefetched.get(load_and_process_data)
 
-# 显示销售额图表 
-st.markdown("### 商品销售额统计")
-all_by_revenue = all_by_revenue.reset_index()
-all_by_revenue.columns = ['商品编号', '销售额']
-st.altair_chart(
-    alt.Chart(all_by_revenue).mark_bar().encode(
-        x=alt.X('商品编号:N', sort='-y'),
-        y=alt.Y('销售额:Q', title='销售额'),
-        color=alt.value('#FF6B6B')  
-    ).interactive()
-)
+    # 显示销售量图表
+    st.markdown("### 商品销售量统计")
+    all_by_quantity = all_by_quantity.reset_index()
+    all_by_quantity.columns = ['商品编号', '销售量']
+    st.altair_chart(
+        alt.Chart(all_by_quantity).mark_bar().encode(
+            x=alt.X('商品编号:N', sort='-y'),
+            y=alt.Y('销售量:Q', title='销售量'),
+            color=alt.value('#4B96E9')  
+        ).interactive()
+    )
+
+    # 显示销售额图表 
+    st.markdown("### 商品销售额统计")
+    all_by_revenue = all_by_revenue.reset_index()
+    all_by_revenue.columns = ['商品编号', '销售额']
+    st.altair_chart(
+        alt.Chart(all_by_revenue).mark_bar().encode(
+            x=alt.X('商品编号:N', sort='-y'),
+            y=alt.Y('销售额:Q', title='销售额'),
+            color=alt.value('#FF6B6B')  
+        ).interactive()
+    )
+    export_frame("商品销售统计", all_by_quantity.merge(all_by_revenue, on='商品编号', how='outer'), "export_item_sales")
+
+    # 显示统计信息
+    with summary_slot.container():
+        st.markdown("### 统计摘要")
+        st.metric("平均销量", f"{all_by_quantity['销售量'].mean():,.0f}件")
+        st.metric("平均销售额", f"¥{all_by_revenue['销售额'].mean():,.0f}")
 
-# 显示统计信息
-with st.sidebar:
-    st.markdown("### 统计摘要")
-    st.metric("平均销量", f"{all_by_quantity['销售量'].mean():,.0f}件")
-    st.metric("平均销售额", f"¥{all_by_revenue['销售额'].mean():,.0f}")
 
 # ===================== 颜色统计可视化模块 ====================
-# 加载数据
-quantity_top10_colors, revenue_top10_colors = load_color_data()
-
-# 显示销售量最高的10种颜色商品
-st.markdown("### 销售量最高的10种颜色商品")
-color_data_qty = quantity_top10_colors.reset_index()
-color_data_qty.columns = ['颜色', '销售量']
-
-# 自定义颜色映射
-color_mapping = {
-    '黑色': '#000000',
-    '深蓝色': '#00008B',
-    '宝蓝色': '#1E90FF',
-    '中蓝色': '#4169E1',
-    '浅蓝色': '#87CEFA',
-    '中灰色': "#9C9C9C",
-    '青军绿': '#556B2F',
-    '靛蓝色': "#4B0082",
-    '深花灰': "#484747",
-    '彩蓝': '#4682B4'
-}
-
-st.altair_chart(
-    alt.Chart(color_data_qty).mark_bar().encode(
-        x=alt.X('颜色:N', sort='-y', axis=alt.Axis(labelAngle=0)),  
-        y=alt.Y('销售量:Q', title='总销售量'),
-        color=alt.Color('颜色:N', scale=alt.Scale(domain=list(color_mapping.keys()),
-                                                range=list(color_mapping.values())),
-                        legend=None), 
-    ).interactive()
-)
+@st.fragment
+def color_section(prefetched):
+    # 加载数据
+    quantity_top10_colors, revenue_top10_colors = prefetched.get(load_color_data)
+
+    # 显示销售量最高的10种颜色商品
+    st.markdown("### 销售量最高的10种颜色商品")
+    color_data_qty = quantity_top10_colors.reset_index()
+    color_data_qty.columns = ['颜色', '销售量']
+
+    # 自定义颜色映射
+    color_mapping = {
+        '黑色': '#000000',
+        '深蓝色': '#00008B',
+        '宝蓝色': '#1E90FF',
+        '中蓝色': '#4169E1',
+        '浅蓝色': '#87CEFA',
+        '中灰色': "#9C9C9C",
+        '青军绿': '#556B2F',
+        '靛蓝色': "#4B0082",
+        '深花灰': "#484747",
+        '彩蓝': '#4682B4'
+    }
+
+    st.altair_chart(
+        alt.Chart(color_data_qty).mark_bar().encode(
+            x=alt.X('颜色:N', sort='-y', axis=alt.Axis(labelAngle=0)),  
+            y=alt.Y('销售量:Q', title='总销售量'),
+            color=alt.Color('颜色:N', scale=alt.Scale(domain=list(color_mapping.keys()),
+                                                    range=list(color_mapping.values())),
+                            legend=None), 
+        ).interactive()
+    )
+
+    # 颜色销售额Top10
+    st.markdown("### 销售额最高的10种颜色商品")
+    color_data_rev = revenue_top10_colors[['商品颜色', '总销售额']].copy()
+    color_data_rev.columns = ['颜色', '销售额']
+
+
+    # 自定义颜色映射
+    color_mapping = {
+        '黑色': '#000000',
+        '深蓝色': '#00008B',
+        '宝蓝色': '#1E90FF',
+        '中蓝色': '#4169E1',
+        '浅蓝色': '#87CEFA',
+        '米白': '#F5F5DC',
+        '青军绿': '#556B2F',
+        '水蓝色': '#ADD8E6',
+        '橙红': '#FF4500',
+        '彩蓝': '#4682B4'
+    }
+
+    # 构造Altair图表
+    st.altair_chart(
+        alt.Chart(color_data_rev).mark_bar().encode(
+            x=alt.X('颜色:N', sort='-y', axis=alt.Axis(labelAngle=0)),  
+            y=alt.Y('销售额:Q', title='总销售额'),
+            color=alt.Color('颜色:N', scale=alt.Scale(domain=list(color_mapping.keys()),
+                                                    range=list(color_mapping.values())),
+                            legend=None), 
+        ).interactive()
+    )
+    export_frame("颜色销售统计", revenue_top10_colors, "export_colors")
 
-# 颜色销售额Top10
-st.markdown("### 销售额最高的10种颜色商品")
-color_data_rev = revenue_top10_colors[['商品颜色', '总销售额']].copy()
-color_data_rev.columns = ['颜色', '销售额']
-
-
-# 自定义颜色映射
-color_mapping = {
-    '黑色': '#000000',
-    '深蓝色': '#00008B',
-    '宝蓝色': '#1E90FF',
-    '中蓝色': '#4169E1',
-    '浅蓝色': '#87CEFA',
-    '米白': '#F5F5DC',
-    '青军绿': '#556B2F',
-    '水蓝色': '#ADD8E6',
-    '橙红': '#FF4500',
-    '彩蓝': '#4682B4'
-}
-
-# 构造Altair图表
-st.altair_chart(
-    alt.Chart(color_data_rev).mark_bar().encode(
-        x=alt.X('颜色:N', sort='-y', axis=alt.Axis(labelAngle=0)),  
-        y=alt.Y('销售额:Q', title='总销售额'),
-        color=alt.Color('颜色:N', scale=alt.Scale(domain=list(color_mapping.keys()),
-                                                range=list(color_mapping.values())),
-                        legend=None), 
-    ).interactive()
-)
 
 # ===================== 销售与时间的统计可视化模块 ====================
-# 加载数据
-daily_counts, monthly_counts, peak_daily = sales_time_analysis()
-
-# 显示每日销售数量统计
-st.markdown("### 每日销售数量统计")
-daily_counts = daily_counts.reset_index()
-daily_counts.columns = ['日期', '销售量']
-st.altair_chart(
-    alt.Chart(daily_counts).mark_area().encode(
-        x=alt.X('日期:T', title='日期', sort='ascending'),
+@st.fragment
+def sales_time_section(prefetched):
+    # 加载数据
+    daily_counts, monthly_counts, peak_daily = prefetched.get(sales_time_analysis)
+
+    # 显示每日销售数量统计
+    st.markdown("### 每日销售数量统计")
+    daily_counts = daily_counts.reset_index()
+    daily_counts.columns = ['日期', '销售量']
+    st.altair_chart(
+        alt.Chart(daily_counts).mark_area().encode(
+            x=alt.X('日期:T', title='日期', sort='ascending'),
+            y=alt.Y('销售量:Q', title='销售量'),
+            color=alt.value('#4B96E9')
+        ).interactive()
+    )
+
+    # 显示每月销售数量统计
+    st.markdown("### 月度销售数量统计")
+    monthly_counts = monthly_counts.to_timestamp()
+    monthly_counts = monthly_counts.reset_index()
+    monthly_counts.columns = ['月份', '销售量']
+    st.altair_chart(
+        alt.Chart(monthly_counts).mark_line().encode(
+            x=alt.X('月份:T', title='月份', sort='ascending'),
+            y=alt.Y('销售量:Q', title='销售量'),
+            color=alt.value('#FF6B6B')
+        ).interactive()
+    )
+
+    # 显示高峰期间每日销售趋势
+    st.markdown("### 高峰期间每日销售趋势")
+    peak_daily = peak_daily.reset_index()
+    peak_daily.columns = ['日期', '销售量']
+    st.altair_chart(
+        alt.Chart(peak_daily).mark_line().encode(
+            x=alt.X('日期:T', title='日期', sort='ascending'),
+            y=alt.Y('销售量:Q', title='销售量'),
+            color=alt.value("#3EAB5F")
+        ).interactive()
+    )
+    export_frame("每日销售数量", daily_counts, "export_daily_counts")
+
+
+# ===================== 评论情感统计可视化模块 ====================
+@st.fragment
+def sentiment_section(prefetched):
+    # 加载数据
+    sentiment_method = st.radio(
+        "情感分析方法", ['keyword', 'model'],
+        format_func={'keyword': '关键词规则', 'model': '模型分类'}.get,
+        horizontal=True, key="sentiment_method"
+    )
+    sentiment_stats = prefetched.get(get_sentiment_distribution, method=sentiment_method)
+
+    # 显示情感分布图表
+    st.markdown("### 评论情感分布")
+    sentiment_stats = sentiment_stats.reset_index()
+    sentiment_stats.columns = ['情感分类', '数量']
+    st.altair_chart(
+        alt.Chart(sentiment_stats).mark_arc().encode(
+            theta=alt.Theta('数量:Q', title='评论数量'),
+            color=alt.Color('情感分类:N', title='情感分类')
+        ).interactive()
+    )
+
+
+# ===================== 评论热词趋势可视化模块 ====================
+@st.fragment
+def term_trend_section(prefetched):
+    # 加载数据（词 × 月份计数按分区增量维护，渲染时不重新扫描评论文本）
+    terms = prefetched.get(term_matrix, brand="真维斯")
+
+    st.markdown("### 评论热词趋势")
+    # 只列出上一个自然月也有评论的月份（缺月的月份无法计算环比）
+    term_month = st.selectbox("月份", terms.comparable_months()[::-1], key="term_month")
+    rising_terms = top_rising_terms("真维斯", month=term_month, top_n=10)
+    st.dataframe(rising_terms.style.format({'本月提及率': '{:.2%}', '上月提及率': '{:.2%}', '提及率变化': '{:+.2%}'}))
+    export_cols = st.columns(2)
+    with export_cols[0]:
+        export_frame(f"{term_month}上升热词", rising_terms, "export_rising_terms")
+    with export_cols[1]:
+        # 所选月份的评论明细，按月份分区逐批扫描导出
+        month_start = pd.Timestamp(f"{term_month}-01")
+        export_reviews(f"{term_month}评论明细", "评论_真维斯_清洗后", month_start,
+                       month_start + pd.offsets.MonthEnd(1) + pd.Timedelta(hours=23, minutes=59, seconds=59),
+                       widget_key="export_month_reviews")
+
+    # 显示上升热词的月度提及率
+    term_share = terms.series(rising_terms['词'].head(5).tolist()).reset_index(names='月份')
+    term_share = term_share.melt(id_vars='月份', var_name='词', value_name='提及率')
+    st.altair_chart(
+        alt.Chart(term_share).mark_line(point=True).encode(
+            x=alt.X('月份:N', title='月份'),
+            y=alt.Y('提及率:Q', title='提及率', axis=alt.Axis(format='%')),
+            color=alt.Color('词:N', title='词')
+        ).interactive()
+    )
+
+
+# ===================== 异常日检测可视化模块 ====================
+@st.fragment
+def anomaly_section(prefetched):
+    # 加载数据（检测器状态持久化，每次只处理新到的日期）
+    detector, anomaly_series = prefetched.get(refresh_anomalies)
+
+    st.markdown("### 异常日检测")
+    anomaly_key = st.selectbox("监控序列", list(anomaly_series), key="anomaly_key")
+    series_df = anomaly_series[anomaly_key].reset_index()
+    series_df.columns = ['日期', '销售量']
+    anomaly_df = detector.anomaly_frame(anomaly_key).drop(columns='序列')
+    anomaly_df.columns = ['日期', '销售量', '期望值', '偏离程度']
+
+    line_chart = alt.Chart(series_df).mark_line().encode(
+        x=alt.X('日期:T', title='日期'),
         y=alt.Y('销售量:Q', title='销售量'),
         color=alt.value('#4B96E9')
-    ).interactive()
-)
+    )
+    anomaly_points = alt.Chart(anomaly_df).mark_point(filled=True, size=60).encode(
+        x='日期:T',
+        y='销售量:Q',
+        color=alt.value('#FF6B6B'),
+        tooltip=['日期:T', '销售量:Q', alt.Tooltip('期望值:Q', format='.1f'), alt.Tooltip('偏离程度:Q', format='.1f')]
+    )
+    st.altair_chart((line_chart + anomaly_points).interactive())
+    st.dataframe(anomaly_df.sort_values('日期', ascending=False))
+    export_frame("异常日", anomaly_df, "export_anomalies")
 
-# 显示每月销售数量统计
-st.markdown("### 月度销售数量统计")
-monthly_counts = monthly_counts.to_timestamp()
-monthly_counts = monthly_counts.reset_index()
-monthly_counts.columns = ['月份', '销售量']
-st.altair_chart(
-    alt.Chart(monthly_counts).mark_line().encode(
-        x=alt.X('月份:T', title='月份', sort='ascending'),
-        y=alt.Y('销售量:Q', title='销售量'),
-        color=alt.value('#FF6B6B')
-    ).interactive()
-)
+    with anomaly_slot.container():
+        st.metric("检测到的异常日", f"{len(anomaly_df)}天")
 
-# 显示高峰期间每日销售趋势
-st.markdown("### 高峰期间每日销售趋势")
-peak_daily = peak_daily.reset_index()
-peak_daily.columns = ['日期', '销售量']
-st.altair_chart(
-    alt.Chart(peak_daily).mark_line().encode(
-        x=alt.X('日期:T', title='日期', sort='ascending'),
-        y=alt.Y('销售量:Q', title='销售量'),
-        color=alt.value("#3EAB5F")
-    ).interactive()
-)
 
-# ===================== 评论情感统计可视化模块 ====================
-# 加载数据
-sentiment_stats = get_sentiment_distribution()
-
-# 显示情感分布图表
-st.markdown("### 评论情感分布")
-sentiment_stats = sentiment_stats.reset_index()
-sentiment_stats.columns = ['情感分类', '数量']
-st.altair_chart(
-    alt.Chart(sentiment_stats).mark_arc().encode(
-        theta=alt.Theta('数量:Q', title='评论数量'),
-        color=alt.Color('情感分类:N', title='情感分类')
-    ).interactive()
-)
+# 各分段先放置占位，数据并发加载，哪个分段先加载完就先显示；交互时只重跑所在分段
+render_sections([
+    (basic_section, load_and_process_data, {}),
+    (color_section, load_color_data, {}),
+    (sales_time_section, sales_time_analysis, {}),
+    (sentiment_section, get_sentiment_distribution, {"method": widget_value("sentiment_method", "keyword")}),
+    (term_trend_section, term_matrix, {"brand": "真维斯"}),
+    (anomaly_section, refresh_anomalies, {}),
+])
 
-st.button("重新加载")
\ No newline at end of file
+st.button("重新加载")
@@ -1,10 +1,17 @@
 import streamlit as st
+import analysis.预热  # noqa: F401  导入即在后台预热（每个进程一次），放在页面自身的重型导入之前
 import altair as alt
 import pandas as pd
 import numpy as np
 from analysis.真维斯销售量短期预测 import predict_and_analyze
 from analysis.真维斯销售量长期预测 import long_term_predict_and_analyze
 from analysis.真维斯16年双十一预测 import predict_sales_11
+from analysis.统计预测基线 import BASELINE_METHODS
+from analysis.直方图梯度提升 import HIST_ENGINE, HIST_LABEL
+from analysis.真维斯单品预测 import forecast_items
+from analysis.促销情景模拟 import WINDOWS, PRICE_SCHEMES, scenario_grid, simulate
+from analysis.分段渲染 import render_sections, widget_value
+from analysis.结果导出 import export_frame
 
 st.set_page_config(page_title="预测分析", page_icon="📈")
 
@@ -16,80 +23,214 @@ st.write(
     通过这些预测图表，你可以了解未来的销售趋势和预期销量。"""
 )
 
+# 可选预测模型：机器学习模型 + 轻量统计基线
+baseline_labels = {name: label for name, (label, _) in BASELINE_METHODS.items()}
+short_term_methods = {'random_forest': '随机森林', HIST_ENGINE: HIST_LABEL, **baseline_labels}
+long_term_methods = {'gradient_boosting': '梯度提升', HIST_ENGINE: HIST_LABEL, **baseline_labels}
+
+# 侧边栏提示占位（各分段单独重跑时在原位置更新）
+st.sidebar.markdown("### 提示")
+short_term_hint = st.sidebar.empty()
+long_term_hint = st.sidebar.empty()
+
 # ===================== 销售短期预测可视化模块 ====================
-# 加载数据
-daily_comments, pred_index, predictions, result_df = predict_and_analyze()
-
-# 将结果转换为DataFrame
-chart_data = pd.DataFrame({
-    '日期': daily_comments.index.to_list() + pred_index.to_list(),
-    '销量': daily_comments.to_list() + predictions,
-    '类型': ['实际数据'] * len(daily_comments) + ['预测数据'] * len(predictions)
-})
-
-st.markdown("### 销售量短期预测")
-st.altair_chart(
-    alt.Chart(chart_data).mark_line().encode(
+@st.fragment
+def short_term_section(prefetched):
+    # 加载数据
+    short_term_method = st.selectbox(
+        "短期预测模型", list(short_term_methods), format_func=short_term_methods.get, key="short_term_method"
+    )
+    daily_comments, pred_index, predictions, result_df = prefetched.get(predict_and_analyze, method=short_term_method)
+
+    # 将结果转换为DataFrame
+    chart_data = pd.DataFrame({
+        '日期': daily_comments.index.to_list() + pred_index.to_list(),
+        '销量': daily_comments.to_list() + predictions,
+        '类型': ['实际数据'] * len(daily_comments) + ['预测数据'] * len(predictions)
+    })
+
+    st.markdown("### 销售量短期预测")
+    short_term_chart = alt.Chart(chart_data).mark_line().encode(
         x=alt.X('日期:T', title='日期'),
         y=alt.Y('销量:Q', title='销量'),
         color=alt.Color('类型:N', title='数据类型')
-    ).interactive()
-)
+    )
+    # 分位数模型的预测区间
+    if '预测下限' in result_df.columns:
+        short_term_chart = alt.Chart(result_df).mark_area(opacity=0.2, color='#FF6B6B').encode(
+            x='日期:T', y='预测下限:Q', y2='预测上限:Q'
+        ) + short_term_chart
+    st.altair_chart(short_term_chart.interactive())
 
-st.dataframe(result_df)
+    st.dataframe(result_df)
+    export_frame("短期预测结果", result_df, "export_short_term")
+
+    # 在左侧sidebar中统计信息
+    short_term_hint.markdown(f"短期预测: **{pred_index[0].strftime('%Y-%m-%d')}——{pred_index[-1].strftime('%Y-%m-%d')}**")
 
-# 在左侧sidebar中统计信息
-with st.sidebar:
-    st.markdown("### 提示")
-    st.markdown(f"短期预测: **{pred_index[0].strftime('%Y-%m-%d')}——{pred_index[-1].strftime('%Y-%m-%d')}**")
 
 # ===================== 销售长期预测可视化模块 ====================
-# 加载数据
-daily_comments, future_dates, long_term_predictions, forecast_df = long_term_predict_and_analyze()
-
-# 将结果转换为DataFrame
-long_term_chart_data = pd.DataFrame({
-    '日期': daily_comments.index.to_list() + future_dates.to_list(),
-    '销量': daily_comments.to_list() + long_term_predictions,
-    '类型': ['实际数据'] * len(daily_comments) + ['预测数据'] * len(long_term_predictions)
-})
-
-st.markdown("### 销售量长期预测")
-st.altair_chart(
-    alt.Chart(long_term_chart_data).mark_line().encode(
+@st.fragment
+def long_term_section(prefetched):
+    # 加载数据
+    long_term_method = st.selectbox(
+        "长期预测模型", list(long_term_methods), format_func=long_term_methods.get, key="long_term_method"
+    )
+    daily_comments, future_dates, long_term_predictions, forecast_df = prefetched.get(
+        long_term_predict_and_analyze, method=long_term_method)
+
+    # 将结果转换为DataFrame
+    long_term_chart_data = pd.DataFrame({
+        '日期': daily_comments.index.to_list() + future_dates.to_list(),
+        '销量': daily_comments.to_list() + long_term_predictions,
+        '类型': ['实际数据'] * len(daily_comments) + ['预测数据'] * len(long_term_predictions)
+    })
+
+    st.markdown("### 销售量长期预测")
+    long_term_chart = alt.Chart(long_term_chart_data).mark_line().encode(
         x=alt.X('日期:T', title='日期'),
         y=alt.Y('销量:Q', title='销量'),
         color=alt.Color('类型:N', title='数据类型')
-    ).interactive()
-)
-
-st.dataframe(forecast_df)
+    )
+    # 分位数模型的预测区间
+    if '预测下限' in forecast_df.columns:
+        long_term_chart = alt.Chart(forecast_df).mark_area(opacity=0.2, color='#FF6B6B').encode(
+            x='日期:T', y='预测下限:Q', y2='预测上限:Q'
+        ) + long_term_chart
+    st.altair_chart(long_term_chart.interactive())
 
-# 在左侧sidebar中统计信息
-with st.sidebar:
-    st.markdown(f"长期预测: **{future_dates[0].strftime('%Y-%m-%d')}——{future_dates[-1].strftime('%Y-%m-%d')}**")
+    st.dataframe(forecast_df)
+    export_frame("长期预测结果", forecast_df, "export_long_term")
 
-# ===================== 16年双十一销售预测可视化模块 ====================
-# 加载数据
-days, daily_pred, result = predict_sales_11()
-
-# 将结果转换为DataFrame
-daily_11_df = pd.DataFrame({
-    '日期': [f"2016-11-{day:02d}" for day in days],
-    '销量': daily_pred.values,
-    '类型': ['预测数据'] * len(days)
-})
-
-# 使用Altair绘制图表
-st.markdown("### 2016年11月每日销量预测（双十一预测）")
-st.altair_chart(
-    alt.Chart(daily_11_df).mark_line().encode(
-        x=alt.X('日期:T', title='日期'),
-        y=alt.Y('销量:Q', title='销量'),
-        color=alt.Color('类型:N', title='数据类型')
-    ).interactive()
-)
+    # 在左侧sidebar中统计信息
+    long_term_hint.markdown(f"长期预测: **{future_dates[0].strftime('%Y-%m-%d')}——{future_dates[-1].strftime('%Y-%m-%d')}**")
 
-st.dataframe(result)
 
-st.button("重新加载")
\ No newline at end of file
+# ===================== 16年双十一销售预测可视化模块 ====================
+@st.fragment
+def double11_section(prefetched):
+    # 加载数据
+    days, daily_pred, result = prefetched.get(predict_sales_11)
+
+    # 将结果转换为DataFrame
+    daily_11_df = pd.DataFrame({
+        '日期': [f"2016-11-{day:02d}" for day in days],
+        '销量': daily_pred.values,
+        '类型': ['预测数据'] * len(days)
+    })
+
+    # 使用Altair绘制图表
+    st.markdown("### 2016年11月每日销量预测（双十一预测）")
+    st.altair_chart(
+        alt.Chart(daily_11_df).mark_line().encode(
+            x=alt.X('日期:T', title='日期'),
+            y=alt.Y('销量:Q', title='销量'),
+            color=alt.Color('类型:N', title='数据类型')
+        ).interactive()
+    )
+
+    st.dataframe(result)
+    export_frame("双十一预测结果", result, "export_double11")
+
+
+# ===================== 促销情景模拟模块 ====================
+@st.fragment
+def scenario_section(prefetched):
+    st.markdown("### 促销情景模拟（What-if）")
+    scenario_window = st.selectbox("预测窗口", list(WINDOWS), key="scenario_window")
+    double11_range = st.slider("双十一提升幅度范围", -0.5, 2.0, (-0.5, 1.0), 0.1, key="double11_range")
+    double12_range = st.slider("双十二提升幅度范围", -0.5, 2.0, (-0.5, 1.0), 0.1, key="double12_range")
+    growth_caps = st.multiselect("增长上限（倍）", [1.0, 1.2, 1.5, 2.0], default=[1.0, 1.2, 1.5, 2.0])
+    price_schemes = st.multiselect("价格方案", list(PRICE_SCHEMES), default=list(PRICE_SCHEMES))
+
+    if growth_caps and price_schemes:
+        # 假设网格的全部组合（按情景哈希缓存，重复查询直接读取）
+        scenarios = scenario_grid(
+            double11_uplift=list(np.round(np.arange(double11_range[0], double11_range[1] + 1e-9, 0.1), 2)),
+            double12_uplift=list(np.round(np.arange(double12_range[0], double12_range[1] + 1e-9, 0.1), 2)),
+            growth_cap=growth_caps,
+            price_scheme=price_schemes,
+            window=[scenario_window],
+        )
+        scenario_results = simulate(scenarios)
+        st.caption(f"共 {len(scenario_results)} 个情景")
+
+        # 热力图：双十一 × 双十二 提升幅度
+        heat_cap = st.selectbox("热力图增长上限", growth_caps, index=len(growth_caps) - 1)
+        heat_scheme = st.selectbox("热力图价格方案", price_schemes)
+        heat_metric = st.radio("指标", ['总销售额', '总销量'], horizontal=True)
+        heat_df = scenario_results[(scenario_results['growth_cap'] == heat_cap) &
+                                   (scenario_results['price_scheme'] == heat_scheme)]
+        st.altair_chart(
+            alt.Chart(heat_df).mark_rect().encode(
+                x=alt.X('double11_uplift:O', title='双十一提升幅度'),
+                y=alt.Y('double12_uplift:O', title='双十二提升幅度', sort='descending'),
+                color=alt.Color(f'{heat_metric}:Q', title=heat_metric),
+                tooltip=['double11_uplift', 'double12_uplift', '总销量', '总销售额', '峰值日期']
+            )
+        )
+
+        # 对比表：按所选指标排序的情景
+        st.dataframe(
+            scenario_results.sort_values(heat_metric, ascending=False).reset_index(drop=True).rename(columns={
+                'double11_uplift': '双十一提升', 'double12_uplift': '双十二提升', 'newyear_uplift': '元旦提升',
+                'growth_cap': '增长上限', 'price_scheme': '价格方案', 'window': '窗口'
+            }).head(20)
+        )
+        # 导出当前假设范围内的全部情景
+        export_frame("情景模拟结果", scenario_results.reset_index(), "export_scenarios")
+
+
+# ===================== 单品销量预测可视化模块 ====================
+@st.fragment
+def item_section(prefetched):
+    st.markdown("### 单品销量预测（按商品 / 颜色）")
+    item_method = st.selectbox(
+        "单品预测模型", list(baseline_labels), format_func=baseline_labels.get,
+        index=list(baseline_labels).index('croston'), key="item_method"
+    )
+    item_level = st.radio(
+        "预测粒度", ['item', 'item_color'], format_func={'item': '按商品', 'item_color': '按商品×颜色'}.get,
+        horizontal=True
+    )
+
+    # 加载数据（按数据版本缓存，各层预测已调和为与品牌总量一致）
+    item_forecasts = prefetched.get(forecast_items, method=item_method)
+    level_forecast = item_forecasts[item_level]
+    level_history = item_forecasts[f'{item_level}_history']
+
+    # 预测总量Top20
+    item_summary = level_forecast.sum(axis=1).sort_values(ascending=False).rename('预测销量').head(20)
+    item_summary_df = item_summary.reset_index()
+    item_summary_df['商品编号'] = item_summary_df['商品编号'].astype(str)
+    st.dataframe(item_summary_df)
+    # 导出所选粒度的全部单品逐日预测
+    export_frame(f"单品预测_{item_level}", level_forecast.rename(columns=str).reset_index(), "export_item_forecast")
+
+    # 选中商品的历史与预测
+    selected_key = st.selectbox("查看单品", list(item_summary.index), format_func=lambda key: ' / '.join(map(str, key)) if isinstance(key, tuple) else str(key))
+    item_history = level_history.loc[selected_key].iloc[-60:]
+    item_chart_data = pd.DataFrame({
+        '日期': item_history.index.to_list() + item_forecasts['dates'].to_list(),
+        '销量': item_history.to_list() + level_forecast.loc[selected_key].to_list(),
+        '类型': ['实际数据'] * len(item_history) + ['预测数据'] * len(item_forecasts['dates'])
+    })
+    st.altair_chart(
+        alt.Chart(item_chart_data).mark_line().encode(
+            x=alt.X('日期:T', title='日期'),
+            y=alt.Y('销量:Q', title='销量'),
+            color=alt.Color('类型:N', title='数据类型')
+        ).interactive()
+    )
+
+
+# 各分段先放置占位，模型训练与预测并发计算，哪个分段先算完就先显示；交互时只重跑所在分段
+render_sections([
+    (short_term_section, predict_and_analyze, {"method": widget_value("short_term_method", "random_forest")}),
+    (long_term_section, long_term_predict_and_analyze, {"method": widget_value("long_term_method", "gradient_boosting")}),
+    (double11_section, predict_sales_11, {}),
+    (scenario_section, None, {}),
+    (item_section, forecast_items, {"method": widget_value("item_method", "croston")}),
+])
+
+st.button("重新加载")
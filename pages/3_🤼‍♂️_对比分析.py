@@ -1,18 +1,28 @@
 import streamlit as st
+import analysis.预热  # noqa: F401  导入即在后台预热（每个进程一次），放在页面自身的重型导入之前
 import pandas as pd
 import altair as alt
 from analysis.真维斯优衣库对比分析 import BrandSalesAnalyzer
+from analysis.复购分析 import customer_analytics
+from analysis.评论词趋势 import TEXT_SOURCES, term_matrix, top_rising_terms
+from analysis.商品相似度 import BLOCK_WEIGHTS, ITEM_SOURCES, similarity_index
+from analysis.分段渲染 import render_sections
+from analysis.结果导出 import export_frame, export_reviews
 
-@st.cache_data
-def load_data():
+# 结果在会话间共享、不复制（每次运行不再反序列化整份数据），页面只读不修改
+@st.cache_resource(show_spinner=False)
+def load_data(approx=False):
     analyzer = BrandSalesAnalyzer("data\评论_真维斯_清洗后.xlsx", "data\\reviews_uni_clean.xlsx", "data\真维斯_商品销售统计.xlsx")
     analyzer.preprocess()
-    analyzer.compare_total_sales()
     monthly_trends_data = analyzer.get_monthly_trends_data()
-    top_items_data = analyzer.get_top_items_data()
+    top_items_data = analyzer.get_top_items_data(approx=approx)
     satisfaction_distribution_data = analyzer.get_satisfaction_distribution_data()
-    sku_distributions_data = analyzer.get_sku_distributions_data()
-    return monthly_trends_data, top_items_data, satisfaction_distribution_data, sku_distributions_data
+    sku_distributions_data = analyzer.get_sku_distributions_data(approx=approx)
+    distinct_counts = analyzer.get_distinct_counts(approx=approx)
+    # 各对比指标的自助法置信区间（精确计数上计算，不受近似统计开关影响）
+    intervals = analyzer.get_comparison_intervals()
+    return (monthly_trends_data, top_items_data, satisfaction_distribution_data, sku_distributions_data,
+            distinct_counts, intervals)
 
 st.set_page_config(page_title="对比分析", page_icon="🤼‍♂️")
 
@@ -24,141 +34,316 @@ st.write(
     通过这些对比图表，你可以直观地了解两个品牌在不同方面的表现差异。"""
 )
 
-# 加载数据
-months, jw_counts, uq_counts = load_data()[0]
-jw_top_items, jw_top_counts, uq_top_items, uq_top_counts = load_data()[1]
-levels, jw_levels, uq_levels = load_data()[2]
-colors_j_top, colors_u_top, sizes_j_top, sizes_u_top = load_data()[3]
+# 近似统计：热销商品、热门颜色/尺码与去重计数改由按月缓存的流式草图合并得到
+approx = st.sidebar.checkbox("近似统计（流式草图）", value=False,
+                             help="Space-Saving 统计 Top10，HyperLogLog 估计不同商品/用户数，内存有界且误差可知")
 
-# 计算一些统计信息
-total_comments_jw = sum(jw_counts)
-total_comments_uq = sum(uq_counts)
+# 侧边栏（统计信息占位由销售汇总分段填充，分段单独重跑时在原位置更新）
+summary_slot = st.sidebar.empty()
+# 两个品牌的评论明细（按月份分区逐批导出）
+with st.sidebar:
+    export_reviews("真维斯评论明细", "评论_真维斯_清洗后", widget_key="export_reviews_jw")
+    export_reviews("优衣库评论明细", "reviews_uni_clean", widget_key="export_reviews_uq")
 
 
-# 在侧边栏添加统计信息
-st.sidebar.markdown("### 统计信息")
-st.sidebar.metric(label="真维斯 总评论数量", value=total_comments_jw)
-st.sidebar.metric(label="优衣库 总评论数量", value=total_comments_uq)
+def common_term_months():
+    """两个品牌都有上一个自然月数据的月份"""
+    return sorted(set.intersection(*(set(term_matrix(brand).comparable_months()) for brand in TEXT_SOURCES)))
+
+
+# ===================== 销售汇总对比模块 ====================
+@st.fragment
+def total_sales_section(prefetched):
+    # 加载数据
+    (_, jw_counts, uq_counts), _, _, _, distinct_counts, intervals = prefetched.get(load_data, approx=approx)
+
+    # 在侧边栏添加统计信息
+    with summary_slot.container():
+        st.markdown("### 统计信息")
+        st.metric(label="真维斯 总评论数量", value=sum(jw_counts))
+        st.metric(label="优衣库 总评论数量", value=sum(uq_counts))
+        for _, row in distinct_counts.iterrows():
+            st.metric(label=f"{row['品牌']} 不同用户数", value=int(row['用户数']))
+        if approx:
+            st.caption(f"去重计数为 HyperLogLog 估计，相对标准误差约 ±{distinct_counts['相对误差'].iloc[0]:.1%}")
+
+    st.markdown("### 销售汇总对比（95% 置信区间）")
+    total_sales_ci = intervals["total_sales"].set_index("指标")
+    total_cols = st.columns(3)
+    for col, metric in zip(total_cols, ["真维斯 销售额", "优衣库 销售额", "销售额差值"]):
+        row = total_sales_ci.loc[metric]
+        col.metric(metric, f"¥{row['估计值']:,.0f}", help=f"95% 置信区间 ¥{row['下限']:,.0f} ~ ¥{row['上限']:,.0f}")
+    st.dataframe(total_sales_ci.style.format("{:,.0f}"))
+    export_frame("销售汇总置信区间", total_sales_ci.reset_index(), "export_total_sales")
+    st.caption("自助法：各商品评论数按 Poisson 重抽样后重新按价格分层估价；区间不含 0 的差值视为显著。")
 
 
 # ===================== 月度评论量趋势对比可视化模块 ====================
-monthly_trends_df = pd.DataFrame({"月份": months, "真维斯": jw_counts, "优衣库": uq_counts})
-monthly_trends_chart = alt.Chart(monthly_trends_df).transform_fold(
-    ["真维斯", "优衣库"],
-    as_=["品牌", "评论数量"]
-).mark_line().encode(
-    x=alt.X("月份:T", title="时间"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-)
-st.markdown("### 月度评论量趋势对比（近似销售量）")
-st.altair_chart(monthly_trends_chart.interactive())
+@st.fragment
+def monthly_section(prefetched):
+    # 加载数据
+    (months, jw_counts, uq_counts), _, _, _, _, intervals = prefetched.get(load_data, approx=approx)
+
+    monthly_trends_df = pd.DataFrame({"月份": months, "真维斯": jw_counts, "优衣库": uq_counts})
+    monthly_trends_chart = alt.Chart(monthly_trends_df).transform_fold(
+        ["真维斯", "优衣库"],
+        as_=["品牌", "评论数量"]
+    ).mark_line().encode(
+        x=alt.X("月份:T", title="时间"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    )
+
+    # 置信区间带
+    monthly_ci = intervals["monthly"]
+    monthly_band_df = pd.concat([
+        pd.DataFrame({"月份": monthly_ci["月份"], "品牌": brand,
+                      "下限": monthly_ci[f"{brand}_下限"], "上限": monthly_ci[f"{brand}_上限"]})
+        for brand in ["真维斯", "优衣库"]
+    ])
+    monthly_band_chart = alt.Chart(monthly_band_df).mark_area(opacity=0.2).encode(
+        x="月份:T",
+        y="下限:Q",
+        y2="上限:Q",
+        color=alt.Color("品牌:N", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    )
+    st.markdown("### 月度评论量趋势对比（近似销售量）")
+    st.altair_chart((monthly_band_chart + monthly_trends_chart).interactive())
+    export_frame("月度评论量置信区间", monthly_ci, "export_monthly")
+    st.caption(f"阴影为 95% 置信区间；{int(monthly_ci['差异显著'].sum())}/{len(monthly_ci)} 个月两品牌评论量差异显著")
+
 
 # ===================== 热销商品Top10对比可视化模块 ====================
-# 真维斯热销商品 Top10 图表
-top_items_jw_df = pd.DataFrame({"商品编号": jw_top_items.values, "评论数量": jw_top_counts.values})
-top_items_jw_df["品牌"] = "真维斯"  # 添加品牌字段
-top_items_jw_chart = alt.Chart(top_items_jw_df).mark_bar().encode(  
-    x=alt.X("商品编号:N", title="商品编号", sort="-y"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="真维斯 - 热销商品 Top10",
-    width=275  
-)
+@st.fragment
+def top_items_section(prefetched):
+    # 加载数据
+    jw_top_items, jw_top_counts, uq_top_items, uq_top_counts = prefetched.get(load_data, approx=approx)[1]
 
-# 优衣库热销商品 Top10 图表
-top_items_uq_df = pd.DataFrame({"商品编号": uq_top_items.values, "评论数量": uq_top_counts.values})
-top_items_uq_df["品牌"] = "优衣库"  # 添加品牌字段
-top_items_uq_chart = alt.Chart(top_items_uq_df).mark_bar().encode(
-    x=alt.X("商品编号:N", title="商品编号", sort="-y"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="优衣库 - 热销商品 Top10",
-    width=275  
-)
+    # 真维斯热销商品 Top10 图表
+    top_items_jw_df = pd.DataFrame({"商品编号": jw_top_items.values, "评论数量": jw_top_counts.values})
+    top_items_jw_df["品牌"] = "真维斯"  # 添加品牌字段
+    top_items_jw_chart = alt.Chart(top_items_jw_df).mark_bar().encode(  
+        x=alt.X("商品编号:N", title="商品编号", sort="-y"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="真维斯 - 热销商品 Top10",
+        width=275  
+    )
+
+    # 优衣库热销商品 Top10 图表
+    top_items_uq_df = pd.DataFrame({"商品编号": uq_top_items.values, "评论数量": uq_top_counts.values})
+    top_items_uq_df["品牌"] = "优衣库"  # 添加品牌字段
+    top_items_uq_chart = alt.Chart(top_items_uq_df).mark_bar().encode(
+        x=alt.X("商品编号:N", title="商品编号", sort="-y"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="优衣库 - 热销商品 Top10",
+        width=275  
+    )
+
+    # 将热销商品 Top10 图表并排显示
+    top_items_chart = alt.hconcat(top_items_jw_chart, top_items_uq_chart).resolve_scale(x='independent')
+    st.markdown("### 热销商品 Top10 对比")
+    st.altair_chart(top_items_chart.interactive())
 
-# 将热销商品 Top10 图表并排显示
-top_items_chart = alt.hconcat(top_items_jw_chart, top_items_uq_chart).resolve_scale(x='independent')
-st.markdown("### 热销商品 Top10 对比")
-st.altair_chart(top_items_chart.interactive())
 
 # ===================== 满意度等级分布对比可视化模块 ====================
-satisfaction_distribution_df = pd.DataFrame({"满意度等级": levels, "真维斯": jw_levels, "优衣库": uq_levels})
-satisfaction_distribution_chart = alt.Chart(satisfaction_distribution_df).transform_fold(
-    ["真维斯", "优衣库"],
-    as_=["品牌", "评论数量"]
-).mark_bar().encode(
-    x=alt.X("满意度等级:N", title="满意度等级", axis=alt.Axis(labelAngle=0)),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-)
-st.markdown("### 满意度等级分布对比")
-st.altair_chart(satisfaction_distribution_chart.interactive())
+@st.fragment
+def satisfaction_section(prefetched):
+    # 加载数据
+    _, _, (levels, jw_levels, uq_levels), _, _, intervals = prefetched.get(load_data, approx=approx)
+
+    satisfaction_distribution_df = pd.DataFrame({"满意度等级": levels, "真维斯": jw_levels, "优衣库": uq_levels})
+    satisfaction_distribution_chart = alt.Chart(satisfaction_distribution_df).transform_fold(
+        ["真维斯", "优衣库"],
+        as_=["品牌", "评论数量"]
+    ).mark_bar().encode(
+        x=alt.X("满意度等级:N", title="满意度等级", axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    )
+    st.markdown("### 满意度等级分布对比")
+    st.altair_chart(satisfaction_distribution_chart.interactive())
+
+    # 各等级占比及差值的置信区间
+    satisfaction_ci = intervals["satisfaction"]
+    st.dataframe(
+        satisfaction_ci.assign(**{
+            brand: [f"{v:.1%} [{lo:.1%}, {hi:.1%}]" for v, lo, hi in
+                    zip(satisfaction_ci[brand], satisfaction_ci[f"{brand}_下限"], satisfaction_ci[f"{brand}_上限"])]
+            for brand in ["真维斯", "优衣库", "差值"]
+        })[["满意度等级", "真维斯", "优衣库", "差值", "差异显著"]].rename(columns={"差值": "占比差值"})
+    )
+    export_frame("满意度占比置信区间", satisfaction_ci, "export_satisfaction")
+
 
 # ===================== 热门颜色Top10对比可视化模块 ====================
-# 合并热门颜色数据
-colors_j_top_df = pd.DataFrame({"颜色": list(colors_j_top.keys()), "评论数量": list(colors_j_top.values())})
-colors_j_top_df["品牌"] = "真维斯"  # 添加品牌字段
-
-colors_u_top_df = pd.DataFrame({"颜色": list(colors_u_top.keys()), "评论数量": list(colors_u_top.values())})
-colors_u_top_df["品牌"] = "优衣库"  # 添加品牌字段
-
-# 创建热门颜色图表
-colors_j_top_chart = alt.Chart(colors_j_top_df).mark_bar().encode(
-    x=alt.X("颜色:N", title="颜色", sort="-y"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="真维斯 - 热门颜色 Top10",
-    width=275  
-)
+@st.fragment
+def colors_section(prefetched):
+    # 加载数据
+    colors_j_top, colors_u_top, _, _ = prefetched.get(load_data, approx=approx)[3]
 
-colors_u_top_chart = alt.Chart(colors_u_top_df).mark_bar().encode(
-    x=alt.X("颜色:N", title="颜色", sort="-y"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="优衣库 - 热门颜色 Top10",
-    width=275  
-)
+    # 合并热门颜色数据
+    colors_j_top_df = pd.DataFrame({"颜色": list(colors_j_top.keys()), "评论数量": list(colors_j_top.values())})
+    colors_j_top_df["品牌"] = "真维斯"  # 添加品牌字段
+
+    colors_u_top_df = pd.DataFrame({"颜色": list(colors_u_top.keys()), "评论数量": list(colors_u_top.values())})
+    colors_u_top_df["品牌"] = "优衣库"  # 添加品牌字段
+
+    # 创建热门颜色图表
+    colors_j_top_chart = alt.Chart(colors_j_top_df).mark_bar().encode(
+        x=alt.X("颜色:N", title="颜色", sort="-y"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="真维斯 - 热门颜色 Top10",
+        width=275  
+    )
+
+    colors_u_top_chart = alt.Chart(colors_u_top_df).mark_bar().encode(
+        x=alt.X("颜色:N", title="颜色", sort="-y"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="优衣库 - 热门颜色 Top10",
+        width=275  
+    )
+
+    # 将热门颜色图表并排显示
+    colors_top_chart = alt.hconcat(colors_j_top_chart, colors_u_top_chart).resolve_scale(x='independent')
+    st.markdown("### 热门颜色 Top10 对比")
+    st.altair_chart(colors_top_chart.interactive())
 
-# 将热门颜色图表并排显示
-colors_top_chart = alt.hconcat(colors_j_top_chart, colors_u_top_chart).resolve_scale(x='independent')
-st.markdown("### 热门颜色 Top10 对比")
-st.altair_chart(colors_top_chart.interactive())
 
 # ===================== 热门尺码Top10对比可视化模块 ====================
-# 合并热门尺码数据
-sizes_j_top_df = pd.DataFrame({"尺码": list(sizes_j_top.keys()), "评论数量": list(sizes_j_top.values())})
-sizes_j_top_df["品牌"] = "真维斯"  # 添加品牌字段
-
-sizes_u_top_df = pd.DataFrame({"尺码": list(sizes_u_top.keys()), "评论数量": list(sizes_u_top.values())})
-sizes_u_top_df["品牌"] = "优衣库"  # 添加品牌字段
-
-# 创建热门尺码图表
-sizes_j_top_chart = alt.Chart(sizes_j_top_df).mark_bar().encode(
-    x=alt.X("尺码:N", title="尺码", sort="-y", axis=alt.Axis(labelAngle=0)),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="真维斯 - 热门尺码 Top10",
-    width=275
-)
+@st.fragment
+def sizes_section(prefetched):
+    # 加载数据
+    _, _, sizes_j_top, sizes_u_top = prefetched.get(load_data, approx=approx)[3]
+
+    # 合并热门尺码数据
+    sizes_j_top_df = pd.DataFrame({"尺码": list(sizes_j_top.keys()), "评论数量": list(sizes_j_top.values())})
+    sizes_j_top_df["品牌"] = "真维斯"  # 添加品牌字段
+
+    sizes_u_top_df = pd.DataFrame({"尺码": list(sizes_u_top.keys()), "评论数量": list(sizes_u_top.values())})
+    sizes_u_top_df["品牌"] = "优衣库"  # 添加品牌字段
+
+    # 创建热门尺码图表
+    sizes_j_top_chart = alt.Chart(sizes_j_top_df).mark_bar().encode(
+        x=alt.X("尺码:N", title="尺码", sort="-y", axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="真维斯 - 热门尺码 Top10",
+        width=275
+    )
+
+    sizes_u_top_chart = alt.Chart(sizes_u_top_df).mark_bar().encode(
+        x=alt.X("尺码:N", title="尺码", sort="-y"),
+        y=alt.Y("评论数量:Q", title="评论数量"),
+        color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
+    ).properties(
+        title="优衣库 - 热门尺码 Top10",
+        width=275
+    )
+
+    # 将热门尺码图表并排显示
+    sizes_top_chart = alt.hconcat(sizes_j_top_chart, sizes_u_top_chart).resolve_scale(x='independent')
+    st.markdown("### 热门尺码 Top10 对比")
+    st.altair_chart(sizes_top_chart.interactive())
+
+
+# ===================== 复购与客群分析模块 ====================
+@st.fragment
+def customer_section(prefetched):
+    st.markdown("### 复购与客群分析")
+    # 加载数据
+    customers = prefetched.get(customer_analytics)
+    repeat_df = customers["repeat"]
+    overlap = customers["overlap"]
+
+    repeat_cols = st.columns(3)
+    for col, (_, row) in zip(repeat_cols, repeat_df.iterrows()):
+        col.metric(f"{row['品牌']} 复购率", f"{row['复购率']:.1%}", help=f"跨月复购率 {row['跨月复购率']:.1%}")
+    repeat_cols[2].metric("两品牌共同用户", f"{overlap['共同用户数']:,}", help=f"Jaccard 重合度 {overlap['重合度']:.1%}")
+    st.caption("用户标识：" + "；".join(f"{brand} 使用 {', '.join(cols)}" for brand, cols in customers["id_columns"].items())
+               + "。加密用户 ID 为空时以脱敏昵称近似，同名用户会被合并，复购率偏高。")
+
+    # 首购月份留存热力图
+    cohort_brand = st.selectbox("留存矩阵品牌", list(customers["cohorts"]))
+    cohort = customers["cohorts"][cohort_brand]
+    cohort_df = cohort.drop(columns="首购用户数").reset_index().melt(
+        id_vars="首购月份", var_name="距首购月数", value_name="留存率")
+    st.altair_chart(
+        alt.Chart(cohort_df).mark_rect().encode(
+            x=alt.X("距首购月数:O", title="距首购月数"),
+            y=alt.Y("首购月份:O", title="首购月份"),
+            color=alt.Color("留存率:Q", title="留存率", scale=alt.Scale(scheme="blues")),
+            tooltip=["首购月份", "距首购月数", alt.Tooltip("留存率:Q", format=".1%")]
+        )
+    )
+
+
+# ===================== 评论热词趋势对比模块 ====================
+@st.fragment
+def rising_terms_section(prefetched):
+    st.markdown("### 评论上升热词对比")
+    # 加载数据（两个品牌都有上一个自然月数据的月份）
+    common_months = prefetched.get(common_term_months)
+    compare_month = st.selectbox("对比月份", common_months[::-1], key="compare_term_month")
+    term_cols = st.columns(len(TEXT_SOURCES))
+    for col, brand in zip(term_cols, TEXT_SOURCES):
+        col.markdown(f"**{brand}**")
+        col.dataframe(
+            top_rising_terms(brand, month=compare_month, top_n=10)[['词', '本月评论数', '提及率变化']]
+            .style.format({'提及率变化': '{:+.2%}'})
+        )
+
+
+# ===================== 相似竞品查找模块 ====================
+@st.fragment
+def similar_section(prefetched):
+    st.markdown("### 相似竞品查找")
+    # 加载数据
+    index = prefetched.get(similarity_index)
+    block_names = {"color": "颜色", "family": "色系", "size": "尺码", "price": "价格带", "month": "季节性"}
+    query_brand = st.radio("商品品牌", list(ITEM_SOURCES), horizontal=True, key="similar_brand")
+    competitor = next(brand for brand in ITEM_SOURCES if brand != query_brand)
+    query_item = st.selectbox("商品编号", [item.split(":", 1)[1] for item in index.items if item.startswith(f"{query_brand}:")],
+                              key="similar_item")
+    similar_top_k = st.slider("相似竞品数量", 3, 20, 5, key="similar_top_k")
+    similar = index.most_similar([f"{query_brand}:{query_item}"], brand=competitor, top_k=similar_top_k)
+    # 相似度按画像各部分拆分，便于判断“像在哪里”
+    breakdown = pd.DataFrame([index.explain(row["商品"], row["相似商品"]) for _, row in similar.iterrows()])
+    similar_df = pd.concat([similar[["排名", "相似商品", "相似度"]], breakdown.rename(columns=block_names)], axis=1)
+    similar_df["相似商品"] = similar_df["相似商品"].str.split(":", n=1).str[1]
+    st.dataframe(similar_df.style.format({col: "{:.3f}" for col in ["相似度", *block_names.values()]}), hide_index=True)
+    export_frame(f"{query_brand}{query_item}相似竞品", similar_df, "export_similar")
+
+    # 全部商品的最相似竞品（一次批量查询）
+    with st.expander(f"{query_brand} 全部商品的最相似{competitor}商品"):
+        nearest = index.most_similar([item for item in index.items if item.startswith(f"{query_brand}:")],
+                                     brand=competitor, top_k=1)
+        nearest = nearest.assign(**{col: nearest[col].str.split(":", n=1).str[1] for col in ["商品", "相似商品"]})
+        st.dataframe(nearest[["商品", "相似商品", "相似度"]].sort_values("相似度", ascending=False), hide_index=True)
+    st.caption("商品画像：SKU 颜色与色系占比、尺码分布、按评论量估计的价格带、各月评论占比（季节性）；"
+               f"各部分单独归一化后按权重 {', '.join(f'{block_names[b]} {w:g}' for b, w in BLOCK_WEIGHTS.items())} "
+               "拼接，相似度为余弦相似度，拆分列之和即总相似度。")
 
-sizes_u_top_chart = alt.Chart(sizes_u_top_df).mark_bar().encode(
-    x=alt.X("尺码:N", title="尺码", sort="-y"),
-    y=alt.Y("评论数量:Q", title="评论数量"),
-    color=alt.Color("品牌:N", title="品牌", scale=alt.Scale(domain=["真维斯", "优衣库"], range=["blue", "orange"]))
-).properties(
-    title="优衣库 - 热门尺码 Top10",
-    width=275
-)
 
-# 将热门尺码图表并排显示
-sizes_top_chart = alt.hconcat(sizes_j_top_chart, sizes_u_top_chart).resolve_scale(x='independent')
-st.markdown("### 热门尺码 Top10 对比")
-st.altair_chart(sizes_top_chart.interactive())
+# 各分段先放置占位，数据并发加载，哪个分段先加载完就先显示；交互时只重跑所在分段
+render_sections([
+    (total_sales_section, load_data, {"approx": approx}),
+    (monthly_section, load_data, {"approx": approx}),
+    (top_items_section, load_data, {"approx": approx}),
+    (satisfaction_section, load_data, {"approx": approx}),
+    (colors_section, load_data, {"approx": approx}),
+    (sizes_section, load_data, {"approx": approx}),
+    (customer_section, customer_analytics, {}),
+    (rising_terms_section, common_term_months, {}),
+    (similar_section, similarity_index, {}),
+])
 
 st.button("重新加载")
@@ -1,4 +1,6 @@
 import streamlit as st
+# 入口脚本导入即在后台预导入各页面模块、预加载共享数据（每个服务进程一次）
+import analysis.预热  # noqa: F401
 
 st.set_page_config(
     page_title="TrueTrend",